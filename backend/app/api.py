@@ -1,27 +1,33 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
-from typing import List
-from supabase import Client
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query, Request, Response
+from fastapi.responses import RedirectResponse, StreamingResponse
+from typing import List, Optional
+from supabase import AClient
+import asyncio
 import secrets
-import uuid
+from datetime import datetime
 
-from . import services, schemas, customer_services
+from . import services, schemas, customer_services, catalog_io, images, jobs, translation_scanner
 from .config import settings
 from .supabase_client import get_supabase_client
+from .order_feed import order_feed
+from .responses import FastJSONRoute, trusted_response
 
-main_router = APIRouter()
+main_router = APIRouter(route_class=FastJSONRoute)
 
-router = APIRouter(prefix="/api")
+router = APIRouter(prefix="/api", route_class=FastJSONRoute)
 admin_router = APIRouter(
     prefix="/api/admin",
+    route_class=FastJSONRoute,
     dependencies=[Depends(services.get_current_admin_user)],
 )
 customers_router = APIRouter(
     prefix="/api/admin",
+    route_class=FastJSONRoute,
     dependencies=[Depends(services.get_current_admin_user)],
 )
 
 @router.post("/login", response_model=schemas.Token, tags=["Authentication"])
-def login_for_access_token(form_data: schemas.AdminLoginRequest):
+async def login_for_access_token(form_data: schemas.AdminLoginRequest):
     is_valid_password = secrets.compare_digest(form_data.password, settings.AZHAR_ADMIN_INITIAL_PASSWORD)
     if not is_valid_password:
         raise HTTPException(
@@ -32,258 +38,495 @@ def login_for_access_token(form_data: schemas.AdminLoginRequest):
     access_token = services.create_access_token(data={"sub": settings.AZHAR_ADMIN_EMAIL})
     return {"access_token": access_token, "token_type": "bearer"}
 
+def product_list_query(
+    limit: Optional[int] = Query(None, ge=1, le=settings.PRODUCTS_PAGE_MAX),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = None,
+    category_id: Optional[int] = None,
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    in_stock: Optional[bool] = None,
+    q: Optional[str] = Query(None, max_length=200),
+    sort: schemas.ProductSort = schemas.ProductSort.newest,
+) -> schemas.ProductListQuery:
+    return schemas.ProductListQuery(
+        limit=limit, offset=offset, cursor=cursor, category_id=category_id,
+        min_price=min_price, max_price=max_price, in_stock=in_stock, q=q, sort=sort,
+    )
+
+def admin_product_list_query(
+    query: schemas.ProductListQuery = Depends(product_list_query),
+    has_orders: Optional[bool] = None,
+) -> schemas.ProductListQuery:
+    # Which products have been ordered is for the admin listing only.
+    return query.model_copy(update={"has_orders": has_orders})
+
+def _has_listing_params(request: Request, query_model: type) -> bool:
+    # Only the listing's own parameters count, not e.g. a cache-buster.
+    return any(name in request.query_params for name in query_model.model_fields)
+
+async def _list_products(request: Request, response: Response, query: schemas.ProductListQuery, supabase: AClient):
+    # Without any listing parameters the full catalog is returned as before.
+    if not _has_listing_params(request, schemas.ProductListQuery):
+        return await services.get_products(supabase=supabase)
+    products, total, next_cursor = await services.get_products_page(query=query, page_size=settings.PRODUCTS_PAGE_SIZE, supabase=supabase)
+    if total is not None:
+        response.headers["X-Total-Count"] = str(total)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return products
+
 @router.get("/products", response_model=List[schemas.Product], tags=["Products"])
-def list_products(supabase: Client = Depends(get_supabase_client)):
-    return services.get_products(supabase=supabase)
+@trusted_response
+async def list_products(request: Request, response: Response, query: schemas.ProductListQuery = Depends(product_list_query), supabase: AClient = Depends(get_supabase_client)):
+    return await _list_products(request, response, query, supabase)
+
+@router.get("/products/cards", response_model=List[schemas.ProductCard], tags=["Products"])
+@trusted_response
+async def list_product_cards(response: Response, query: schemas.ProductListQuery = Depends(product_list_query), supabase: AClient = Depends(get_supabase_client)):
+    cards, total, next_cursor = await services.get_product_cards_page(query=query, page_size=settings.PRODUCTS_PAGE_SIZE, supabase=supabase)
+    if total is not None:
+        response.headers["X-Total-Count"] = str(total)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return cards
+
+@router.get("/products/search", response_model=List[schemas.ProductCard], tags=["Products"])
+@trusted_response
+async def search_products(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(settings.PRODUCTS_PAGE_SIZE, ge=1, le=settings.PRODUCTS_PAGE_MAX),
+    offset: int = Query(0, ge=0),
+    supabase: AClient = Depends(get_supabase_client),
+):
+    results, total = await services.search_products(q=q, limit=limit, offset=offset, supabase=supabase)
+    response.headers["X-Total-Count"] = str(total)
+    return results
 
 @router.get("/products/{product_id}", response_model=schemas.Product, tags=["Products"])
-def get_product(product_id: int, supabase: Client = Depends(get_supabase_client)):
-    db_product = services.get_product(product_id=product_id, supabase=supabase)
+@trusted_response
+async def get_product(product_id: int, supabase: AClient = Depends(get_supabase_client)):
+    db_product = await services.get_product(product_id=product_id, supabase=supabase)
     if db_product is None:
         raise HTTPException(status_code=404, detail="Product not found")
     return db_product
 
 @router.get("/categories", response_model=List[schemas.Category], tags=["Categories"])
-def list_categories(supabase: Client = Depends(get_supabase_client)):
-    return services.get_categories(supabase=supabase)
+@trusted_response
+async def list_categories(supabase: AClient = Depends(get_supabase_client)):
+    return await services.get_categories(supabase=supabase)
 
 @router.get("/categories/{category_id}", response_model=schemas.Category, tags=["Categories"])
-def get_category(category_id: int, supabase: Client = Depends(get_supabase_client)):
-    db_category = services.get_category(category_id=category_id, supabase=supabase)
+@trusted_response
+async def get_category(category_id: int, supabase: AClient = Depends(get_supabase_client)):
+    db_category = await services.get_category(category_id=category_id, supabase=supabase)
     if db_category is None:
         raise HTTPException(status_code=404, detail="Category not found")
     return db_category
 
 @router.get("/delivery-areas", response_model=List[schemas.DeliveryArea], tags=["Delivery Areas"])
-def list_delivery_areas_public(supabase: Client = Depends(get_supabase_client)):
-    return services.get_delivery_areas(supabase=supabase)
+async def list_delivery_areas_public(supabase: AClient = Depends(get_supabase_client)):
+    return await services.get_delivery_areas(supabase=supabase)
 
 @router.post("/orders", response_model=schemas.Order, tags=["Orders"])
-def create_order_public(order: schemas.PublicOrderCreate, supabase: Client = Depends(get_supabase_client)):
-    return services.create_public_order(order=order, supabase=supabase)
+async def create_order_public(order: schemas.PublicOrderCreate, supabase: AClient = Depends(get_supabase_client)):
+    return await services.create_public_order(order=order, supabase=supabase)
 
 @router.get("/settings", response_model=schemas.AppSettings, tags=["Settings"])
-def get_settings_public(supabase: Client = Depends(get_supabase_client)):
-    return services.get_app_settings(supabase=supabase)
+async def get_settings_public(supabase: AClient = Depends(get_supabase_client)):
+    return await services.get_app_settings(supabase=supabase)
+
+def _catalog_format(request: Request, format: Optional[schemas.CatalogFormat]) -> schemas.CatalogFormat:
+    if format is not None:
+        return format
+    content_type = request.headers.get("content-type", "")
+    return schemas.CatalogFormat.ndjson if "ndjson" in content_type or "jsonl" in content_type else schemas.CatalogFormat.csv
+
+@admin_router.post("/catalog/import/products", response_model=schemas.ImportReport, tags=["Admin - Catalog"])
+async def import_products(request: Request, format: Optional[schemas.CatalogFormat] = None, supabase: AClient = Depends(get_supabase_client)):
+    """
+    Streams a CSV or NDJSON request body of products (id, name, description,
+    price, stock_quantity, category_id) into the catalog. Rows with an id
+    update that product, setting only the columns given; rows without one
+    are created. Ids that do not exist are reported as errors.
+    """
+    return await catalog_io.import_products(_catalog_format(request, format), request.stream(), supabase)
+
+@admin_router.post("/catalog/import/variants", response_model=schemas.ImportReport, tags=["Admin - Catalog"])
+async def import_variants(request: Request, format: Optional[schemas.CatalogFormat] = None, supabase: AClient = Depends(get_supabase_client)):
+    """
+    Streams a CSV or NDJSON request body of variants (id, product_id, name,
+    price, stock_quantity, image_url) into the catalog.
+    """
+    return await catalog_io.import_variants(_catalog_format(request, format), request.stream(), supabase)
+
+def _export_response(rows, format: schemas.CatalogFormat, name: str) -> StreamingResponse:
+    media_type = "text/csv; charset=utf-8" if format == schemas.CatalogFormat.csv else "application/x-ndjson"
+    return StreamingResponse(rows, media_type=media_type, headers={"Content-Disposition": f'attachment; filename="{name}.{format.value}"'})
+
+@admin_router.get("/catalog/export/products", tags=["Admin - Catalog"])
+async def export_products(format: schemas.CatalogFormat = schemas.CatalogFormat.csv, supabase: AClient = Depends(get_supabase_client)):
+    return _export_response(catalog_io.export_products(format, supabase), format, "products")
+
+@admin_router.get("/catalog/export/variants", tags=["Admin - Catalog"])
+async def export_variants(format: schemas.CatalogFormat = schemas.CatalogFormat.csv, supabase: AClient = Depends(get_supabase_client)):
+    return _export_response(catalog_io.export_variants(format, supabase), format, "product_variants")
+
+@admin_router.get("/jobs", response_model=List[schemas.Job], tags=["Admin - Jobs"])
+async def list_jobs(status: Optional[schemas.JobStatus] = None, limit: int = Query(50, ge=1, le=500), supabase: AClient = Depends(get_supabase_client)):
+    return await jobs.list_jobs(status.value if status else None, limit, supabase)
+
+@admin_router.post("/jobs/image-renditions", tags=["Admin - Jobs"])
+async def backfill_image_renditions(supabase: AClient = Depends(get_supabase_client)):
+    """
+    Queues rendition jobs for product images uploaded before renditions
+    existed.
+    """
+    return {"queued": await jobs.backfill_image_renditions(supabase)}
 
 @admin_router.post("/products", response_model=schemas.Product, tags=["Admin - Products"])
-def create_product(product: schemas.ProductCreate, supabase: Client = Depends(get_supabase_client)):
-    return services.create_product(product=product, supabase=supabase)
+async def create_product(product: schemas.ProductCreate, supabase: AClient = Depends(get_supabase_client)):
+    return await services.create_product(product=product, supabase=supabase)
 
 @admin_router.patch("/products/{product_id}", response_model=schemas.Product, tags=["Admin - Products"])
-def update_product(product_id: int, product: schemas.ProductUpdate, supabase: Client = Depends(get_supabase_client)):
-    db_product = services.update_product(product_id=product_id, product=product, supabase=supabase)
+async def update_product(product_id: int, product: schemas.ProductUpdate, supabase: AClient = Depends(get_supabase_client)):
+    db_product = await services.update_product(product_id=product_id, product=product, supabase=supabase)
     if db_product is None:
         raise HTTPException(status_code=404, detail="Product not found")
     return db_product
 
 @admin_router.delete("/products/{product_id}", status_code=status.HTTP_204_NO_CONTENT, tags=["Admin - Products"])
-def delete_product(product_id: int, supabase: Client = Depends(get_supabase_client)):
-    success = services.delete_product(product_id=product_id, supabase=supabase)
+async def delete_product(product_id: int, supabase: AClient = Depends(get_supabase_client)):
+    success = await services.delete_product(product_id=product_id, supabase=supabase)
     if not success:
         raise HTTPException(status_code=404, detail="Product not found")
     return None
 
 @admin_router.post("/categories", response_model=schemas.Category, tags=["Admin - Categories"])
-def create_category(category: schemas.CategoryCreate, supabase: Client = Depends(get_supabase_client)):
-    return services.create_category(category=category, supabase=supabase)
+async def create_category(category: schemas.CategoryCreate, supabase: AClient = Depends(get_supabase_client)):
+    return await services.create_category(category=category, supabase=supabase)
 
 @admin_router.get("/products", response_model=List[schemas.Product], tags=["Admin - Products"])
-def admin_list_products(supabase: Client = Depends(get_supabase_client)):
-    return services.get_products(supabase=supabase)
+@trusted_response
+async def admin_list_products(request: Request, response: Response, query: schemas.ProductListQuery = Depends(admin_product_list_query), supabase: AClient = Depends(get_supabase_client)):
+    return await _list_products(request, response, query, supabase)
 
 @admin_router.get("/categories", response_model=List[schemas.Category], tags=["Admin - Categories"])
-def admin_list_categories(supabase: Client = Depends(get_supabase_client)):
-    return services.get_categories(supabase=supabase)
+@trusted_response
+async def admin_list_categories(supabase: AClient = Depends(get_supabase_client)):
+    return await services.get_categories(supabase=supabase)
 
 @admin_router.patch("/categories/{category_id}", response_model=schemas.Category, tags=["Admin - Categories"])
-def update_category(category_id: int, category: schemas.CategoryCreate, supabase: Client = Depends(get_supabase_client)):
-    db_category = services.update_category(category_id=category_id, category=category, supabase=supabase)
+async def update_category(category_id: int, category: schemas.CategoryCreate, supabase: AClient = Depends(get_supabase_client)):
+    db_category = await services.update_category(category_id=category_id, category=category, supabase=supabase)
     if db_category is None:
         raise HTTPException(status_code=404, detail="Category not found")
     return db_category
 
 @admin_router.post("/products/{product_id}/images", response_model=schemas.ProductImage, tags=["Admin - Products"])
-def upload_product_image(product_id: int, file: UploadFile = File(...), supabase: Client = Depends(get_supabase_client)):
-    file_path = f"{product_id}/{uuid.uuid4()}{file.filename}"
+async def upload_product_image(product_id: int, file: UploadFile = File(...), supabase: AClient = Depends(get_supabase_client)):
     try:
-        file_content = file.file.read()
-        supabase.storage.from_("products").upload(file_path, file_content)
-        image_url = supabase.storage.from_("products").get_public_url(file_path)
-        return services.create_product_image(product_id=product_id, image_url=image_url, supabase=supabase)
+        stored = await images.store_image(file, str(product_id), supabase)
+        return await services.create_product_image(product_id=product_id, supabase=supabase, **stored)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@admin_router.post("/products/{product_id}/images/batch", response_model=List[schemas.ProductImageUploadResult], tags=["Admin - Products"])
+async def upload_product_images(product_id: int, files: List[UploadFile] = File(...), supabase: AClient = Depends(get_supabase_client)):
+    """
+    Uploads several images at once, processing up to IMAGE_UPLOAD_CONCURRENCY
+    files in parallel and saving them in one insert. Returns a result per file
+    in upload order; a file that fails carries an `error` and does not stop
+    the others.
+    """
+    if len(files) > settings.IMAGE_UPLOAD_MAX_FILES:
+        raise HTTPException(status_code=400, detail=f"At most {settings.IMAGE_UPLOAD_MAX_FILES} files can be uploaded at once.")
+    stored = await images.store_images(files, str(product_id), supabase)
+    results = [schemas.ProductImageUploadResult(filename=file.filename) for file in files]
+    saved = []
+    for result, outcome in zip(results, stored):
+        if isinstance(outcome, HTTPException):
+            result.error = outcome.detail
+        elif isinstance(outcome, Exception):
+            result.error = str(outcome)
+        else:
+            saved.append((result, outcome))
+    if saved:
+        try:
+            rows = await services.create_product_images(product_id=product_id, images=[image for _, image in saved], supabase=supabase)
+        except Exception as e:
+            await jobs.enqueue("storage.remove", {"urls": [r["url"] for _, image in saved for r in image["renditions"]]}, supabase)
+            raise HTTPException(status_code=500, detail=str(e))
+        for (result, _), row in zip(saved, rows):
+            result.image = schemas.ProductImage.model_validate(row)
+    return results
+
 @admin_router.delete("/products/images/{image_id}", status_code=status.HTTP_204_NO_CONTENT, tags=["Admin - Products"])
-def delete_product_image(image_id: int, supabase: Client = Depends(get_supabase_client)):
-    success = services.delete_product_image(image_id=image_id, supabase=supabase)
+async def delete_product_image(image_id: int, supabase: AClient = Depends(get_supabase_client)):
+    success = await services.delete_product_image(image_id=image_id, supabase=supabase)
     if not success:
         raise HTTPException(status_code=404, detail="Image not found")
     return None
 
 @admin_router.post("/products/images/{image_id}/set-primary", response_model=schemas.ProductImage, tags=["Admin - Products"])
-def set_primary_image(image_id: int, supabase: Client = Depends(get_supabase_client)):
-    image = services.set_primary_image(image_id=image_id, supabase=supabase)
+async def set_primary_image(image_id: int, supabase: AClient = Depends(get_supabase_client)):
+    image = await services.set_primary_image(image_id=image_id, supabase=supabase)
     if image is None:
         raise HTTPException(status_code=404, detail="Image not found")
     return image
 
 @admin_router.post("/products/{product_id}/variants", response_model=schemas.ProductVariant, tags=["Admin - Products"])
-def create_variant(product_id: int, variant: schemas.ProductVariantCreate, supabase: Client = Depends(get_supabase_client)):
-    return services.create_product_variant(product_id=product_id, variant=variant, supabase=supabase)
+async def create_variant(product_id: int, variant: schemas.ProductVariantCreate, supabase: AClient = Depends(get_supabase_client)):
+    return await services.create_product_variant(product_id=product_id, variant=variant, supabase=supabase)
 
 @admin_router.patch("/products/variants/{variant_id}", response_model=schemas.ProductVariant, tags=["Admin - Products"])
-def update_variant(variant_id: int, variant: schemas.ProductVariantUpdate, supabase: Client = Depends(get_supabase_client)):
-    db_variant = services.update_product_variant(variant_id=variant_id, variant=variant, supabase=supabase)
+async def update_variant(variant_id: int, variant: schemas.ProductVariantUpdate, supabase: AClient = Depends(get_supabase_client)):
+    db_variant = await services.update_product_variant(variant_id=variant_id, variant=variant, supabase=supabase)
     if db_variant is None:
         raise HTTPException(status_code=404, detail="Variant not found")
     return db_variant
 
 @admin_router.delete("/products/variants/{variant_id}", status_code=status.HTTP_204_NO_CONTENT, tags=["Admin - Products"])
-def delete_variant(variant_id: int, supabase: Client = Depends(get_supabase_client)):
-    success = services.delete_product_variant(variant_id=variant_id, supabase=supabase)
+async def delete_variant(variant_id: int, supabase: AClient = Depends(get_supabase_client)):
+    success = await services.delete_product_variant(variant_id=variant_id, supabase=supabase)
     if not success:
         raise HTTPException(status_code=404, detail="Variant not found")
     return None
 
 @admin_router.post("/products/variants/{variant_id}/image", response_model=schemas.ProductVariant, tags=["Admin - Products"])
-def upload_variant_image(variant_id: int, file: UploadFile = File(...), supabase: Client = Depends(get_supabase_client)):
-    file_path = f"variants/{variant_id}/{uuid.uuid4()}{file.filename}"
+async def upload_variant_image(variant_id: int, file: UploadFile = File(...), supabase: AClient = Depends(get_supabase_client)):
     try:
-        file_content = file.file.read()
-        supabase.storage.from_("products").upload(file_path, file_content)
-        image_url = supabase.storage.from_("products").get_public_url(file_path)
-        return services.update_product_variant_image(variant_id=variant_id, image_url=image_url, supabase=supabase)
+        stored = await images.store_image(file, f"variants/{variant_id}", supabase)
+        return await services.update_product_variant_image(
+            variant_id=variant_id,
+            image_url=stored["image_url"],
+            renditions=stored["renditions"],
+            placeholder=stored["placeholder"],
+            supabase=supabase,
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @admin_router.delete("/categories/{category_id}", status_code=status.HTTP_204_NO_CONTENT, tags=["Admin - Categories"])
-def delete_category(category_id: int, supabase: Client = Depends(get_supabase_client)):
-    success = services.delete_category(category_id=category_id, supabase=supabase)
+async def delete_category(category_id: int, supabase: AClient = Depends(get_supabase_client)):
+    success = await services.delete_category(category_id=category_id, supabase=supabase)
     if not success:
         raise HTTPException(status_code=404, detail="Category not found")
     return None
 
 @customers_router.get("/customers", response_model=List[schemas.Customer], tags=["Admin - Customers"])
-def list_customers(supabase: Client = Depends(get_supabase_client)):
-    return customer_services.get_customers(supabase=supabase)
+async def list_customers(supabase: AClient = Depends(get_supabase_client)):
+    return await customer_services.get_customers(supabase=supabase)
 
 @customers_router.get("/customers/{customer_id}", response_model=schemas.Customer, tags=["Admin - Customers"])
-def get_customer(customer_id: int, supabase: Client = Depends(get_supabase_client)):
-    db_customer = customer_services.get_customer(customer_id=customer_id, supabase=supabase)
+async def get_customer(customer_id: int, supabase: AClient = Depends(get_supabase_client)):
+    db_customer = await customer_services.get_customer(customer_id=customer_id, supabase=supabase)
     if db_customer is None:
         raise HTTPException(status_code=404, detail="Customer not found")
     return db_customer
 
 @customers_router.post("/customers", response_model=schemas.Customer, tags=["Admin - Customers"])
-def create_customer(customer: schemas.CustomerCreate, supabase: Client = Depends(get_supabase_client)):
-    return customer_services.create_customer(customer=customer, supabase=supabase)
+async def create_customer(customer: schemas.CustomerCreate, supabase: AClient = Depends(get_supabase_client)):
+    return await customer_services.create_customer(customer=customer, supabase=supabase)
 
 @customers_router.patch("/customers/{customer_id}", response_model=schemas.Customer, tags=["Admin - Customers"])
-def update_customer(customer_id: int, customer: schemas.CustomerUpdate, supabase: Client = Depends(get_supabase_client)):
-    db_customer = customer_services.update_customer(customer_id=customer_id, customer=customer, supabase=supabase)
+async def update_customer(customer_id: int, customer: schemas.CustomerUpdate, supabase: AClient = Depends(get_supabase_client)):
+    db_customer = await customer_services.update_customer(customer_id=customer_id, customer=customer, supabase=supabase)
     if db_customer is None:
         raise HTTPException(status_code=404, detail="Customer not found")
     return db_customer
 
 @customers_router.delete("/customers/{customer_id}", status_code=status.HTTP_204_NO_CONTENT, tags=["Admin - Customers"])
-def delete_customer(customer_id: int, supabase: Client = Depends(get_supabase_client)):
-    success = customer_services.delete_customer(customer_id=customer_id, supabase=supabase)
+async def delete_customer(customer_id: int, supabase: AClient = Depends(get_supabase_client)):
+    success = await customer_services.delete_customer(customer_id=customer_id, supabase=supabase)
     if not success:
         raise HTTPException(status_code=404, detail="Customer not found")
     return None
 
 orders_router = APIRouter(
-    prefix="/api/admin"
+    prefix="/api/admin",
+    route_class=FastJSONRoute,
 )
 
 @orders_router.post("/orders", response_model=schemas.Order, tags=["Admin - Orders"], dependencies=[Depends(services.get_current_admin_user)])
-def create_order(order: schemas.OrderCreate, supabase: Client = Depends(get_supabase_client)):
-    return services.create_order(order=order, supabase=supabase)
+async def create_order(order: schemas.OrderCreate, supabase: AClient = Depends(get_supabase_client)):
+    return await services.create_order(order=order, supabase=supabase)
+
+def order_list_query(
+    limit: Optional[int] = Query(None, ge=1, le=settings.ORDERS_PAGE_MAX),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = None,
+    status: Optional[List[schemas.OrderStatus]] = Query(None),
+    shipping_method: Optional[schemas.ShippingMethod] = None,
+    customer_id: Optional[int] = None,
+    delivery_area_id: Optional[int] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    product_id: Optional[int] = None,
+    q: Optional[str] = Query(None, max_length=200),
+    sort: schemas.OrderSort = schemas.OrderSort.newest,
+) -> schemas.OrderListQuery:
+    return schemas.OrderListQuery(
+        limit=limit, offset=offset, cursor=cursor, status=status, shipping_method=shipping_method,
+        customer_id=customer_id, delivery_area_id=delivery_area_id,
+        created_from=created_from, created_to=created_to, product_id=product_id, q=q, sort=sort,
+    )
 
 @orders_router.get("/orders", response_model=List[schemas.Order], tags=["Admin - Orders"], dependencies=[Depends(services.get_current_admin_user)])
-def list_orders(supabase: Client = Depends(get_supabase_client)):
-    return services.get_orders(supabase=supabase)
+@trusted_response
+async def list_orders(request: Request, response: Response, query: schemas.OrderListQuery = Depends(order_list_query), supabase: AClient = Depends(get_supabase_client)):
+    # Without any listing parameters every order is returned with the full embed, as before.
+    if not _has_listing_params(request, schemas.OrderListQuery):
+        return await services.get_orders(supabase=supabase)
+    orders, total, next_cursor = await services.get_orders_page(query=query, page_size=settings.ORDERS_PAGE_SIZE, supabase=supabase)
+    if total is not None:
+        response.headers["X-Total-Count"] = str(total)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return orders
+
+@orders_router.get("/orders/changes", response_model=schemas.OrderChanges, tags=["Admin - Orders"], dependencies=[Depends(services.get_current_admin_user)])
+async def list_order_changes(
+    since: Optional[str] = None,
+    limit: int = Query(settings.ORDERS_PAGE_SIZE, ge=1, le=settings.ORDERS_PAGE_MAX),
+    supabase: AClient = Depends(get_supabase_client),
+):
+    return await services.get_order_changes(cursor=since, limit=limit, supabase=supabase)
+
+@orders_router.post("/orders/stream-token", response_model=schemas.OrderFeedToken, tags=["Admin - Orders"], dependencies=[Depends(services.get_current_admin_user)])
+async def create_order_stream_token():
+    return {"token": services.create_order_feed_token(), "expires_in": settings.ORDER_FEED_TOKEN_EXPIRE_SECONDS}
+
+# Authorized by a token from /orders/stream-token in the query string, as
+# EventSource cannot send the admin's Bearer header.
+@orders_router.get("/orders/stream", tags=["Admin - Orders"], dependencies=[Depends(services.get_order_feed_subscriber)])
+async def stream_order_changes(request: Request, since: Optional[str] = None):
+    # EventSource resends the last event id when it reconnects.
+    since = since or request.headers.get("last-event-id")
+    return StreamingResponse(
+        order_feed.stream(since, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 @orders_router.get("/orders/{order_id}", response_model=schemas.Order, tags=["Admin - Orders"], dependencies=[Depends(services.get_current_admin_user)])
-def get_order(order_id: int, supabase: Client = Depends(get_supabase_client)):
-    db_order = services.get_order(order_id=order_id, supabase=supabase)
+@trusted_response
+async def get_order(order_id: int, supabase: AClient = Depends(get_supabase_client)):
+    db_order = await services.get_order(order_id=order_id, supabase=supabase)
     if db_order is None:
         raise HTTPException(status_code=404, detail="Order not found")
     return db_order
 
 @orders_router.delete("/orders/{order_id}", status_code=status.HTTP_204_NO_CONTENT, tags=["Admin - Orders"], dependencies=[Depends(services.get_current_admin_user)])
-def delete_order(order_id: int, supabase: Client = Depends(get_supabase_client)):
-    success = services.delete_order(order_id=order_id, supabase=supabase)
+async def delete_order(order_id: int, supabase: AClient = Depends(get_supabase_client)):
+    success = await services.delete_order(order_id=order_id, supabase=supabase)
     if not success:
         raise HTTPException(status_code=404, detail="Order not found")
     return None
 
 @orders_router.patch("/orders/{order_id}", response_model=schemas.Order, tags=["Admin - Orders"], dependencies=[Depends(services.get_current_admin_user)])
-def update_order(order_id: int, order: schemas.OrderUpdate, supabase: Client = Depends(get_supabase_client)):
-    db_order = services.update_order(order_id=order_id, order=order, supabase=supabase)
+async def update_order(order_id: int, order: schemas.OrderUpdate, supabase: AClient = Depends(get_supabase_client)):
+    db_order = await services.update_order(order_id=order_id, order=order, supabase=supabase)
     if db_order is None:
         raise HTTPException(status_code=404, detail="Order not found")
     return db_order
 
 @admin_router.get("/delivery-areas", response_model=List[schemas.DeliveryArea], tags=["Admin - Delivery Areas"])
-def list_delivery_areas(supabase: Client = Depends(get_supabase_client)):
-    return services.get_delivery_areas(supabase=supabase)
+async def list_delivery_areas(supabase: AClient = Depends(get_supabase_client)):
+    return await services.get_delivery_areas(supabase=supabase)
 
 @admin_router.post("/delivery-areas", response_model=schemas.DeliveryArea, tags=["Admin - Delivery Areas"])
-def create_delivery_area(delivery_area: schemas.DeliveryAreaCreate, supabase: Client = Depends(get_supabase_client)):
-    return services.create_delivery_area(delivery_area=delivery_area, supabase=supabase)
+async def create_delivery_area(delivery_area: schemas.DeliveryAreaCreate, supabase: AClient = Depends(get_supabase_client)):
+    return await services.create_delivery_area(delivery_area=delivery_area, supabase=supabase)
 
 @admin_router.patch("/delivery-areas/{delivery_area_id}", response_model=schemas.DeliveryArea, tags=["Admin - Delivery Areas"])
-def update_delivery_area(delivery_area_id: int, delivery_area: schemas.DeliveryAreaCreate, supabase: Client = Depends(get_supabase_client)):
-    db_delivery_area = services.update_delivery_area(delivery_area_id=delivery_area_id, delivery_area=delivery_area, supabase=supabase)
+async def update_delivery_area(delivery_area_id: int, delivery_area: schemas.DeliveryAreaCreate, supabase: AClient = Depends(get_supabase_client)):
+    db_delivery_area = await services.update_delivery_area(delivery_area_id=delivery_area_id, delivery_area=delivery_area, supabase=supabase)
     if db_delivery_area is None:
         raise HTTPException(status_code=404, detail="Delivery area not found")
     return db_delivery_area
 
 @admin_router.delete("/delivery-areas/{delivery_area_id}", status_code=status.HTTP_204_NO_CONTENT, tags=["Admin - Delivery Areas"])
-def delete_delivery_area(delivery_area_id: int, supabase: Client = Depends(get_supabase_client)):
-    success = services.delete_delivery_area(delivery_area_id=delivery_area_id, supabase=supabase)
+async def delete_delivery_area(delivery_area_id: int, supabase: AClient = Depends(get_supabase_client)):
+    success = await services.delete_delivery_area(delivery_area_id=delivery_area_id, supabase=supabase)
     if not success:
         raise HTTPException(status_code=404, detail="Delivery area not found")
     return None
 
 @admin_router.get("/settings", response_model=schemas.AppSettings, tags=["Admin - Settings"])
-def get_settings(supabase: Client = Depends(get_supabase_client)):
-    return services.get_app_settings(supabase=supabase)
+async def get_settings(supabase: AClient = Depends(get_supabase_client)):
+    return await services.get_app_settings(supabase=supabase)
 
 @admin_router.patch("/settings", response_model=schemas.AppSettings, tags=["Admin - Settings"])
-def update_settings(settings_data: schemas.AppSettings, supabase: Client = Depends(get_supabase_client)):
-    return services.update_app_settings(settings_data=settings_data, supabase=supabase)
+async def update_settings(settings_data: schemas.AppSettings, supabase: AClient = Depends(get_supabase_client)):
+    return await services.update_app_settings(settings_data=settings_data, supabase=supabase)
 
 @router.get("/translations/all", response_model=List[schemas.Translation], tags=["Translations"])
-def list_all_translations(supabase: Client = Depends(get_supabase_client)):
-    return services.get_all_translations(supabase=supabase)
+async def list_all_translations(supabase: AClient = Depends(get_supabase_client)):
+    return await services.get_all_translations(supabase=supabase)
+
+@router.get("/translations/bundle", response_model=schemas.TranslationBundle, tags=["Translations"])
+async def get_translation_bundle(namespace: Optional[List[str]] = Query(None), supabase: AClient = Depends(get_supabase_client)):
+    """
+    Every translation as a flat key -> value dict with its content version,
+    optionally limited to one or more namespaces (`?namespace=checkout`).
+    """
+    return await services.get_translation_bundle(namespaces=namespace, supabase=supabase)
+
+@router.get("/translations/bundle/{version}", response_model=schemas.TranslationBundle, tags=["Translations"])
+async def get_versioned_translation_bundle(version: str, request: Request, namespace: Optional[List[str]] = Query(None), supabase: AClient = Depends(get_supabase_client)):
+    """
+    The bundle for a version from `/translations/bundle`, cacheable forever.
+    Any other version redirects to the current one. A mismatch never
+    reloads the bundle: changes made by other processes arrive through
+    cache_sync and the cache TTL.
+    """
+    bundle = await services.get_translation_bundle(namespaces=namespace, supabase=supabase)
+    if bundle["version"] != version:
+        current = request.url.replace(path=request.url.path.rsplit("/", 1)[0] + "/" + bundle["version"])
+        return RedirectResponse(str(current), status_code=status.HTTP_307_TEMPORARY_REDIRECT, headers={"Cache-Control": "no-store"})
+    return bundle
+
+@admin_router.get("/translations/keys", response_model=schemas.TranslationKeyReport, tags=["Admin - Translations"])
+async def get_translation_key_report(supabase: AClient = Depends(get_supabase_client)):
+    """
+    Keys used in the frontend but missing from the translations table, and
+    keys in the table the frontend never uses. Only changed source files
+    are rescanned.
+    """
+    bundle = await services.get_translation_bundle(supabase=supabase)
+    try:
+        return await asyncio.to_thread(translation_scanner.translation_key_report, list(bundle["translations"]))
+    except FileNotFoundError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Frontend sources are not available on this server.")
 
 @admin_router.patch("/translations/{translation_id}", response_model=schemas.Translation, tags=["Admin - Translations"])
-def update_translation(translation_id: int, translation: schemas.TranslationUpdate, supabase: Client = Depends(get_supabase_client)):
-    db_translation = services.update_translation(translation_id=translation_id, translation=translation, supabase=supabase)
+async def update_translation(translation_id: int, translation: schemas.TranslationUpdate, supabase: AClient = Depends(get_supabase_client)):
+    db_translation = await services.update_translation(translation_id=translation_id, translation=translation, supabase=supabase)
     if db_translation is None:
         raise HTTPException(status_code=404, detail="Translation not found")
     return db_translation
 
 @admin_router.post("/translations", response_model=schemas.Translation, tags=["Admin - Translations"])
-def create_translation(translation: schemas.TranslationCreate, supabase: Client = Depends(get_supabase_client)):
-    return services.create_translation(translation=translation, supabase=supabase)
+async def create_translation(translation: schemas.TranslationCreate, supabase: AClient = Depends(get_supabase_client)):
+    return await services.create_translation(translation=translation, supabase=supabase)
 
 @admin_router.post("/upload-image", tags=["Admin - General"])
-def upload_image(file: UploadFile = File(...), supabase: Client = Depends(get_supabase_client)):
-    file_path = f"messages/{uuid.uuid4()}_{file.filename}"
+async def upload_image(file: UploadFile = File(...), supabase: AClient = Depends(get_supabase_client)):
+    # Message images are embedded at a single size, so one WebP is enough.
     try:
-        file_content = file.file.read()
-        content_type = file.content_type if file.content_type else "application/octet-stream"
-        supabase.storage.from_("products").upload(
-            file_path,
-            file_content,
-            {"content-type": content_type}
+        stored = await images.store_image(
+            file, "messages", supabase,
+            widths=[max(settings.IMAGE_RENDITION_WIDTHS)], formats=["webp"], placeholder=False,
         )
-        image_url = supabase.storage.from_("products").get_public_url(file_path)
-        return {"location": image_url}
+        return {"location": stored["image_url"]}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Image upload failed: {str(e)}")
 
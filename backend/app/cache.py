@@ -0,0 +1,194 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable
+
+from .config import settings
+
+
+class _LoadCancelled(Exception):
+    """
+    Handed to the waiters of a load whose caller was cancelled. The waiters
+    were not, so they retry rather than abort as if they had been.
+    """
+
+
+class TTLCache:
+    """
+    An in-process LRU cache with per-key expiry and single-flight loading:
+    concurrent misses for the same key share one call to the loader.
+    """
+
+    def __init__(self, max_entries: int, default_ttl: float):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._inflight: dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: str, default: Any = None) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return default
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        self._entries[key] = (time.monotonic() + (ttl if ttl is not None else self.default_ttl), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Any]], ttl: float | None = None) -> Any:
+        """
+        Returns the cached value for `key`, calling `loader` on a miss.
+        `None` results are returned but not cached. If the caller running a
+        shared load is cancelled, one of its waiters runs the load instead.
+        """
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is not sentinel:
+            self.hits += 1
+            return value
+        self.misses += 1
+        future = self._inflight.get(key)
+        if future is not None:
+            try:
+                return await asyncio.shield(future)
+            except _LoadCancelled:
+                return await self.get_or_load(key, loader, ttl)
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await loader()
+        except BaseException as exc:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+            # Only the cancelled caller sees the CancelledError.
+            future.set_exception(_LoadCancelled() if isinstance(exc, asyncio.CancelledError) else exc)
+            future.exception()
+            raise
+        # An invalidation during the load drops the in-flight marker, in
+        # which case the result may already be stale and is not stored.
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+            if value is not None:
+                self.set(key, value, ttl)
+        future.set_result(value)
+        return value
+
+    def invalidate(self, *keys: str) -> None:
+        for key in keys:
+            self._entries.pop(key, None)
+            self._inflight.pop(key, None)
+        self.invalidations += 1
+
+    def invalidate_prefix(self, prefix: str) -> None:
+        for key in [key for key in self._entries if key.startswith(prefix)]:
+            del self._entries[key]
+        for key in [key for key in self._inflight if key.startswith(prefix)]:
+            del self._inflight[key]
+        self.invalidations += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._inflight.clear()
+        self.invalidations += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+catalog_cache = TTLCache(
+    max_entries=settings.CATALOG_CACHE_MAX_ENTRIES,
+    default_ttl=settings.CATALOG_CACHE_TTL_SECONDS,
+)
+
+PRODUCTS_KEY = "products"
+CATEGORIES_KEY = "categories"
+TRANSLATIONS_KEY = "translations"
+
+# Callables notified with a product id (or None for "anything may have
+# changed") whenever catalog entries are invalidated.
+catalog_change_hooks: list[Callable[[int | None], None]] = []
+# Callables notified with (kind, id) for each invalidation this process
+# starts, so other processes can repeat it (see cache_sync).
+invalidation_hooks: list[Callable[[str, int | None], None]] = []
+
+def product_key(product_id: int) -> str:
+    return f"product:{product_id}"
+
+def product_page_key(query_key: str) -> str:
+    return f"{PRODUCTS_KEY}?{query_key}"
+
+def category_key(category_id: int) -> str:
+    return f"category:{category_id}"
+
+def translation_bundle_key(namespaces: list[str]) -> str:
+    return f"{TRANSLATIONS_KEY}?{','.join(namespaces)}"
+
+def publish_invalidation(kind: str, target_id: int | None = None) -> None:
+    for hook in invalidation_hooks:
+        hook(kind, target_id)
+
+def invalidate_product(product_id: int | None, publish: bool = True) -> None:
+    """
+    Drops a product and every cached listing or page that may embed it.
+    """
+    if product_id is None:
+        catalog_cache.invalidate_prefix("product:")
+    else:
+        catalog_cache.invalidate(product_key(product_id))
+    catalog_cache.invalidate_prefix(PRODUCTS_KEY)
+    for hook in catalog_change_hooks:
+        hook(product_id)
+    if publish:
+        publish_invalidation("product", product_id)
+
+def invalidate_category_list(publish: bool = True) -> None:
+    """
+    Drops the category list, for a new category no product uses yet.
+    """
+    catalog_cache.invalidate(CATEGORIES_KEY)
+    if publish:
+        publish_invalidation("categories")
+
+def invalidate_category(category_id: int | None = None, publish: bool = True) -> None:
+    """
+    Drops a category and every product entry, since products embed their category.
+    """
+    keys = [CATEGORIES_KEY]
+    if category_id is not None:
+        keys.append(category_key(category_id))
+    catalog_cache.invalidate(*keys)
+    catalog_cache.invalidate_prefix(PRODUCTS_KEY)
+    catalog_cache.invalidate_prefix("product:")
+    for hook in catalog_change_hooks:
+        hook(None)
+    if publish:
+        publish_invalidation("category", category_id)
+
+def invalidate_translations(publish: bool = True) -> None:
+    """
+    Drops the compiled translation bundles.
+    """
+    catalog_cache.invalidate_prefix(TRANSLATIONS_KEY)
+    if publish:
+        publish_invalidation("translations")
@@ -0,0 +1,137 @@
+import asyncio
+import uuid
+from collections import deque
+
+import structlog
+from postgrest.types import ReturnMethod
+
+from .cache import (
+    invalidate_category, invalidate_category_list, invalidate_product, invalidate_translations,
+    invalidation_hooks,
+)
+from .config import settings, web_concurrency
+from .store_config import store_config
+from .supabase_client import get_supabase_client
+
+logger = structlog.get_logger(__name__)
+
+# Events re-read behind the newest one seen, since ids from concurrent
+# inserts can become visible out of order.
+LOOKBACK_ROWS = 50
+APPLIED_MEMORY = 1000
+
+
+class CacheSync:
+    """
+    Keeps the in-process caches of several API processes coherent. Every
+    invalidation a process makes is written to the `cache_invalidations`
+    table, batched in the background, and every process reads the events
+    of the others every CACHE_SYNC_POLL_SECONDS and repeats them locally.
+    Until then the cache TTLs bound how stale another process can be.
+    """
+
+    def __init__(self):
+        self.origin = ""
+        self.published = 0
+        self.applied = 0
+        self._pending: list[dict] = []
+        self._applied_ids: deque[int] = deque(maxlen=APPLIED_MEMORY)
+        self._last_id: int | None = None
+        self._task: asyncio.Task | None = None
+        self._wake = asyncio.Event()
+
+    @property
+    def enabled(self) -> bool:
+        if settings.CACHE_SYNC_ENABLED is not None:
+            return settings.CACHE_SYNC_ENABLED
+        return web_concurrency() > 1
+
+    def publish(self, kind: str, target_id: int | None) -> None:
+        self._pending.append({"origin": self.origin, "kind": kind, "target_id": target_id})
+        self._wake.set()
+
+    def start(self) -> None:
+        if self.enabled and self._task is None:
+            # Per worker, not per import: preloaded workers share the import.
+            self.origin = uuid.uuid4().hex
+            invalidation_hooks.append(self.publish)
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        invalidation_hooks.remove(self.publish)
+        self._task.cancel()
+        try:
+            await self._task
+        except (asyncio.CancelledError, Exception):
+            pass
+        self._task = None
+        # Let the other processes hear about this one's last writes.
+        if self._pending:
+            try:
+                await self._flush(await get_supabase_client())
+            except Exception as e:
+                logger.warning("cache_sync_flush_failed", error=str(e))
+
+    async def _flush(self, supabase) -> None:
+        events, self._pending = self._pending, []
+        try:
+            await supabase.table("cache_invalidations").insert(events, returning=ReturnMethod.minimal).execute()
+        except Exception:
+            self._pending = events + self._pending
+            raise
+        self.published += len(events)
+
+    async def _apply(self, event: dict, supabase) -> None:
+        kind, target_id = event["kind"], event["target_id"]
+        if kind == "product":
+            invalidate_product(target_id, publish=False)
+        elif kind == "category":
+            invalidate_category(target_id, publish=False)
+        elif kind == "categories":
+            invalidate_category_list(publish=False)
+        elif kind == "translations":
+            invalidate_translations(publish=False)
+        elif kind == "store_config":
+            await store_config.refresh(supabase)
+        else:
+            logger.warning("cache_sync_unknown_event", kind=kind)
+
+    async def _receive(self, supabase) -> None:
+        if self._last_id is None:
+            # Start after the newest events; this process has nothing stale yet.
+            latest = await supabase.table("cache_invalidations").select("id").order("id", desc=True).limit(LOOKBACK_ROWS).execute()
+            self._applied_ids.extend(row["id"] for row in reversed(latest.data))
+            self._last_id = latest.data[0]["id"] if latest.data else 0
+            return
+        response = await supabase.table("cache_invalidations").select("id, origin, kind, target_id").gt("id", self._last_id - LOOKBACK_ROWS).order("id").execute()
+        for event in response.data:
+            if event["id"] in self._applied_ids:
+                continue
+            self._applied_ids.append(event["id"])
+            self._last_id = max(self._last_id, event["id"])
+            if event["origin"] != self.origin:
+                await self._apply(event, supabase)
+                self.applied += 1
+
+    async def _run(self) -> None:
+        supabase = await get_supabase_client()
+        while True:
+            try:
+                if self._pending:
+                    await self._flush(supabase)
+                await self._receive(supabase)
+            except Exception as e:
+                logger.warning("cache_sync_failed", error=str(e))
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=settings.CACHE_SYNC_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    def stats(self) -> dict:
+        return {"enabled": self._task is not None, "published": self.published, "applied": self.applied, "pending": len(self._pending)}
+
+
+cache_sync = CacheSync()
@@ -0,0 +1,239 @@
+import codecs
+import csv
+import io
+import json
+from typing import AsyncIterator, Type
+
+from postgrest.types import ReturnMethod
+from pydantic import BaseModel, ValidationError
+from supabase import AClient
+
+from . import schemas
+from .cache import invalidate_product
+from .config import settings
+
+EXPORT_PAGE_SIZE = 1000
+
+PRODUCT_COLUMNS = ("id", "name", "description", "price", "stock_quantity", "category_id")
+VARIANT_COLUMNS = ("id", "product_id", "name", "price", "stock_quantity", "image_url")
+
+
+async def _lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """
+    Decodes a byte stream as UTF-8 (ignoring a BOM) and yields it line by
+    line, keeping line endings, without holding more than one line.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *complete, pending = pending.split("\n")
+        for line in complete:
+            yield line + "\n"
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+async def _csv_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[dict]:
+    header = None
+    buffered = ""
+    async for line in _lines(chunks):
+        buffered += line
+        # An odd number of quotes means a quoted field continues on the next line.
+        if buffered.count('"') % 2:
+            continue
+        record, buffered = buffered, ""
+        values = next(csv.reader([record]), None)
+        if not values or values == [""]:
+            continue
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        yield {name: (value if value != "" else None) for name, value in zip(header, values)}
+    if buffered.strip():
+        raise ValueError("Unterminated quoted field at end of CSV")
+
+
+async def _ndjson_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[dict | str]:
+    async for line in _lines(chunks):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield f"Invalid JSON: {e.msg}"
+            continue
+        yield record if isinstance(record, dict) else "Each line must be a JSON object"
+
+
+def _format_errors(error: ValidationError) -> list[str]:
+    return [f"{'.'.join(str(part) for part in item['loc']) or 'row'}: {item['msg']}" for item in error.errors()]
+
+
+class _ImportRun:
+    """
+    Validates records and writes them to `table` in chunks: rows with an id
+    update that row and rows without one are inserted. An updated row only
+    sets the columns the record has, so a file that leaves out optional
+    columns keeps their current values. Ids must already exist: rows with
+    explicit new ids would not advance the table's identity sequence, and
+    later inserts would collide with them.
+
+    A chunk costs one request to look up its ids, plus one write per set of
+    columns, as bulk upserts need the same keys on every row. A chunk the
+    database rejects is retried row by row to find the offending rows.
+    """
+
+    def __init__(self, table: str, model: Type[BaseModel], supabase: AClient):
+        self.table = table
+        self.model = model
+        self.supabase = supabase
+        self.report = schemas.ImportReport()
+        self._chunk: list[tuple[int, dict]] = []
+
+    def _fail(self, row: int, errors: list[str]) -> None:
+        self.report.failed += 1
+        if len(self.report.errors) < settings.CATALOG_IMPORT_MAX_ERRORS:
+            self.report.errors.append(schemas.ImportRowError(row=row, errors=errors))
+        else:
+            self.report.errors_truncated = True
+
+    async def add(self, row: int, record: dict | str) -> None:
+        self.report.processed += 1
+        if isinstance(record, str):
+            self._fail(row, [record])
+            return
+        try:
+            item = self.model.model_validate(record)
+        except ValidationError as e:
+            self._fail(row, _format_errors(e))
+            return
+        if item.id is None:
+            self._chunk.append((row, item.model_dump(exclude={"id"})))
+        else:
+            self._chunk.append((row, item.model_dump(exclude_unset=True)))
+        if len(self._chunk) >= settings.CATALOG_IMPORT_CHUNK_SIZE:
+            await self.flush()
+
+    async def _write(self, rows: list[dict]) -> None:
+        batches: dict[tuple[str, ...], list[dict]] = {}
+        for row in rows:
+            batches.setdefault(tuple(row), []).append(row)
+        for columns, batch in batches.items():
+            table = self.supabase.table(self.table)
+            if "id" in columns:
+                await table.upsert(batch, on_conflict="id", returning=ReturnMethod.minimal).execute()
+            else:
+                await table.insert(batch, returning=ReturnMethod.minimal).execute()
+
+    def _count(self, rows: list[dict]) -> None:
+        for row in rows:
+            if "id" in row:
+                self.report.upserted += 1
+            else:
+                self.report.inserted += 1
+
+    async def _existing(self, chunk: list[tuple[int, dict]]) -> list[tuple[int, dict]]:
+        """
+        Drops (and reports) the rows whose id is not in the table.
+        """
+        ids = list({row["id"] for _, row in chunk if "id" in row})
+        if not ids:
+            return chunk
+        try:
+            response = await self.supabase.table(self.table).select("id").in_("id", ids).execute()
+        except Exception as e:
+            for row_number, _ in chunk:
+                self._fail(row_number, [getattr(e, "message", None) or str(e)])
+            return []
+        existing = {found["id"] for found in response.data}
+        kept = []
+        for row_number, row in chunk:
+            if "id" in row and row["id"] not in existing:
+                self._fail(row_number, [f"id: {row['id']} does not exist; leave it empty to create a new row"])
+            else:
+                kept.append((row_number, row))
+        return kept
+
+    async def flush(self) -> None:
+        chunk, self._chunk = self._chunk, []
+        chunk = await self._existing(chunk)
+        if not chunk:
+            return
+        try:
+            await self._write([row for _, row in chunk])
+            self._count([row for _, row in chunk])
+            return
+        except Exception:
+            # Fall through and retry the rows one at a time.
+            pass
+        for row_number, row in chunk:
+            try:
+                await self._write([row])
+                self._count([row])
+            except Exception as e:
+                self._fail(row_number, [getattr(e, "message", None) or str(e)])
+
+
+async def _import(table: str, model: Type[BaseModel], fmt: schemas.CatalogFormat, chunks: AsyncIterator[bytes], supabase: AClient) -> schemas.ImportReport:
+    run = _ImportRun(table, model, supabase)
+    records = _csv_records(chunks) if fmt == schemas.CatalogFormat.csv else _ndjson_records(chunks)
+    row = 0
+    try:
+        async for record in records:
+            row += 1
+            await run.add(row, record)
+    except (UnicodeDecodeError, ValueError, csv.Error) as e:
+        run._fail(row + 1, [f"Could not parse the file: {e}"])
+    await run.flush()
+    if run.report.inserted or run.report.upserted:
+        invalidate_product(None)
+    return run.report
+
+
+async def import_products(fmt: schemas.CatalogFormat, chunks: AsyncIterator[bytes], supabase: AClient) -> schemas.ImportReport:
+    return await _import("products", schemas.ProductImport, fmt, chunks, supabase)
+
+
+async def import_variants(fmt: schemas.CatalogFormat, chunks: AsyncIterator[bytes], supabase: AClient) -> schemas.ImportReport:
+    return await _import("product_variants", schemas.ProductVariantImport, fmt, chunks, supabase)
+
+
+async def _pages(table: str, columns: tuple[str, ...], supabase: AClient) -> AsyncIterator[list[dict]]:
+    last_id = None
+    while True:
+        builder = supabase.table(table).select(", ".join(columns))
+        if last_id is not None:
+            builder = builder.gt("id", last_id)
+        response = await builder.order("id").limit(EXPORT_PAGE_SIZE).execute()
+        if response.data:
+            yield response.data
+        if len(response.data) < EXPORT_PAGE_SIZE:
+            return
+        last_id = response.data[-1]["id"]
+
+
+async def _export(table: str, columns: tuple[str, ...], fmt: schemas.CatalogFormat, supabase: AClient) -> AsyncIterator[str]:
+    if fmt == schemas.CatalogFormat.csv:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        writer.writerow(columns)
+        async for page in _pages(table, columns, supabase):
+            writer.writerows([row.get(column) for column in columns] for row in page)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+    else:
+        async for page in _pages(table, columns, supabase):
+            yield "".join(json.dumps({column: row.get(column) for column in columns}, ensure_ascii=False) + "\n" for row in page)
+
+
+def export_products(fmt: schemas.CatalogFormat, supabase: AClient) -> AsyncIterator[str]:
+    return _export("products", PRODUCT_COLUMNS, fmt, supabase)
+
+
+def export_variants(fmt: schemas.CatalogFormat, supabase: AClient) -> AsyncIterator[str]:
+    return _export("product_variants", VARIANT_COLUMNS, fmt, supabase)
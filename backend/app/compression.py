@@ -0,0 +1,128 @@
+import asyncio
+import gzip
+import hashlib
+
+import brotli
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .cache import TTLCache
+from .config import settings
+from .http_cache import cache_policy
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "image/svg+xml", "application/xml")
+# Served encodings, most preferred first.
+ENCODINGS = ("br", "gzip")
+
+# Compressed public bodies by encoding and body digest. Keyed by content,
+# an entry can never be stale, so catalog invalidations need not touch it.
+compressed_bodies = TTLCache(
+    max_entries=settings.COMPRESSION_CACHE_MAX_ENTRIES,
+    default_ttl=settings.CATALOG_CACHE_TTL_SECONDS,
+)
+
+
+def _accepted_encoding(accept_encoding: str) -> str | None:
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip()] = quality
+    for encoding in ENCODINGS:
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+def compress(body: bytes, encoding: str, cached: bool = False) -> bytes:
+    """
+    Compresses at a cheaper level per request, and harder for bodies that are
+    compressed once and then served from compressed_bodies.
+    """
+    if encoding == "br":
+        quality = settings.COMPRESSION_CACHED_BROTLI_QUALITY if cached else settings.COMPRESSION_BROTLI_QUALITY
+        return brotli.compress(body, quality=quality)
+    # mtime=0 keeps the output, and so its ETag, the same for the same body.
+    return gzip.compress(body, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+async def _compress(body: bytes, encoding: str, cached: bool) -> bytes:
+    if len(body) >= settings.COMPRESSION_THREAD_MIN_BYTES:
+        return await asyncio.to_thread(compress, body, encoding, cached)
+    return compress(body, encoding, cached)
+
+
+class CompressionMiddleware:
+    """
+    Compresses JSON and text responses of at least COMPRESSION_MIN_BYTES
+    with brotli or gzip, whichever the client accepts (brotli first).
+    Large bodies are compressed in a worker thread, off the event loop.
+
+    Anonymous GETs of the public read endpoints (those with a Cache-Control
+    policy in http_cache) keep their compressed bytes in compressed_bodies,
+    so an unchanged catalog, category list, bundle or settings response is
+    compressed once, not per request.
+
+    Installed inside ConditionalGetMiddleware, which then hashes the bytes
+    sent, so each encoding gets its own ETag. Streamed bodies pass through, and
+    event streams skip it from their first byte.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.COMPRESSION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        request_headers = Headers(scope=scope)
+        encoding = _accepted_encoding(request_headers.get("accept-encoding", ""))
+        cacheable = scope["method"] == "GET" and "authorization" not in request_headers and cache_policy(scope["path"]) is not None
+        start: Message | None = None
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start
+            if message["type"] == "http.response.start":
+                if Headers(raw=message["headers"]).get("content-type", "").startswith("text/event-stream"):
+                    # Event streams are sent as they are produced.
+                    await send(message)
+                    return
+                start = message
+                return
+            if start is None:
+                await send(message)
+                return
+            response_start, start = start, None
+            headers = MutableHeaders(raw=response_start["headers"])
+            body = message.get("body", b"")
+            if (
+                message.get("more_body", False)
+                or "content-encoding" in headers
+                or not headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+                or len(body) < settings.COMPRESSION_MIN_BYTES
+            ):
+                await send(response_start)
+                await send(message)
+                return
+            headers.add_vary_header("Accept-Encoding")
+            if encoding is None:
+                await send(response_start)
+                await send(message)
+                return
+            if cacheable and response_start["status"] == 200:
+                key = f"{encoding}:{hashlib.blake2b(body, digest_size=16).hexdigest()}"
+                compressed = await compressed_bodies.get_or_load(key, lambda: _compress(body, encoding, True))
+            else:
+                compressed = await _compress(body, encoding, False)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            await send(response_start)
+            await send({**message, "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
@@ -12,9 +12,93 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 1440
     CORS_ORIGINS: str = ""
+    SUPABASE_POOL_MAX_CONNECTIONS: int = 100
+    SUPABASE_POOL_MAX_KEEPALIVE: int = 50
+    SUPABASE_POOL_SHARD_SIZE: int = 10
+    SUPABASE_POOL_KEEPALIVE_EXPIRY: float = 30.0
+    SUPABASE_POSTGREST_TIMEOUT: float = 15.0
+    SUPABASE_STORAGE_TIMEOUT: float = 15.0
+    CATALOG_CACHE_TTL_SECONDS: float = 300.0
+    CATALOG_CACHE_MAX_ENTRIES: int = 2048
+    SEARCH_INDEX_TTL_SECONDS: float = 300.0
+    PRODUCTS_PAGE_SIZE: int = 24
+    PRODUCTS_PAGE_MAX: int = 100
+    ORDERS_PAGE_SIZE: int = 50
+    ORDERS_PAGE_MAX: int = 200
+    CATALOG_IMPORT_CHUNK_SIZE: int = 500
+    CATALOG_IMPORT_MAX_ERRORS: int = 1000
+    ORDER_FEED_OVERLAP_SECONDS: float = 2.0
+    ORDER_FEED_POLL_SECONDS: float = 1.0
+    ORDER_FEED_HEARTBEAT_SECONDS: float = 15.0
+    ORDER_FEED_TOKEN_EXPIRE_SECONDS: int = 60
+    IMAGE_RENDITION_WIDTHS: list[int] = [320, 640, 1024, 1600]
+    IMAGE_RENDITION_FORMATS: list[str] = ["webp", "avif"]
+    IMAGE_WEBP_QUALITY: int = 80
+    IMAGE_AVIF_QUALITY: int = 55
+    IMAGE_AVIF_SPEED: int = 8
+    IMAGE_MAX_UPLOAD_BYTES: int = 20 * 1024 * 1024
+    IMAGE_PROCESS_WORKERS: int = 0
+    IMAGE_UPLOAD_CONCURRENCY: int = 4
+    IMAGE_UPLOAD_MAX_FILES: int = 20
+    JOBS_ENABLED: bool = True
+    JOBS_POLL_SECONDS: float = 2.0
+    JOBS_BATCH_SIZE: int = 10
+    JOBS_LEASE_SECONDS: int = 300
+    JOBS_MAX_ATTEMPTS: int = 5
+    JOBS_BACKOFF_BASE_SECONDS: float = 10.0
+    JOBS_BACKOFF_MAX_SECONDS: float = 3600.0
+    JOBS_RETENTION_DAYS: int = 7
+    STORAGE_SWEEP_INTERVAL_SECONDS: float = 86400.0
+    STORAGE_SWEEP_MIN_AGE_SECONDS: float = 86400.0
+    HTTP_CACHE_ENABLED: bool = True
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_BYTES: int = 1024
+    # Bodies at least this large are compressed in a worker thread.
+    COMPRESSION_THREAD_MIN_BYTES: int = 64 * 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 5
+    COMPRESSION_CACHED_BROTLI_QUALITY: int = 9
+    COMPRESSION_CACHE_MAX_ENTRIES: int = 256
+    STORE_CONFIG_POLL_SECONDS: float = 30.0
+    # Worker processes started by gunicorn.conf.py; 0 means one per CPU.
+    WEB_CONCURRENCY: int = 1
+    PORT: int = 8000
+    GUNICORN_PRELOAD: bool = True
+    GUNICORN_TIMEOUT: int = 60
+    GUNICORN_GRACEFUL_TIMEOUT: int = 30
+    GUNICORN_KEEPALIVE: int = 5
+    GUNICORN_MAX_REQUESTS: int = 0
+    GUNICORN_MAX_REQUESTS_JITTER: int = 0
+    # Defaults to on when WEB_CONCURRENCY runs more than one process.
+    CACHE_SYNC_ENABLED: bool | None = None
+    CACHE_SYNC_POLL_SECONDS: float = 1.0
+    CACHE_SYNC_RETENTION_SECONDS: float = 3600.0
+    METRICS_ENABLED: bool = True
+    # /metrics, /health/pool and /health/cache require either
+    # "Authorization: Bearer <METRICS_TOKEN>" (for scrapers) or an admin
+    # access token. OPS_ENDPOINTS_PUBLIC=true serves them to anyone, e.g.
+    # when only a private network can reach the API.
+    METRICS_TOKEN: str = ""
+    OPS_ENDPOINTS_PUBLIC: bool = False
+    SLOW_REQUEST_SECONDS: float = 1.0
+    # Debug mode recording every upstream call per request; off adds nothing.
+    REQUEST_DEBUG: bool = False
+    REQUEST_DEBUG_ROUND_TRIP_BUDGET: int = 3
+    REQUEST_DEBUG_REPEAT_THRESHOLD: int = 3
+    # With REQUEST_DEBUG on, requests slower than this are profiled; 0 is off.
+    REQUEST_PROFILE_SECONDS: float = 0.0
+    REQUEST_PROFILE_DIR: str = "profiles"
+    # Render JSON with orjson and skip re-validating @trusted_response routes.
+    FAST_RESPONSES: bool = False
+    TRANSLATION_SCAN_PATH: str = ""
+    TRANSLATION_SCAN_CACHE_PATH: str = ".translation_scan_cache.json"
+    TRANSLATION_SCAN_WORKERS: int = 8
 
 settings = Settings()
 
+def web_concurrency() -> int:
+    return settings.WEB_CONCURRENCY or os.cpu_count() or 1
+
 # Centralized CORS origins configuration
 essential_origins = {
     "http://localhost:3000",
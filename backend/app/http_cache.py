@@ -0,0 +1,105 @@
+import hashlib
+import re
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .config import settings
+
+# Cache-Control for anonymous GETs of the public read endpoints, by path.
+# Browsers reuse a response for max-age seconds, then keep serving it while
+# revalidating in the background for stale-while-revalidate more.
+CACHE_POLICIES = [
+    (re.compile(r"^/api/products(/cards|/search)?$"), "public, max-age=30, stale-while-revalidate=300"),
+    (re.compile(r"^/api/products/\d+$"), "public, max-age=60, stale-while-revalidate=600"),
+    (re.compile(r"^/api/categories(/\d+)?$"), "public, max-age=300, stale-while-revalidate=3600"),
+    (re.compile(r"^/api/delivery-areas$"), "public, max-age=300, stale-while-revalidate=3600"),
+    (re.compile(r"^/api/settings$"), "public, max-age=60, stale-while-revalidate=600"),
+    (re.compile(r"^/api/translations/all$"), "public, max-age=300, stale-while-revalidate=86400"),
+    (re.compile(r"^/api/translations/bundle$"), "public, max-age=60, stale-while-revalidate=86400"),
+    # Versioned bundles never change; any other version is a redirect.
+    (re.compile(r"^/api/translations/bundle/[^/]+$"), "public, max-age=31536000, immutable"),
+]
+# Signed-in requests (the admin reading the storefront endpoints) always
+# revalidate, so edits show up at once; they still get 304s.
+AUTHORIZED_POLICY = "private, no-cache"
+# Response headers that are part of the representation along with the body.
+HASHED_HEADERS = ("x-total-count", "x-next-cursor")
+NOT_MODIFIED_DROPPED_HEADERS = ("content-length", "content-type", "content-encoding")
+
+
+def cache_policy(path: str) -> str | None:
+    for pattern, policy in CACHE_POLICIES:
+        if pattern.match(path):
+            return policy
+    return None
+
+
+def _etag(body: bytes, headers: MutableHeaders) -> str:
+    digest = hashlib.blake2b(body, digest_size=16)
+    for name in HASHED_HEADERS:
+        digest.update(f"\n{name}:{headers.get(name, '')}".encode())
+    return f'"{digest.hexdigest()}"'
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    # If-None-Match uses weak comparison, so W/"x" matches "x".
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+class ConditionalGetMiddleware:
+    """
+    Adds a strong ETag (a hash of the body) and Cache-Control to successful
+    GETs of the public read endpoints in CACHE_POLICIES, and answers 304 Not
+    Modified when the request's If-None-Match already names that ETag.
+    These responses are small JSON documents, so buffering them is cheap.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "GET" or not settings.HTTP_CACHE_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        policy = cache_policy(scope["path"])
+        if policy is None:
+            await self.app(scope, receive, send)
+            return
+        request_headers = Headers(scope=scope)
+        if "authorization" in request_headers:
+            policy = AUTHORIZED_POLICY
+
+        start: Message | None = None
+        chunks: list[bytes] = []
+
+        async def buffer(message: Message) -> None:
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+                if message["status"] != 200:
+                    await send(message)
+                return
+            if start["status"] != 200:
+                await send(message)
+                return
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            body = b"".join(chunks)
+            headers = MutableHeaders(raw=start["headers"])
+            etag = _etag(body, headers)
+            headers["ETag"] = etag
+            headers["Cache-Control"] = policy
+            headers.add_vary_header("Authorization")
+            if _matches(request_headers.get("if-none-match", ""), etag):
+                for name in NOT_MODIFIED_DROPPED_HEADERS:
+                    del headers[name]
+                await send({**start, "status": 304, "headers": headers.raw})
+                await send({"type": "http.response.body", "body": b""})
+                return
+            await send({**start, "headers": headers.raw})
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, buffer)
@@ -0,0 +1,231 @@
+import asyncio
+import base64
+import io
+import multiprocessing
+import os
+import tempfile
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+from fastapi import HTTPException, UploadFile, status
+from PIL import Image, ImageCms, ImageOps, UnidentifiedImageError
+from supabase import AClient
+
+from .config import settings, web_concurrency
+
+BUCKET = "products"
+SPOOL_CHUNK_BYTES = 1024 * 1024
+PLACEHOLDER_WIDTH = 16
+REMOVE_BATCH_SIZE = 100
+MIME_TYPES = {"webp": "image/webp", "avif": "image/avif"}
+# Rendition names are unique, so browsers and the CDN may keep them forever.
+RENDITION_CACHE_SECONDS = "31536000"
+
+_pool: ProcessPoolExecutor | None = None
+
+
+def storage_path(url: str) -> str | None:
+    """
+    The object path inside the bucket for one of its public URLs, or None for
+    a URL that points somewhere else.
+    """
+    url = url.split("?", 1)[0]
+    marker = f"/object/public/{BUCKET}/"
+    if marker not in url:
+        return None
+    return url.split(marker, 1)[1]
+
+
+def _to_srgb(image: Image.Image) -> Image.Image:
+    # Phone photos are often tagged Display P3; the renditions drop the
+    # profile along with the rest of the metadata, so convert colors first.
+    icc = image.info.get("icc_profile")
+    if not icc:
+        return image
+    try:
+        return ImageCms.profileToProfile(image, io.BytesIO(icc), ImageCms.createProfile("sRGB"), outputMode=image.mode)
+    except (ImageCms.PyCMSError, OSError):
+        return image
+
+
+def _encode(image: Image.Image, fmt: str, quality: int) -> bytes:
+    buffer = io.BytesIO()
+    if fmt == "avif":
+        image.save(buffer, format="AVIF", quality=quality, speed=settings.IMAGE_AVIF_SPEED)
+    else:
+        image.save(buffer, format="WEBP", quality=quality, method=4)
+    return buffer.getvalue()
+
+
+def process_image(path: str, widths: list[int], formats: list[str], placeholder: bool = True) -> dict:
+    """
+    Decodes an uploaded image and encodes it at each width (never upscaling)
+    in each format, plus an optional tiny blurred WebP as a data URI. Saving
+    without passing `exif` drops EXIF, GPS and other metadata. Runs in a
+    worker process.
+    """
+    with Image.open(path) as source:
+        # Lets JPEG decode at a reduced scale when the photo is much larger
+        # than the biggest rendition.
+        source.draft("RGB", (max(widths), max(widths)))
+        image = ImageOps.exif_transpose(source)
+    has_alpha = "A" in image.getbands() or "transparency" in image.info
+    image = _to_srgb(image)
+    image = image.convert("RGBA" if has_alpha else "RGB")
+    width, height = image.size
+    qualities = {"webp": settings.IMAGE_WEBP_QUALITY, "avif": settings.IMAGE_AVIF_QUALITY}
+
+    renditions = []
+    current = image
+    # Largest first, each size resampled from the previous one.
+    for target in sorted({min(w, width) for w in widths}, reverse=True):
+        if target != current.width:
+            current = current.resize((target, max(1, round(height * target / width))), Image.Resampling.LANCZOS)
+        for fmt in formats:
+            renditions.append({
+                "width": current.width,
+                "height": current.height,
+                "format": fmt,
+                "data": _encode(current, fmt, qualities[fmt]),
+            })
+    renditions.reverse()
+
+    result = {"width": width, "height": height, "renditions": renditions, "placeholder": None}
+    if placeholder:
+        tiny = current.copy()
+        tiny.thumbnail((PLACEHOLDER_WIDTH, PLACEHOLDER_WIDTH))
+        data = _encode(tiny, "webp", 30)
+        result["placeholder"] = "data:image/webp;base64," + base64.b64encode(data).decode()
+    return result
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn, not fork: the event loop process has threads running. By
+        # default the API processes share the CPUs between their pools.
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.IMAGE_PROCESS_WORKERS or max(1, (os.cpu_count() or 1) // web_concurrency()),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+async def _spool(file: UploadFile) -> str:
+    """
+    Copies an upload to a temporary file a chunk at a time, enforcing
+    IMAGE_MAX_UPLOAD_BYTES, so the worker process can read it from disk.
+    """
+    handle = tempfile.NamedTemporaryFile(prefix="upload-", delete=False)
+    size = 0
+    try:
+        with handle:
+            while chunk := await file.read(SPOOL_CHUNK_BYTES):
+                size += len(chunk)
+                if size > settings.IMAGE_MAX_UPLOAD_BYTES:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=f"Image is larger than {settings.IMAGE_MAX_UPLOAD_BYTES} bytes.",
+                    )
+                handle.write(chunk)
+    except BaseException:
+        os.unlink(handle.name)
+        raise
+    return handle.name
+
+
+async def store_image(
+    file: UploadFile,
+    prefix: str,
+    supabase: AClient,
+    widths: list[int] | None = None,
+    formats: list[str] | None = None,
+    placeholder: bool = True,
+) -> dict:
+    """
+    Resizes an upload into renditions off the event loop and uploads them
+    concurrently under `prefix`. Returns `image_url` (the largest WebP),
+    `renditions` ({url, width, height, format} each), `placeholder`,
+    `width` and `height`.
+    """
+    path = await _spool(file)
+    try:
+        return await store_file(path, prefix, supabase, widths, formats, placeholder)
+    finally:
+        os.unlink(path)
+
+
+async def store_file(
+    path: str,
+    prefix: str,
+    supabase: AClient,
+    widths: list[int] | None = None,
+    formats: list[str] | None = None,
+    placeholder: bool = True,
+) -> dict:
+    """
+    `store_image` for an image already on local disk.
+    """
+    widths = widths or settings.IMAGE_RENDITION_WIDTHS
+    formats = formats or settings.IMAGE_RENDITION_FORMATS
+    try:
+        processed = await asyncio.get_running_loop().run_in_executor(_get_pool(), process_image, path, widths, formats, placeholder)
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, ValueError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unsupported or corrupt image.")
+
+    bucket = supabase.storage.from_(BUCKET)
+    stem = uuid.uuid4().hex
+
+    async def upload(rendition: dict) -> dict:
+        object_path = f"{prefix}/{stem}-{rendition['width']}w.{rendition['format']}"
+        await bucket.upload(object_path, rendition["data"], {
+            "content-type": MIME_TYPES[rendition["format"]],
+            "cache-control": RENDITION_CACHE_SECONDS,
+        })
+        return {
+            "url": await bucket.get_public_url(object_path),
+            "width": rendition["width"],
+            "height": rendition["height"],
+            "format": rendition["format"],
+        }
+
+    renditions = await asyncio.gather(*(upload(rendition) for rendition in processed["renditions"]))
+    webp = [r for r in renditions if r["format"] == "webp"] or renditions
+    return {
+        "image_url": max(webp, key=lambda r: r["width"])["url"],
+        "renditions": list(renditions),
+        "placeholder": processed["placeholder"],
+        "width": processed["width"],
+        "height": processed["height"],
+    }
+
+
+async def store_images(files: list[UploadFile], prefix: str, supabase: AClient) -> list[dict | Exception]:
+    """
+    Runs `store_image` for several uploads at once, at most
+    IMAGE_UPLOAD_CONCURRENCY at a time. Returns one result per file, in
+    order: the stored image, or the exception that file failed with.
+    """
+    semaphore = asyncio.Semaphore(settings.IMAGE_UPLOAD_CONCURRENCY)
+
+    async def store(file: UploadFile) -> dict:
+        async with semaphore:
+            return await store_image(file, prefix, supabase)
+
+    return await asyncio.gather(*(store(file) for file in files), return_exceptions=True)
+
+
+async def remove_images(urls: list[str], supabase: AClient) -> None:
+    """
+    Deletes the objects behind public URLs of the bucket, ignoring others.
+    """
+    paths = sorted({path for path in (storage_path(url) for url in urls if url) if path})
+    for start in range(0, len(paths), REMOVE_BATCH_SIZE):
+        await supabase.storage.from_(BUCKET).remove(paths[start:start + REMOVE_BATCH_SIZE])
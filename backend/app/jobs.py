@@ -0,0 +1,274 @@
+import asyncio
+import os
+import random
+import tempfile
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable
+
+import structlog
+from postgrest.types import ReturnMethod
+from supabase import AClient
+
+from . import images
+from .cache import invalidate_product
+from .config import settings
+from .supabase_client import get_supabase_client
+
+logger = structlog.get_logger(__name__)
+
+JobHandler = Callable[[dict, AClient], Awaitable[None]]
+
+# Job kind -> handler, and kind -> interval in seconds for periodic jobs.
+handlers: dict[str, JobHandler] = {}
+periodic: dict[str, float] = {}
+
+LIST_PAGE_SIZE = 1000
+# Message images are referenced from rich text, not from a table, so the
+# sweeper leaves them alone.
+SWEEP_SKIP_FOLDERS = {"messages"}
+
+
+def job(kind: str, every: float | None = None):
+    """
+    Registers a handler for `kind`. With `every`, the worker keeps one run
+    of it scheduled that many seconds after the previous one finished.
+    """
+    def register(handler: JobHandler) -> JobHandler:
+        handlers[kind] = handler
+        if every is not None:
+            periodic[kind] = every
+        return handler
+    return register
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+async def enqueue(kind: str, payload: dict, supabase: AClient, delay: float = 0.0, dedupe_key: str | None = None) -> None:
+    await supabase.rpc("enqueue_job", {
+        "p_kind": kind,
+        "p_payload": payload,
+        "p_delay_seconds": delay,
+        "p_dedupe_key": dedupe_key,
+        "p_max_attempts": settings.JOBS_MAX_ATTEMPTS,
+    }).execute()
+    job_worker.notify()
+
+
+def _backoff(attempts: int) -> float:
+    delay = min(settings.JOBS_BACKOFF_MAX_SECONDS, settings.JOBS_BACKOFF_BASE_SECONDS * 2 ** (attempts - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+class JobWorker:
+    """
+    Claims due jobs from the `jobs` table in batches and runs them. Waits
+    JOBS_POLL_SECONDS between polls when idle, or less when this process
+    enqueues something.
+    """
+
+    def __init__(self):
+        self._task: asyncio.Task | None = None
+        self._wake = asyncio.Event()
+
+    def notify(self) -> None:
+        self._wake.set()
+
+    def start(self) -> None:
+        if settings.JOBS_ENABLED and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        self._wake = asyncio.Event()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._task = None
+
+    async def _schedule(self, kind: str, supabase: AClient) -> None:
+        try:
+            await enqueue(kind, {}, supabase, delay=periodic[kind], dedupe_key=kind)
+        except Exception as e:
+            logger.warning("job_schedule_failed", kind=kind, error=str(e))
+
+    async def _run(self) -> None:
+        supabase = await get_supabase_client()
+        for kind in periodic:
+            await self._schedule(kind, supabase)
+        while True:
+            try:
+                response = await supabase.rpc("claim_jobs", {
+                    "p_limit": settings.JOBS_BATCH_SIZE,
+                    "p_lease_seconds": settings.JOBS_LEASE_SECONDS,
+                }).execute()
+                claimed = response.data
+            except Exception as e:
+                logger.warning("job_claim_failed", error=str(e))
+                claimed = []
+            if claimed:
+                await asyncio.gather(*(self._execute(claimed_job, supabase) for claimed_job in claimed))
+                continue
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=settings.JOBS_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    async def _execute(self, claimed_job: dict, supabase: AClient) -> None:
+        kind = claimed_job["kind"]
+        finished = True
+        try:
+            handler = handlers.get(kind)
+            if handler is None:
+                raise LookupError(f"No handler for job kind {kind!r}")
+            await handler(claimed_job["payload"], supabase)
+            update = {"status": "done", "last_error": None}
+        except Exception as e:
+            finished = claimed_job["attempts"] >= claimed_job["max_attempts"]
+            logger.warning("job_failed", job_id=claimed_job["id"], kind=kind, attempts=claimed_job["attempts"], error=str(e))
+            update = {
+                "status": "failed" if finished else "queued",
+                "last_error": str(e)[:2000],
+                "run_at": (_now() + timedelta(seconds=_backoff(claimed_job["attempts"]))).isoformat(),
+            }
+        try:
+            await supabase.table("jobs").update({**update, "locked_until": None, "updated_at": _now().isoformat()}).eq("id", claimed_job["id"]).execute()
+        except Exception as e:
+            # The lease runs out and the job is claimed again.
+            logger.warning("job_update_failed", job_id=claimed_job["id"], error=str(e))
+            return
+        if finished and kind in periodic:
+            await self._schedule(kind, supabase)
+
+
+job_worker = JobWorker()
+
+
+@job("storage.remove")
+async def remove_storage_objects(payload: dict, supabase: AClient) -> None:
+    await images.remove_images(payload["urls"], supabase)
+
+
+@job("image.renditions")
+async def create_image_renditions(payload: dict, supabase: AClient) -> None:
+    """
+    Replaces a product image uploaded before renditions existed with its
+    renditions, then queues the original for removal.
+    """
+    response = await supabase.table("product_images").select("id, product_id, image_url, renditions").eq("id", payload["image_id"]).execute()
+    if not response.data or response.data[0]["renditions"]:
+        return
+    image = response.data[0]
+    path = images.storage_path(image["image_url"])
+    if path is None:
+        return
+    data = await supabase.storage.from_(images.BUCKET).download(path)
+    handle = tempfile.NamedTemporaryFile(prefix="rendition-", delete=False)
+    try:
+        with handle:
+            handle.write(data)
+        stored = await images.store_file(handle.name, str(image["product_id"]), supabase)
+    finally:
+        os.unlink(handle.name)
+    await supabase.table("product_images").update({
+        "image_url": stored["image_url"],
+        "renditions": stored["renditions"],
+        "placeholder": stored["placeholder"],
+        "width": stored["width"],
+        "height": stored["height"],
+    }).eq("id", image["id"]).execute()
+    invalidate_product(image["product_id"])
+    await supabase.rpc("enqueue_storage_removal", {"p_urls": [image["image_url"]]}).execute()
+
+
+async def list_jobs(status: str | None, limit: int, supabase: AClient) -> list[dict]:
+    builder = supabase.table("jobs").select("*")
+    if status:
+        builder = builder.eq("status", status)
+    response = await builder.order("id", desc=True).limit(limit).execute()
+    return response.data
+
+
+async def backfill_image_renditions(supabase: AClient) -> int:
+    """
+    Queues an `image.renditions` job for every product image without
+    renditions. Returns how many images were queued.
+    """
+    response = await supabase.table("product_images").select("id").eq("renditions", "[]").execute()
+    await asyncio.gather(*(
+        enqueue("image.renditions", {"image_id": row["id"]}, supabase, dedupe_key=f"image.renditions:{row['id']}")
+        for row in response.data
+    ))
+    return len(response.data)
+
+
+async def _list_objects(supabase: AClient, folder: str = "") -> list[dict]:
+    """
+    Every object in the bucket under `folder`, walking sub-folders, with its
+    path in `name`.
+    """
+    bucket = supabase.storage.from_(images.BUCKET)
+    objects = []
+    offset = 0
+    while True:
+        entries = await bucket.list(folder, {"limit": LIST_PAGE_SIZE, "offset": offset})
+        for entry in entries:
+            path = f"{folder}/{entry['name']}" if folder else entry["name"]
+            if entry.get("id") is None:
+                if path not in SWEEP_SKIP_FOLDERS:
+                    objects.extend(await _list_objects(supabase, path))
+            else:
+                objects.append({**entry, "name": path})
+        if len(entries) < LIST_PAGE_SIZE:
+            return objects
+        offset += LIST_PAGE_SIZE
+
+
+async def _referenced_paths(supabase: AClient) -> set[str]:
+    paths = set()
+    offset = 0
+    while True:
+        response = await supabase.table("storage_references").select("url").order("url").range(offset, offset + LIST_PAGE_SIZE - 1).execute()
+        paths.update(path for path in (images.storage_path(row["url"]) for row in response.data if row["url"]) if path)
+        if len(response.data) < LIST_PAGE_SIZE:
+            return paths
+        offset += LIST_PAGE_SIZE
+
+
+@job("cache_sync.purge", every=settings.CACHE_SYNC_RETENTION_SECONDS)
+async def purge_cache_invalidations(payload: dict, supabase: AClient) -> None:
+    """
+    Deletes cache invalidation events every process has long since read.
+    """
+    cutoff = _now() - timedelta(seconds=settings.CACHE_SYNC_RETENTION_SECONDS)
+    await supabase.table("cache_invalidations").delete(returning=ReturnMethod.minimal).lt("created_at", cutoff.isoformat()).execute()
+
+
+@job("storage.sweep", every=settings.STORAGE_SWEEP_INTERVAL_SECONDS)
+async def sweep_storage(payload: dict, supabase: AClient) -> None:
+    """
+    Deletes objects in the products bucket that no product image or variant
+    references, such as files left by failed uploads or by deletes from
+    before the removal triggers. Objects younger than
+    STORAGE_SWEEP_MIN_AGE_SECONDS are kept, since an upload saves its files
+    before its row. Also purges finished jobs past JOBS_RETENTION_DAYS.
+    """
+    # Read references after listing, so a file saved in between is kept.
+    objects = await _list_objects(supabase)
+    referenced = await _referenced_paths(supabase)
+    cutoff = _now() - timedelta(seconds=settings.STORAGE_SWEEP_MIN_AGE_SECONDS)
+    orphans = [
+        obj["name"] for obj in objects
+        if obj["name"] not in referenced
+        and obj.get("created_at")
+        and datetime.fromisoformat(obj["created_at"].replace("Z", "+00:00")) < cutoff
+    ]
+    for start in range(0, len(orphans), images.REMOVE_BATCH_SIZE):
+        await supabase.storage.from_(images.BUCKET).remove(orphans[start:start + images.REMOVE_BATCH_SIZE])
+    logger.info("storage_swept", objects=len(objects), removed=len(orphans))
+    retention_cutoff = _now() - timedelta(days=settings.JOBS_RETENTION_DAYS)
+    await supabase.table("jobs").delete(returning=ReturnMethod.minimal).eq("status", "done").lt("updated_at", retention_cutoff.isoformat()).execute()
@@ -4,6 +4,8 @@ import sys
 import structlog
 import os
 
+from .metrics import add_request_context
+
 def setup_logging():
     log_level = os.environ.get("LOG_LEVEL", "INFO").upper()
 
@@ -15,6 +17,7 @@ def setup_logging():
                 "()": structlog.stdlib.ProcessorFormatter,
                 "processor": structlog.processors.JSONRenderer(),
                 "foreign_pre_chain": [
+                    add_request_context,
                     structlog.stdlib.add_logger_name,
                     structlog.stdlib.add_log_level,
                     structlog.processors.TimeStamper(fmt="iso"),
@@ -42,6 +45,7 @@ def setup_logging():
     structlog.configure(
         processors=[
             structlog.stdlib.filter_by_level,
+            add_request_context,
             structlog.stdlib.add_logger_name,
             structlog.stdlib.add_log_level,
             structlog.stdlib.PositionalArgumentsFormatter(),
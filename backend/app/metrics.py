@@ -0,0 +1,199 @@
+import os
+import time
+import uuid
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+import httpx
+import structlog
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest,
+)
+from prometheus_client import multiprocess
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .config import settings
+
+logger = structlog.get_logger(__name__)
+
+# Requests that match no route share one label, so scanners probing random
+# paths cannot grow the series without bound.
+UNMATCHED_ROUTE = "unmatched"
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Time to serve a request, by route.",
+    ["method", "route"],
+)
+REQUESTS = Counter(
+    "http_requests_total", "Requests served, by route and status.",
+    ["method", "route", "status"],
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "Requests being served.",
+    ["method"], multiprocess_mode="livesum",
+)
+UPSTREAM_DURATION = Histogram(
+    "upstream_request_duration_seconds", "Time for a PostgREST or Storage call, until its body is read.",
+    ["service", "target", "operation"],
+)
+UPSTREAM_REQUESTS = Counter(
+    "upstream_requests_total", "PostgREST and Storage calls, by outcome.",
+    ["service", "target", "operation", "status"],
+)
+
+
+@dataclass
+class RequestContext:
+    request_id: str
+    method: str
+    scope: Scope
+    upstream_calls: int = 0
+    upstream_seconds: float = 0.0
+    started: float = field(default_factory=time.perf_counter)
+    # Per-call records, kept only while REQUEST_DEBUG is on.
+    calls: list[dict] | None = None
+
+    @property
+    def route(self) -> str:
+        # Set by FastAPI's router once the request is matched.
+        route = self.scope.get("route")
+        return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+_request_context: ContextVar[RequestContext | None] = ContextVar("request_context", default=None)
+
+
+def current_request() -> RequestContext | None:
+    return _request_context.get()
+
+
+def set_request_context(context: RequestContext) -> None:
+    _request_context.set(context)
+
+
+def add_request_context(logger, method_name: str, event_dict: dict) -> dict:
+    """
+    structlog processor adding the request id, route and upstream call count
+    to log lines written while serving a request.
+    """
+    context = _request_context.get()
+    if context is not None:
+        event_dict.setdefault("request_id", context.request_id)
+        event_dict.setdefault("route", context.route)
+        event_dict.setdefault("upstream_calls", context.upstream_calls)
+    return event_dict
+
+
+def _upstream_labels(request: httpx.Request) -> tuple[str, str, str]:
+    """
+    (service, target, operation) for a Supabase call: the table or function
+    for PostgREST, the bucket for Storage.
+    """
+    parts = request.url.path.strip("/").split("/")
+    method = request.method
+    if parts[:2] == ["rest", "v1"] and len(parts) > 2:
+        if parts[2] == "rpc" and len(parts) > 3:
+            return "postgrest", parts[3], "rpc"
+        operation = {"GET": "select", "HEAD": "count", "PATCH": "update", "DELETE": "delete"}.get(method, method.lower())
+        if method == "POST":
+            operation = "upsert" if "resolution=" in request.headers.get("prefer", "") else "insert"
+        return "postgrest", parts[2], operation
+    if parts[:2] == ["storage", "v1"] and len(parts) > 3 and parts[2] == "object":
+        if parts[3] in ("list", "public", "sign", "move", "copy") and len(parts) > 4:
+            return "storage", parts[4], parts[3]
+        operation = {"GET": "download", "POST": "upload", "PUT": "update", "DELETE": "remove"}.get(method, method.lower())
+        return "storage", parts[3], operation
+    return "other", parts[0] if parts else "", method.lower()
+
+
+def observe_upstream(request: httpx.Request, status: int | None, seconds: float) -> None:
+    """
+    Records one Supabase call; `status` is None when it failed without a
+    response. Called by the connection pool when the response is closed.
+    """
+    context = _request_context.get()
+    if not settings.METRICS_ENABLED and (context is None or context.calls is None):
+        return
+    service, target, operation = _upstream_labels(request)
+    if settings.METRICS_ENABLED:
+        UPSTREAM_DURATION.labels(service, target, operation).observe(seconds)
+        UPSTREAM_REQUESTS.labels(service, target, operation, str(status) if status is not None else "error").inc()
+    if context is not None:
+        context.upstream_calls += 1
+        context.upstream_seconds += seconds
+        if context.calls is not None:
+            end = time.perf_counter() - context.started
+            context.calls.append({
+                "service": service,
+                "target": target,
+                "operation": operation,
+                "status": status if status is not None else "error",
+                "start_ms": round((end - seconds) * 1000, 1),
+                "end_ms": round(end * 1000, 1),
+            })
+
+
+class RequestMetricsMiddleware:
+    """
+    Times every HTTP request per route template and counts it per status,
+    tracks requests in flight, and gives each request an id (the caller's
+    X-Request-ID, or a new one) that is echoed back and added to every log
+    line written while serving it. Requests slower than
+    SLOW_REQUEST_SECONDS are logged with their upstream call count.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")[:128]
+                break
+        context = RequestContext(request_id=request_id or uuid.uuid4().hex, method=scope["method"], scope=scope)
+        # Not reset afterwards: each request runs in its own task, and the
+        # server error handler outside this middleware logs with it too.
+        _request_context.set(context)
+        status = 500
+
+        async def send_with_id(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = [*message.get("headers", []), (b"x-request-id", context.request_id.encode("latin-1"))]
+            await send(message)
+
+        in_flight = REQUESTS_IN_FLIGHT.labels(context.method)
+        in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            in_flight.dec()
+            elapsed = time.perf_counter() - context.started
+            route = context.route
+            REQUEST_DURATION.labels(context.method, route).observe(elapsed)
+            REQUESTS.labels(context.method, route, str(status)).inc()
+            if elapsed >= settings.SLOW_REQUEST_SECONDS and not route.endswith("/stream"):
+                logger.warning(
+                    "slow_request",
+                    status=status,
+                    duration_ms=round(elapsed * 1000, 1),
+                    upstream_ms=round(context.upstream_seconds * 1000, 1),
+                )
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """
+    The metrics in the Prometheus text format. Under gunicorn with
+    PROMETHEUS_MULTIPROC_DIR set, aggregates every worker's metrics.
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,146 @@
+import asyncio
+import contextvars
+import json
+from typing import AsyncIterator
+
+import structlog
+
+from .config import settings
+from .services import _encode_cursor, get_order_changes, order_change_hooks
+from .supabase_client import get_supabase_client
+
+logger = structlog.get_logger(__name__)
+
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+def _sse(changes: dict) -> str:
+    return f"id: {changes['cursor']}\nevent: changes\ndata: {json.dumps(changes, default=str)}\n\n"
+
+
+class OrderFeed:
+    """
+    Fans order changes out to Server-Sent Events subscribers. One poller per
+    process reads the change feed while anyone is subscribed, every
+    ORDER_FEED_POLL_SECONDS or immediately after this process writes an
+    order, and broadcasts each batch that holds something new.
+    """
+
+    def __init__(self):
+        self._subscribers: set[asyncio.Queue] = set()
+        self._task: asyncio.Task | None = None
+        self._wake = asyncio.Event()
+        # updated_at last broadcast per order, to skip the rows the feed's
+        # overlap window returns again on every poll.
+        self._seen: dict[int, str] = {}
+
+    def notify(self) -> None:
+        self._wake.set()
+
+    def subscribe(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers.add(queue)
+        if self._task is None or self._task.done():
+            # A fresh context, so the poller's upstream calls are not counted
+            # or logged as part of the request that happened to start it.
+            self._task = asyncio.create_task(self._poll(), context=contextvars.Context())
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+
+    def is_subscribed(self, queue: asyncio.Queue) -> bool:
+        return queue in self._subscribers
+
+    def _broadcast(self, changes: dict) -> None:
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(changes)
+            except asyncio.QueueFull:
+                # A client this far behind reconnects and catches up from its cursor.
+                self._subscribers.discard(queue)
+
+    def _unseen(self, changes: dict) -> dict | None:
+        orders = [order for order in changes["orders"] if self._seen.get(order["id"]) != order["updated_at"]]
+        deleted = [order_id for order_id in changes["deleted"] if self._seen.get(order_id) != "deleted"]
+        for order in orders:
+            self._seen[order["id"]] = order["updated_at"]
+        for order_id in deleted:
+            self._seen[order_id] = "deleted"
+        if len(self._seen) > SUBSCRIBER_QUEUE_SIZE * 10:
+            self._seen.clear()
+        if not orders and not deleted:
+            return None
+        return {**changes, "orders": orders, "deleted": deleted}
+
+    async def _poll(self) -> None:
+        supabase = await get_supabase_client()
+        cursor = None
+        try:
+            # Start from the newest change; subscribers catch up on their own.
+            latest = await supabase.table("order_changes").select("id, updated_at").order("updated_at", desc=True).order("id", desc=True).limit(1).execute()
+            if latest.data:
+                cursor = _encode_cursor(latest.data[0]["updated_at"], 0)
+        except Exception as e:
+            logger.warning("order_feed_start_failed", error=str(e))
+        while self._subscribers:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=settings.ORDER_FEED_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                while True:
+                    changes = (await get_order_changes(cursor, settings.ORDERS_PAGE_MAX, supabase)).model_dump(mode="json")
+                    cursor = changes["cursor"]
+                    fresh = self._unseen(changes)
+                    if fresh is not None:
+                        self._broadcast(fresh)
+                    if not changes["has_more"]:
+                        break
+            except Exception as e:
+                logger.warning("order_feed_poll_failed", error=str(e))
+
+    async def close(self) -> None:
+        self._subscribers.clear()
+        self._wake = asyncio.Event()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._task = None
+
+    async def stream(self, since: str | None, is_disconnected) -> AsyncIterator[str]:
+        """
+        Yields SSE frames: first everything after `since`, then live batches,
+        with a comment line as keep-alive when nothing happens.
+        """
+        queue = self.subscribe()
+        try:
+            # Sends the response headers now, so the client sees the stream
+            # open before the first event or keep-alive.
+            yield ": connected\n\n"
+            if since:
+                supabase = await get_supabase_client()
+                while True:
+                    changes = (await get_order_changes(since, settings.ORDERS_PAGE_MAX, supabase)).model_dump(mode="json")
+                    since = changes["cursor"]
+                    if changes["orders"] or changes["deleted"]:
+                        yield _sse(changes)
+                    if not changes["has_more"]:
+                        break
+            while self.is_subscribed(queue) and not await is_disconnected():
+                try:
+                    changes = await asyncio.wait_for(queue.get(), timeout=settings.ORDER_FEED_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield _sse(changes)
+        finally:
+            self.unsubscribe(queue)
+
+
+order_feed = OrderFeed()
+order_change_hooks.append(order_feed.notify)
@@ -0,0 +1,114 @@
+import asyncio
+import cProfile
+import os
+import re
+import time
+from collections import Counter
+
+import structlog
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .config import settings
+from .metrics import RequestContext, current_request, set_request_context
+
+logger = structlog.get_logger(__name__)
+
+_profiling = False
+
+
+def round_trip_report(calls: list[dict]) -> dict:
+    """
+    Summarizes a request's upstream calls. `sequential` counts the calls
+    that started only after every earlier one had finished, which is the
+    number of round trips the request waited for one after another.
+    `repeated` lists table/operation pairs called REQUEST_DEBUG_REPEAT_THRESHOLD
+    times or more, the usual sign of an N+1 loop.
+    """
+    sequential = 0
+    frontier = float("-inf")
+    for call in sorted(calls, key=lambda c: c["start_ms"]):
+        if call["start_ms"] >= frontier:
+            sequential += 1
+            frontier = call["end_ms"]
+        else:
+            frontier = max(frontier, call["end_ms"])
+    counts = Counter(f"{call['operation']} {call['target']}" for call in calls)
+    return {
+        "calls": len(calls),
+        "sequential": sequential,
+        "upstream_ms": round(sum(call["end_ms"] - call["start_ms"] for call in calls), 1),
+        "repeated": {name: count for name, count in counts.items() if count >= settings.REQUEST_DEBUG_REPEAT_THRESHOLD},
+    }
+
+
+def _dump_profile(profiler: cProfile.Profile, context: RequestContext) -> str:
+    os.makedirs(settings.REQUEST_PROFILE_DIR, exist_ok=True)
+    route = re.sub(r"[^A-Za-z0-9]+", "_", context.route).strip("_") or "root"
+    path = os.path.join(
+        settings.REQUEST_PROFILE_DIR,
+        f"{time.strftime('%Y%m%dT%H%M%S')}-{context.method}-{route}-{context.request_id}.prof",
+    )
+    profiler.dump_stats(path)
+    return path
+
+
+class RoundTripDebugMiddleware:
+    """
+    Debug aid, installed only when REQUEST_DEBUG is on so it costs nothing
+    otherwise. Records every PostgREST and Storage call a request makes,
+    reports them in a Server-Timing header, and logs the call trace when the
+    request waits on more than REQUEST_DEBUG_ROUND_TRIP_BUDGET sequential
+    round trips or repeats a call.
+
+    With REQUEST_PROFILE_SECONDS set, requests also run under cProfile and
+    the ones slower than that are dumped to REQUEST_PROFILE_DIR as .prof
+    files (for pstats or snakeviz). cProfile sees everything on the event
+    loop thread, so one request is profiled at a time and its profile also
+    holds whatever else ran meanwhile.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        global _profiling
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        context = current_request()
+        if context is None:
+            context = RequestContext(request_id=os.urandom(16).hex(), method=scope["method"], scope=scope)
+            set_request_context(context)
+        context.calls = []
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                report = round_trip_report(context.calls)
+                timing = f'upstream;dur={report["upstream_ms"]};desc="{report["calls"]} calls, {report["sequential"]} sequential"'
+                message["headers"] = [*message.get("headers", []), (b"server-timing", timing.encode())]
+            await send(message)
+
+        profiler = None
+        if settings.REQUEST_PROFILE_SECONDS > 0 and not _profiling:
+            _profiling = True
+            profiler = cProfile.Profile()
+            profiler.enable()
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            elapsed = time.perf_counter() - context.started
+            if profiler is not None:
+                profiler.disable()
+                _profiling = False
+            report = round_trip_report(context.calls)
+            if report["sequential"] > settings.REQUEST_DEBUG_ROUND_TRIP_BUDGET or report["repeated"]:
+                logger.warning(
+                    "round_trip_budget_exceeded",
+                    budget=settings.REQUEST_DEBUG_ROUND_TRIP_BUDGET,
+                    duration_ms=round(elapsed * 1000, 1),
+                    trace=[f"{c['start_ms']}-{c['end_ms']}ms {c['operation']} {c['target']} {c['status']}" for c in context.calls],
+                    **report,
+                )
+            if profiler is not None and elapsed >= settings.REQUEST_PROFILE_SECONDS:
+                path = await asyncio.to_thread(_dump_profile, profiler, context)
+                logger.warning("slow_request_profiled", duration_ms=round(elapsed * 1000, 1), profile=path, **report)
@@ -0,0 +1,86 @@
+import functools
+import inspect
+from typing import Any, Callable
+
+import orjson
+from fastapi import Response
+from fastapi.responses import ORJSONResponse
+from fastapi.routing import APIRoute
+from pydantic import BaseModel
+
+from .config import settings
+
+TRUSTED_RESPONSE_PARAM = "_trusted_response"
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+class TrustedJSONResponse(ORJSONResponse):
+    """
+    orjson rendering of service data as it is, which may still hold a
+    pydantic model here and there.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def trusted_response(endpoint: Callable) -> Callable:
+    """
+    Marks a route whose service returns rows already in the shape of its
+    response_model: PostgREST selects and cached rows shaped by the service
+    layer. With FAST_RESPONSES on, FastJSONRoute renders what such a route
+    returns with orjson instead of validating it against the model again.
+
+    The JSON is then the rows as selected: timestamps keep PostgREST's
+    format, keys the select leaves out are absent rather than null, and
+    fields the service adds beyond the model are kept.
+    """
+    endpoint.trusted_response = True
+    return endpoint
+
+
+def _render_directly(endpoint: Callable, status_code: int | None) -> Callable:
+    """
+    Wraps an endpoint to return a rendered response, which FastAPI passes
+    through without validation. Headers and the status set on the injected
+    Response are copied over the way FastAPI does for serialized content.
+    """
+    signature = inspect.signature(endpoint)
+    parameters = list(signature.parameters.values())
+    response_name = next((parameter.name for parameter in parameters if parameter.annotation is Response), None)
+    if response_name is None:
+        response_name = TRUSTED_RESPONSE_PARAM
+        parameters.append(inspect.Parameter(response_name, inspect.Parameter.KEYWORD_ONLY, annotation=Response))
+
+    @functools.wraps(endpoint)
+    async def render(**kwargs):
+        response = kwargs[response_name] if response_name != TRUSTED_RESPONSE_PARAM else kwargs.pop(response_name)
+        content = await endpoint(**kwargs)
+        if isinstance(content, Response):
+            return content
+        rendered = TrustedJSONResponse(content, status_code=response.status_code or status_code or 200)
+        rendered.headers.raw.extend(response.headers.raw)
+        return rendered
+
+    render.__signature__ = signature.replace(parameters=parameters)
+    # include_router rebuilds routes from their endpoints; wrap only once.
+    render.renders_directly = True
+    return render
+
+
+class FastJSONRoute(APIRoute):
+    """
+    Route class of the API routers. With FAST_RESPONSES off it is a plain
+    APIRoute; with it on, routes marked @trusted_response skip response
+    validation. Their response_model still documents them in OpenAPI.
+    """
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        if settings.FAST_RESPONSES and getattr(endpoint, "trusted_response", False) and not getattr(endpoint, "renders_directly", False):
+            endpoint = _render_directly(endpoint, kwargs.get("status_code"))
+        super().__init__(path, endpoint, **kwargs)
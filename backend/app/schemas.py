@@ -16,6 +16,22 @@ class ShippingMethod(str, Enum):
     delivery = 'delivery'
     pick_up = 'pick_up'
 
+class ProductSort(str, Enum):
+    newest = 'newest'
+    oldest = 'oldest'
+    price_asc = 'price_asc'
+    price_desc = 'price_desc'
+    name_asc = 'name_asc'
+    name_desc = 'name_desc'
+
+class OrderSort(str, Enum):
+    newest = 'newest'
+    oldest = 'oldest'
+
+class CatalogFormat(str, Enum):
+    csv = 'csv'
+    ndjson = 'ndjson'
+
 class AdminLoginRequest(BaseModel):
     password: str
 
@@ -23,6 +39,10 @@ class Token(BaseModel):
     access_token: str
     token_type: str
 
+class OrderFeedToken(BaseModel):
+    token: str
+    expires_in: int
+
 class Category(BaseModel):
     id: int
     name: str
@@ -32,12 +52,27 @@ class CategoryCreate(BaseModel):
 
 from datetime import datetime
 
+class ImageRendition(BaseModel):
+    url: str
+    width: int
+    height: int
+    format: str
+
 class ProductImage(BaseModel):
     id: int
     product_id: int
     image_url: str
     is_primary: bool
     created_at: datetime
+    renditions: list[ImageRendition] = []
+    placeholder: Optional[str] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+
+class ProductImageUploadResult(BaseModel):
+    filename: Optional[str] = None
+    image: Optional[ProductImage] = None
+    error: Optional[str] = None
 
 class ProductVariant(BaseModel):
     id: int
@@ -46,6 +81,8 @@ class ProductVariant(BaseModel):
     price: float
     stock_quantity: int
     image_url: Optional[str] = None
+    image_renditions: list[ImageRendition] = []
+    image_placeholder: Optional[str] = None
     product: Optional['Product'] = None
 
 class Product(BaseModel):
@@ -59,6 +96,16 @@ class Product(BaseModel):
     product_images: list[ProductImage] = []
     product_variants: list[ProductVariant] = []
 
+class ProductCard(BaseModel):
+    id: int
+    name: str
+    price: float
+    category_id: Optional[int] = None
+    primary_image_url: Optional[str] = None
+    in_stock: bool
+    primary_image_renditions: list[ImageRendition] = []
+    primary_image_placeholder: Optional[str] = None
+
 class ProductVariantCreate(BaseModel):
     name: str
     price: float
@@ -83,6 +130,54 @@ class ProductCreate(BaseModel):
     stock_quantity: Optional[int] = None
     category_id: Optional[int] = None
 
+class ProductListQuery(BaseModel):
+    limit: Optional[int] = None
+    offset: int = 0
+    cursor: Optional[str] = None
+    category_id: Optional[int] = None
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+    in_stock: Optional[bool] = None
+    q: Optional[str] = None
+    has_orders: Optional[bool] = None
+    sort: ProductSort = ProductSort.newest
+
+class ProductImport(ProductCreate):
+    id: Optional[int] = None
+
+class ProductVariantImport(ProductVariantUpsert):
+    product_id: int
+
+class ImportRowError(BaseModel):
+    row: int
+    errors: list[str]
+
+class JobStatus(str, Enum):
+    queued = "queued"
+    running = "running"
+    done = "done"
+    failed = "failed"
+
+class Job(BaseModel):
+    id: int
+    kind: str
+    payload: dict
+    status: JobStatus
+    attempts: int
+    max_attempts: int
+    run_at: datetime
+    last_error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+class ImportReport(BaseModel):
+    processed: int = 0
+    inserted: int = 0
+    upserted: int = 0
+    failed: int = 0
+    errors: list[ImportRowError] = []
+    errors_truncated: bool = False
+
 class ProductImageUpdate(BaseModel):
     id: int
     is_primary: bool
@@ -130,6 +225,18 @@ class Translation(BaseModel):
     key: str
     value: str
 
+class TranslationBundle(BaseModel):
+    version: str
+    translations: dict[str, str]
+
+class TranslationKeyReport(BaseModel):
+    missing: list[str]
+    unused: list[str]
+    dynamic_prefixes: list[str]
+    files: int
+    rescanned: int
+    duration_ms: float
+
 class TranslationCreate(BaseModel):
     key: str
     value: str
@@ -181,6 +288,7 @@ class Order(BaseModel):
     status: OrderStatus
     comments: Optional[str] = None
     created_at: datetime
+    updated_at: Optional[datetime] = None
     order_items: list[OrderItem] = []
     customer: Customer
     delivery_area_id: Optional[int] = None
@@ -193,6 +301,26 @@ class Order(BaseModel):
             return values['delivery_area'].id
         return v
 
+class OrderListQuery(BaseModel):
+    limit: Optional[int] = None
+    offset: int = 0
+    cursor: Optional[str] = None
+    status: Optional[list[OrderStatus]] = None
+    shipping_method: Optional[ShippingMethod] = None
+    customer_id: Optional[int] = None
+    delivery_area_id: Optional[int] = None
+    created_from: Optional[datetime] = None
+    created_to: Optional[datetime] = None
+    product_id: Optional[int] = None
+    q: Optional[str] = None
+    sort: OrderSort = OrderSort.newest
+
+class OrderChanges(BaseModel):
+    orders: list[Order] = []
+    deleted: list[int] = []
+    cursor: Optional[str] = None
+    has_more: bool = False
+
 class OrderUpdate(BaseModel):
     status: Optional[OrderStatus] = None
     shipping_method: Optional[ShippingMethod] = None
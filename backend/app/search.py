@@ -0,0 +1,230 @@
+import asyncio
+import bisect
+import contextvars
+import heapq
+import re
+import time
+from collections import defaultdict
+
+import structlog
+from supabase import AClient
+
+from .cache import catalog_change_hooks
+from .config import settings
+
+logger = structlog.get_logger(__name__)
+
+ARABIC_DIACRITICS = re.compile("[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed\u0640]")
+HTML_TAGS = re.compile(r"<[^>]+>")
+TOKEN = re.compile(r"\w+")
+ARABIC_LETTER_VARIANTS = str.maketrans({
+    "أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا",
+    "ى": "ي", "ئ": "ي", "ؤ": "و", "ة": "ه",
+    "٠": "0", "١": "1", "٢": "2", "٣": "3", "٤": "4",
+    "٥": "5", "٦": "6", "٧": "7", "٨": "8", "٩": "9",
+})
+
+FIELD_WEIGHTS = {"name": 3.0, "category": 2.0, "description": 1.0}
+PREFIX_FACTOR = 0.5
+MIN_PREFIX_LENGTH = 2
+FETCH_CHUNK = 1000
+CARD_FIELDS = (
+    "id", "name", "price", "category_id", "primary_image_url", "in_stock",
+    "primary_image_renditions", "primary_image_placeholder",
+)
+
+
+def normalize(text: str) -> str:
+    """
+    Folds case, strips Arabic diacritics and tatweel, and unifies alef, ya,
+    ta marbuta and hamza-seat variants so spelling differences still match.
+    """
+    text = ARABIC_DIACRITICS.sub("", text.casefold())
+    return text.translate(ARABIC_LETTER_VARIANTS)
+
+
+def tokenize(text: str | None) -> list[str]:
+    if not text:
+        return []
+    tokens = []
+    for token in TOKEN.findall(normalize(HTML_TAGS.sub(" ", text))):
+        tokens.append(token)
+        # Index Arabic words with and without the definite article.
+        if token.startswith("ال") and len(token) > 3:
+            tokens.append(token[2:])
+    return tokens
+
+
+class ProductSearchIndex:
+    """
+    An in-process inverted index over product names, category names and
+    descriptions. It is built from the database on first use and then kept
+    current by reindexing only the products that changed: catalog
+    invalidations mark them, including those cache_sync receives from other
+    processes. Changes no invalidation reports (a process without
+    cache_sync, edits made in the database) are caught by rebuilding it in
+    the background every SEARCH_INDEX_TTL_SECONDS.
+    """
+
+    def __init__(self):
+        self._reset()
+        self._built = False
+        self._full_rebuild = False
+        self._dirty: set[int] = set()
+        self._lock = asyncio.Lock()
+        self._expires_at = 0.0
+        self._refresh: asyncio.Task | None = None
+
+    def _reset(self) -> None:
+        self._postings: dict[str, dict[int, float]] = defaultdict(dict)
+        self._vocabulary: list[str] = []
+        self._documents: dict[int, list[str]] = {}
+        self.cards: dict[int, dict] = {}
+
+    def mark_dirty(self, product_id: int | None) -> None:
+        if product_id is None:
+            self._full_rebuild = True
+        else:
+            self._dirty.add(product_id)
+
+    def _remove(self, product_id: int) -> None:
+        for term in self._documents.pop(product_id, []):
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(product_id, None)
+            if not postings:
+                del self._postings[term]
+                index = bisect.bisect_left(self._vocabulary, term)
+                if index < len(self._vocabulary) and self._vocabulary[index] == term:
+                    del self._vocabulary[index]
+        self.cards.pop(product_id, None)
+
+    def add(self, card: dict, description: str | None, category_name: str | None, keep_sorted: bool = True) -> None:
+        product_id = card["id"]
+        self._remove(product_id)
+        weights: dict[str, float] = {}
+        for field, text in (("name", card.get("name")), ("category", category_name), ("description", description)):
+            for term in tokenize(text):
+                weights[term] = weights.get(term, 0.0) + FIELD_WEIGHTS[field]
+        for term, weight in weights.items():
+            if keep_sorted and term not in self._postings:
+                bisect.insort(self._vocabulary, term)
+            self._postings[term][product_id] = weight
+        self._documents[product_id] = list(weights)
+        self.cards[product_id] = {field: card.get(field) for field in CARD_FIELDS}
+
+    def _expand(self, token: str) -> dict[int, float]:
+        scores: dict[int, float] = dict(self._postings.get(token, {}))
+        if len(token) < MIN_PREFIX_LENGTH:
+            return scores
+        start = bisect.bisect_left(self._vocabulary, token)
+        for term in self._vocabulary[start:]:
+            if not term.startswith(token):
+                break
+            if term == token:
+                continue
+            postings = self._postings[term]
+            if not scores:
+                scores = {product_id: weight * PREFIX_FACTOR for product_id, weight in postings.items()}
+                continue
+            for product_id, weight in postings.items():
+                weight *= PREFIX_FACTOR
+                if weight > scores.get(product_id, 0.0):
+                    scores[product_id] = weight
+        return scores
+
+    def search(self, query: str, limit: int, offset: int = 0) -> tuple[list[dict], int]:
+        """
+        Returns one page of matching product cards and the total match count.
+        Every query word must match a word of the product exactly or as a prefix.
+        """
+        tokens = list(dict.fromkeys(TOKEN.findall(normalize(query))))
+        if not tokens:
+            return [], 0
+        scores: dict[int, float] | None = None
+        for token in sorted(tokens, key=len, reverse=True):
+            matches = self._expand(token)
+            if scores is None:
+                scores = matches
+            else:
+                scores = {product_id: score + matches[product_id] for product_id, score in scores.items() if product_id in matches}
+            if not scores:
+                return [], 0
+        # Only the requested page needs ordering, not every match.
+        top = heapq.nlargest(offset + limit, scores.items(), key=lambda item: (item[1], item[0]))
+        return [self.cards[product_id] for product_id, _ in top[offset:]], len(scores)
+
+    async def _fetch(self, supabase: AClient, product_ids: list[int] | None = None) -> tuple[list[dict], dict[int, dict]]:
+        async def fetch_all(table: str, select: str) -> list[dict]:
+            rows, start = [], 0
+            while True:
+                builder = supabase.table(table).select(select)
+                if product_ids is not None:
+                    builder = builder.in_("id", product_ids)
+                response = await builder.order("id").range(start, start + FETCH_CHUNK - 1).execute()
+                rows.extend(response.data)
+                if len(response.data) < FETCH_CHUNK:
+                    return rows
+                start += FETCH_CHUNK
+
+        cards, details = await asyncio.gather(
+            fetch_all("product_cards", ", ".join(CARD_FIELDS)),
+            fetch_all("products", "id, description, category:categories(name)"),
+        )
+        return cards, {row["id"]: row for row in details}
+
+    def _index_rows(self, cards: list[dict], details: dict[int, dict], keep_sorted: bool = True) -> None:
+        for card in cards:
+            detail = details.get(card["id"], {})
+            category = detail.get("category") or {}
+            self.add(card, detail.get("description"), category.get("name"), keep_sorted)
+
+    @classmethod
+    def _build(cls, cards: list[dict], details: dict[int, dict]) -> "ProductSearchIndex":
+        index = cls()
+        index._index_rows(cards, details, keep_sorted=False)
+        # Sorting the vocabulary once is far cheaper than inserting term by term.
+        index._vocabulary = sorted(index._postings)
+        return index
+
+    async def _rebuild(self, supabase: AClient) -> None:
+        self._full_rebuild = False
+        self._dirty.clear()
+        self._expires_at = time.monotonic() + settings.SEARCH_INDEX_TTL_SECONDS
+        cards, details = await self._fetch(supabase)
+        # A full build takes seconds on a large catalog, so it runs in a
+        # worker thread; searches use the old index until it is swapped in.
+        built = await asyncio.to_thread(self._build, cards, details)
+        self._postings, self._vocabulary = built._postings, built._vocabulary
+        self._documents, self.cards = built._documents, built.cards
+        self._built = True
+
+    async def _refresh_expired(self, supabase: AClient) -> None:
+        try:
+            async with self._lock:
+                await self._rebuild(supabase)
+        except Exception as e:
+            logger.warning("search_index_refresh_failed", error=str(e))
+
+    async def ensure_current(self, supabase: AClient) -> None:
+        if self._built and not self._full_rebuild and not self._dirty:
+            if time.monotonic() >= self._expires_at and (self._refresh is None or self._refresh.done()):
+                # The current index keeps serving while the refresh runs; a
+                # fresh context keeps its calls out of this request's metrics.
+                self._refresh = asyncio.create_task(self._refresh_expired(supabase), context=contextvars.Context())
+            return
+        async with self._lock:
+            if not self._built or self._full_rebuild:
+                await self._rebuild(supabase)
+            elif self._dirty:
+                product_ids = sorted(self._dirty)
+                self._dirty.clear()
+                cards, details = await self._fetch(supabase, product_ids)
+                for product_id in product_ids:
+                    self._remove(product_id)
+                self._index_rows(cards, details)
+
+
+search_index = ProductSearchIndex()
+catalog_change_hooks.append(search_index.mark_dirty)
@@ -1,5 +1,11 @@
-from supabase import Client
-from fastapi import Depends, HTTPException, status
+import base64
+import hashlib
+import json
+import secrets
+from typing import Callable
+from supabase import AClient
+from postgrest.exceptions import APIError
+from fastapi import Depends, Header, HTTPException, Query, status
 from jose import jwt, JWTError
 from datetime import datetime, timedelta, timezone
 from fastapi.security import OAuth2PasswordBearer
@@ -7,6 +13,13 @@ from fastapi.security import OAuth2PasswordBearer
 from . import schemas
 from .config import settings
 from .supabase_client import get_supabase_client
+from .search import search_index
+from .store_config import store_config
+from .cache import (
+    catalog_cache, PRODUCTS_KEY, CATEGORIES_KEY, product_key, product_page_key, category_key,
+    translation_bundle_key, invalidate_product, invalidate_category, invalidate_category_list,
+    invalidate_translations,
+)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/login")
 
@@ -35,346 +48,669 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
-def get_categories(supabase: Client = Depends(get_supabase_client)) -> list[schemas.Category]:
-    response = supabase.table("categories").select("*").execute()
-    return response.data
+def get_operator(authorization: str | None = Header(None)):
+    """
+    Guards the health and metrics internals: accepts the METRICS_TOKEN
+    bearer token or an admin access token, unless OPS_ENDPOINTS_PUBLIC is set.
+    """
+    if settings.OPS_ENDPOINTS_PUBLIC:
+        return None
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        if settings.METRICS_TOKEN and secrets.compare_digest(token, settings.METRICS_TOKEN):
+            return {"metrics_token": True}
+        try:
+            email = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]).get("sub")
+        except JWTError:
+            email = None
+        if email is not None:
+            return {"email": email}
+    raise HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
 
-def get_category(category_id: int, supabase: Client = Depends(get_supabase_client)) -> schemas.Category | None:
-    response = supabase.table("categories").select("*").eq("id", category_id).execute()
-    return response.data[0] if response.data else None
+ORDER_FEED_SCOPE = "order_feed"
+
+def create_order_feed_token() -> str:
+    """
+    A short-lived token that opens the order change stream and nothing else:
+    EventSource cannot send an Authorization header, so it goes in the URL.
+    It has no subject, so get_current_admin_user rejects it.
+    """
+    return create_access_token(
+        {"scope": ORDER_FEED_SCOPE},
+        timedelta(seconds=settings.ORDER_FEED_TOKEN_EXPIRE_SECONDS),
+    )
+
+def get_order_feed_subscriber(token: str | None = Query(None)):
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]) if token else {}
+    except JWTError:
+        payload = {}
+    if payload.get("scope") != ORDER_FEED_SCOPE:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials")
+    return payload
+
+async def get_categories(supabase: AClient = Depends(get_supabase_client)) -> list[schemas.Category]:
+    async def load():
+        response = await supabase.table("categories").select("*").execute()
+        return response.data
+    return await catalog_cache.get_or_load(CATEGORIES_KEY, load)
+
+async def get_category(category_id: int, supabase: AClient = Depends(get_supabase_client)) -> schemas.Category | None:
+    async def load():
+        response = await supabase.table("categories").select("*").eq("id", category_id).execute()
+        return response.data[0] if response.data else None
+    return await catalog_cache.get_or_load(category_key(category_id), load)
 
-def create_category(category: schemas.CategoryCreate, supabase: Client = Depends(get_supabase_client)) -> schemas.Category:
-    response = supabase.table("categories").insert(category.model_dump()).execute()
+async def create_category(category: schemas.CategoryCreate, supabase: AClient = Depends(get_supabase_client)) -> schemas.Category:
+    response = await supabase.table("categories").insert(category.model_dump()).execute()
+    invalidate_category_list()
     return response.data[0]
 
-def update_category(category_id: int, category: schemas.CategoryCreate, supabase: Client = Depends(get_supabase_client)) -> schemas.Category | None:
-    response = supabase.table("categories").update(category.model_dump()).eq("id", category_id).execute()
+async def update_category(category_id: int, category: schemas.CategoryCreate, supabase: AClient = Depends(get_supabase_client)) -> schemas.Category | None:
+    response = await supabase.table("categories").update(category.model_dump()).eq("id", category_id).execute()
+    invalidate_category(category_id)
     return response.data[0] if response.data else None
 
-def delete_category(category_id: int, supabase: Client = Depends(get_supabase_client)) -> bool:
-    response = supabase.table("categories").delete().eq("id", category_id).execute()
+async def delete_category(category_id: int, supabase: AClient = Depends(get_supabase_client)) -> bool:
+    response = await supabase.table("categories").delete().eq("id", category_id).execute()
+    invalidate_category(category_id)
     return bool(response.data)
 
-def get_products(supabase: Client = Depends(get_supabase_client)) -> list[schemas.Product]:
-    response = supabase.table("products").select("*, category:categories(*), product_images(*), product_variants(*)").execute()
-    
-    products = response.data
-    for product in products:
-        if product.get('product_images'):
-            product['product_images'].sort(key=lambda img: img.get('created_at', ''))
-            product['images'] = [img['image_url'] for img in product['product_images']]
-            primary_img = next((img for img in product['product_images'] if img.get('is_primary')), None)
-            if primary_img:
-                product['primary_image_url'] = primary_img['image_url']
-            elif product['product_images']:
-                product['primary_image_url'] = product['product_images'][0]['image_url']
-            else:
-                product['primary_image_url'] = None
-        else:
-            product['images'] = []
-            product['primary_image_url'] = None
-    
-    return products
+PRODUCT_SELECT = "*, category:categories(*), product_images(*), product_variants(*)"
+PRODUCT_CARD_SELECT = "id, name, price, category_id, primary_image_url, in_stock, primary_image_renditions, primary_image_placeholder"
 
-def get_product(product_id: int, supabase: Client = Depends(get_supabase_client)) -> schemas.Product | None:
-    response = supabase.table("products").select("*, category:categories(*), product_images(*), product_variants(*)").eq("id", product_id).execute()
-    if not response.data:
-        return None
-    
-    product = response.data[0]
-    
+PRODUCT_SORT_COLUMNS = {
+    schemas.ProductSort.newest: ("id", True),
+    schemas.ProductSort.oldest: ("id", False),
+    schemas.ProductSort.price_asc: ("price", False),
+    schemas.ProductSort.price_desc: ("price", True),
+    schemas.ProductSort.name_asc: ("name", False),
+    schemas.ProductSort.name_desc: ("name", True),
+}
+
+def _shape_product(product: dict) -> dict:
     if product.get('product_images'):
         product['product_images'].sort(key=lambda img: img.get('created_at', ''))
         product['images'] = [img['image_url'] for img in product['product_images']]
         primary_img = next((img for img in product['product_images'] if img.get('is_primary')), None)
         if primary_img:
             product['primary_image_url'] = primary_img['image_url']
-        elif product['product_images']:
-            product['primary_image_url'] = product['product_images'][0]['image_url']
         else:
-            product['primary_image_url'] = None
+            product['primary_image_url'] = product['product_images'][0]['image_url']
     else:
         product['images'] = []
         product['primary_image_url'] = None
-    
     return product
 
-def create_product(product: schemas.ProductCreate, supabase: Client = Depends(get_supabase_client)) -> schemas.Product:
-    insert_response = supabase.table("products").insert(product.model_dump()).execute()
+def _encode_cursor(value, row_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([value, row_id]).encode()).decode().rstrip("=")
+
+def _decode_cursor(cursor: str) -> tuple:
+    try:
+        value, row_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return value, int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+def _filter_value(value) -> str:
+    if isinstance(value, str):
+        return '"' + value.replace('\\', '\\\\').replace('"', '\\"') + '"'
+    return str(value)
+
+async def _fetch_product_page(source: str, select: str, query: schemas.ProductListQuery, page_size: int, supabase: AClient) -> tuple[list[dict], int | None, str | None]:
+    """
+    Runs one listing query against `source` (the products table or the
+    product_cards view) with filters, sorting and pagination applied by
+    PostgREST. Returns the rows, the total row count (offset mode only) and
+    the cursor of the next page, if any.
+    """
+    column, descending = PRODUCT_SORT_COLUMNS[query.sort]
+    limit = query.limit or page_size
+    builder = supabase.table(source).select(select, count=None if query.cursor else "exact")
+    if query.category_id is not None:
+        builder = builder.eq("category_id", query.category_id)
+    if query.min_price is not None:
+        builder = builder.gte("price", query.min_price)
+    if query.max_price is not None:
+        builder = builder.lte("price", query.max_price)
+    if query.in_stock is not None:
+        if source == "product_cards":
+            builder = builder.eq("in_stock", query.in_stock)
+        elif query.in_stock:
+            builder = builder.gt("stock_quantity", 0)
+        else:
+            builder = builder.or_("stock_quantity.is.null,stock_quantity.lte.0")
+    if query.q:
+        builder = builder.ilike("name", f"*{query.q}*")
+    if query.has_orders is not None:
+        # A computed column of products (see db.sql), not of product_cards.
+        builder = builder.eq("has_orders", query.has_orders)
+    return await _execute_page(builder, column, descending, query.cursor, query.offset, limit)
+
+async def _execute_page(builder, column: str, descending: bool, cursor: str | None, offset: int, limit: int) -> tuple[list[dict], int | None, str | None]:
+    """
+    Orders a filtered select by `column` (with `id` as tie-breaker) and fetches
+    one page, by keyset after `cursor` or else by `offset`. Returns the rows,
+    the total count if one was requested, and the next page's cursor.
+    """
+    if cursor:
+        last_value, last_id = _decode_cursor(cursor)
+        op = "lt" if descending else "gt"
+        if column == "id":
+            builder = builder.filter("id", op, str(last_id))
+        else:
+            value = _filter_value(last_value)
+            builder = builder.or_(f"{column}.{op}.{value},and({column}.eq.{value},id.{op}.{last_id})")
+    builder = builder.order(column, desc=descending)
+    if column != "id":
+        builder = builder.order("id", desc=descending)
+    # One extra row tells us whether another page follows.
+    if cursor:
+        builder = builder.limit(limit + 1)
+    else:
+        builder = builder.range(offset, offset + limit)
+    response = await builder.execute()
+    rows = response.data[:limit]
+    next_cursor = None
+    if len(response.data) > limit:
+        last = rows[-1]
+        next_cursor = _encode_cursor(last[column], last["id"])
+    return rows, response.count, next_cursor
+
+async def get_products_page(query: schemas.ProductListQuery, page_size: int, supabase: AClient = Depends(get_supabase_client)) -> tuple[list[schemas.Product], int | None, str | None]:
+    async def load():
+        products, total, next_cursor = await _fetch_product_page("products", PRODUCT_SELECT, query, page_size, supabase)
+        for product in products:
+            _shape_product(product)
+        return products, total, next_cursor
+    # Placing or deleting an order can change has_orders without touching the catalog.
+    if query.has_orders is not None:
+        return await load()
+    key = product_page_key(query.model_dump_json(exclude_defaults=True) + f"|{page_size}")
+    return await catalog_cache.get_or_load(key, load)
+
+async def get_product_cards_page(query: schemas.ProductListQuery, page_size: int, supabase: AClient = Depends(get_supabase_client)) -> tuple[list[schemas.ProductCard], int | None, str | None]:
+    """
+    Same listing as get_products_page, but reads the product_cards view, which
+    resolves the primary image and stock flag in SQL and selects only the
+    columns the storefront grid renders.
+    """
+    async def load():
+        return await _fetch_product_page("product_cards", PRODUCT_CARD_SELECT, query, page_size, supabase)
+    key = product_page_key("cards|" + query.model_dump_json(exclude_defaults=True) + f"|{page_size}")
+    return await catalog_cache.get_or_load(key, load)
+
+async def search_products(q: str, limit: int, offset: int = 0, supabase: AClient = Depends(get_supabase_client)) -> tuple[list[schemas.ProductCard], int]:
+    await search_index.ensure_current(supabase)
+    return search_index.search(q, limit=limit, offset=offset)
+
+async def get_products(supabase: AClient = Depends(get_supabase_client)) -> list[schemas.Product]:
+    async def load():
+        response = await supabase.table("products").select(PRODUCT_SELECT).execute()
+        products = response.data
+        for product in products:
+            _shape_product(product)
+        return products
+    return await catalog_cache.get_or_load(PRODUCTS_KEY, load)
+
+async def get_product(product_id: int, supabase: AClient = Depends(get_supabase_client)) -> schemas.Product | None:
+    async def load():
+        response = await supabase.table("products").select(PRODUCT_SELECT).eq("id", product_id).execute()
+        if not response.data:
+            return None
+        return _shape_product(response.data[0])
+    return await catalog_cache.get_or_load(product_key(product_id), load)
+
+async def create_product(product: schemas.ProductCreate, supabase: AClient = Depends(get_supabase_client)) -> schemas.Product:
+    insert_response = await supabase.table("products").insert(product.model_dump()).execute()
     if not insert_response.data:
         raise HTTPException(status_code=500, detail="Failed to create the product.")
     new_product_id = insert_response.data[0]['id']
-    select_response = supabase.table("products").select("*, category:categories(*)").eq("id", new_product_id).execute()
+    invalidate_product(new_product_id)
+    select_response = await supabase.table("products").select("*, category:categories(*)").eq("id", new_product_id).execute()
     if not select_response.data:
         raise HTTPException(status_code=404, detail="Newly created product not found.")
     return select_response.data[0]
 
-def update_product(product_id: int, product: schemas.ProductUpdate, supabase: Client = Depends(get_supabase_client)) -> schemas.Product | None:
+async def update_product(product_id: int, product: schemas.ProductUpdate, supabase: AClient = Depends(get_supabase_client)) -> schemas.Product | None:
+    try:
+        return await _update_product(product_id, product, supabase)
+    except Exception:
+        # A failure part-way through may already have changed images or variants.
+        invalidate_product(product_id)
+        raise
+
+async def _update_product(product_id: int, product: schemas.ProductUpdate, supabase: AClient) -> schemas.Product | None:
+    """
+    Applies the whole edit through the `update_product_bulk` database function:
+    one round trip that diffs variants and images in a single transaction and
+    returns the refreshed product. Files of removed images are deleted by the
+    job queue.
+    """
     product_data = product.model_dump(exclude_unset=True)
-
-    if "product_images" in product_data:
-        images_data = product_data.pop("product_images")
-        image_ids_from_request = {img['id'] for img in images_data}
-        response = supabase.table("product_images").select("id, image_url").eq("product_id", product_id).execute()
-        current_images = response.data
-        current_image_ids = {img['id'] for img in current_images}
-        images_to_delete = [img for img in current_images if img['id'] not in image_ids_from_request]
-        if images_to_delete:
-            image_ids_to_delete = [img['id'] for img in images_to_delete]
-            file_paths_to_delete = ["/".join(img['image_url'].split("/")[-2:]) for img in images_to_delete]
-            if file_paths_to_delete:
-                supabase.storage.from_("products").remove(file_paths_to_delete)
-            supabase.table("product_images").delete().in_("id", image_ids_to_delete).execute()
-        primary_image_in_request = next((img for img in images_data if img.get('is_primary')), None)
-        if primary_image_in_request:
-            new_primary_id = primary_image_in_request['id']
-            supabase.table("product_images").update({"is_primary": False}).eq("product_id", product_id).execute()
-            supabase.table("product_images").update({"is_primary": True}).eq("id", new_primary_id).execute()
-        else:
-            remaining_image_ids = {img['id'] for img in images_data}
-            if remaining_image_ids:
-                existing_primary_res = supabase.table("product_images").select("id").eq("product_id", product_id).in_("id", list(remaining_image_ids)).eq("is_primary", True).execute()
-                if not existing_primary_res.data:
-                    oldest_image_res = supabase.table("product_images").select("id").in_("id", list(remaining_image_ids)).order("created_at").limit(1).execute()
-                    if oldest_image_res.data:
-                        new_primary_id = oldest_image_res.data[0]['id']
-                        supabase.table("product_images").update({"is_primary": False}).eq("product_id", product_id).execute()
-                        supabase.table("product_images").update({"is_primary": True}).eq("id", new_primary_id).execute()
-
-    if "product_variants" in product_data:
-        variants_data = product_data.pop("product_variants")
-        response = supabase.table("product_variants").select("id").eq("product_id", product_id).execute()
-        current_variant_ids = {item['id'] for item in response.data}
-        upserted_variant_ids = set()
-        for variant in variants_data:
-            variant_id = variant.get("id")
-            upsert_data = {k: v for k, v in variant.items() if k != 'id'}
-            if variant_id:
-                upserted_variant_ids.add(variant_id)
-                supabase.table("product_variants").update(upsert_data).eq("id", variant_id).execute()
-            else:
-                upsert_data["product_id"] = product_id
-                response = supabase.table("product_variants").insert(upsert_data).execute()
-                if response.data:
-                    upserted_variant_ids.add(response.data[0]['id'])
-        variants_to_delete = current_variant_ids - upserted_variant_ids
-        if variants_to_delete:
-            response = supabase.table("order_items").select("id").in_("product_variant_id", list(variants_to_delete)).execute()
-            if response.data:
-                raise HTTPException(
-                    status_code=status.HTTP_409_CONFLICT,
-                    detail="Cannot delete product variants that are part of an existing order."
-                )
-            supabase.table("product_variants").delete().in_("id", list(variants_to_delete)).execute()
-
-    if product_data:
-        response = supabase.table("products").update(product_data).eq("id", product_id).execute()
-        if not response.data:
-            return None
-    return get_product(product_id=product_id, supabase=supabase)
-
-def delete_product(product_id: int, supabase: Client = Depends(get_supabase_client)) -> bool:
-    response = supabase.table("products").delete().eq("id", product_id).execute()
+    variants_data = product_data.pop("product_variants", None)
+    images_data = product_data.pop("product_images", None)
+    try:
+        response = await supabase.rpc("update_product_bulk", {
+            "p_product_id": product_id,
+            "p_product": product_data,
+            "p_variants": variants_data,
+            "p_images": images_data,
+        }).execute()
+    except APIError as e:
+        if e.code == "PT409":
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=e.message)
+        raise HTTPException(status_code=500, detail=e.message)
+    if not response.data:
+        return None
+    result = response.data[0]
+    invalidate_product(product_id)
+    updated = _shape_product(result["product"])
+    catalog_cache.set(product_key(product_id), updated)
+    return updated
+
+async def delete_product(product_id: int, supabase: AClient = Depends(get_supabase_client)) -> bool:
+    response = await supabase.table("products").delete().eq("id", product_id).execute()
+    invalidate_product(product_id)
     return bool(response.data)
 
-def create_product_image(product_id: int, image_url: str, supabase: Client = Depends(get_supabase_client)) -> schemas.ProductImage:
-    existing_primary_image = supabase.table("product_images").select("id").eq("product_id", product_id).eq("is_primary", True).execute()
+async def create_product_images(product_id: int, images: list[dict], supabase: AClient = Depends(get_supabase_client)) -> list[schemas.ProductImage]:
+    """
+    Inserts stored images (as returned by `images.store_image`) in one
+    request. The first becomes primary if the product has no primary image.
+    """
+    existing_primary_image = await supabase.table("product_images").select("id").eq("product_id", product_id).eq("is_primary", True).execute()
     is_primary = not existing_primary_image.data
-    response = supabase.table("product_images").insert({"product_id": product_id, "image_url": image_url, "is_primary": is_primary}).execute()
-    return response.data[0]
+    rows = []
+    for image in images:
+        rows.append({
+            "product_id": product_id,
+            "image_url": image["image_url"],
+            "is_primary": is_primary,
+            "renditions": image.get("renditions") or [],
+            "placeholder": image.get("placeholder"),
+            "width": image.get("width"),
+            "height": image.get("height"),
+        })
+        is_primary = False
+    response = await supabase.table("product_images").insert(rows).execute()
+    invalidate_product(product_id)
+    return response.data
 
-def delete_product_image(image_id: int, supabase: Client = Depends(get_supabase_client)) -> bool:
-    image_response = supabase.table("product_images").select("image_url, product_id, is_primary").eq("id", image_id).execute()
-    if not image_response.data:
+async def create_product_image(
+    product_id: int,
+    image_url: str,
+    renditions: list[dict] | None = None,
+    placeholder: str | None = None,
+    width: int | None = None,
+    height: int | None = None,
+    supabase: AClient = Depends(get_supabase_client),
+) -> schemas.ProductImage:
+    image = {"image_url": image_url, "renditions": renditions, "placeholder": placeholder, "width": width, "height": height}
+    return (await create_product_images(product_id=product_id, images=[image], supabase=supabase))[0]
+
+async def delete_product_image(image_id: int, supabase: AClient = Depends(get_supabase_client)) -> bool:
+    # A trigger queues the image's files for removal from storage.
+    response = await supabase.table("product_images").delete().eq("id", image_id).execute()
+    if not response.data:
         return False
-    image_data = image_response.data[0]
-    image_url = image_data["image_url"]
-    product_id = image_data["product_id"]
-    was_primary = image_data["is_primary"]
-    file_path = "/".join(image_url.split("/")[-2:])
-    supabase.storage.from_("products").remove([file_path])
-    response = supabase.table("product_images").delete().eq("id", image_id).execute()
-    return bool(response.data)
+    invalidate_product(response.data[0]["product_id"])
+    return True
 
-def set_primary_image(image_id: int, supabase: Client = Depends(get_supabase_client)) -> schemas.ProductImage | None:
-    image_response = supabase.table("product_images").select("product_id").eq("id", image_id).execute()
+async def set_primary_image(image_id: int, supabase: AClient = Depends(get_supabase_client)) -> schemas.ProductImage | None:
+    image_response = await supabase.table("product_images").select("product_id").eq("id", image_id).execute()
     if not image_response.data:
         return None
     product_id = image_response.data[0]["product_id"]
-    supabase.table("product_images").update({"is_primary": False}).eq("product_id", product_id).execute()
-    response = supabase.table("product_images").update({"is_primary": True}).eq("id", image_id).execute()
+    await supabase.table("product_images").update({"is_primary": False}).eq("product_id", product_id).execute()
+    response = await supabase.table("product_images").update({"is_primary": True}).eq("id", image_id).execute()
+    invalidate_product(product_id)
     return response.data[0] if response.data else None
 
-def create_product_variant(product_id: int, variant: schemas.ProductVariantCreate, supabase: Client = Depends(get_supabase_client)) -> schemas.ProductVariant:
-    response = supabase.table("product_variants").insert({"product_id": product_id, **variant.model_dump()}).execute()
+async def create_product_variant(product_id: int, variant: schemas.ProductVariantCreate, supabase: AClient = Depends(get_supabase_client)) -> schemas.ProductVariant:
+    response = await supabase.table("product_variants").insert({"product_id": product_id, **variant.model_dump()}).execute()
+    invalidate_product(product_id)
     return response.data[0]
 
-def update_product_variant(variant_id: int, variant: schemas.ProductVariantUpdate, supabase: Client = Depends(get_supabase_client)) -> schemas.ProductVariant | None:
-    response = supabase.table("product_variants").update(variant.model_dump(exclude_unset=True)).eq("id", variant_id).execute()
+async def update_product_variant(variant_id: int, variant: schemas.ProductVariantUpdate, supabase: AClient = Depends(get_supabase_client)) -> schemas.ProductVariant | None:
+    response = await supabase.table("product_variants").update(variant.model_dump(exclude_unset=True)).eq("id", variant_id).execute()
+    if response.data:
+        invalidate_product(response.data[0]["product_id"])
     return response.data[0] if response.data else None
 
-def delete_product_variant(variant_id: int, supabase: Client = Depends(get_supabase_client)) -> bool:
-    response = supabase.table("product_variants").delete().eq("id", variant_id).execute()
+async def delete_product_variant(variant_id: int, supabase: AClient = Depends(get_supabase_client)) -> bool:
+    response = await supabase.table("product_variants").delete().eq("id", variant_id).execute()
+    if response.data:
+        invalidate_product(response.data[0]["product_id"])
     return bool(response.data)
 
-def update_product_variant_image(variant_id: int, image_url: str, supabase: Client = Depends(get_supabase_client)) -> schemas.ProductVariant | None:
-    response = supabase.table("product_variants").update({"image_url": image_url}).eq("id", variant_id).execute()
+async def update_product_variant_image(
+    variant_id: int,
+    image_url: str,
+    renditions: list[dict] | None = None,
+    placeholder: str | None = None,
+    supabase: AClient = Depends(get_supabase_client),
+) -> schemas.ProductVariant | None:
+    response = await supabase.table("product_variants").update({
+        "image_url": image_url,
+        "image_renditions": renditions or [],
+        "image_placeholder": placeholder,
+    }).eq("id", variant_id).execute()
+    if response.data:
+        invalidate_product(response.data[0]["product_id"])
     return response.data[0] if response.data else None
 
-def create_public_order(order: schemas.PublicOrderCreate, supabase: Client = Depends(get_supabase_client)) -> schemas.Order:
-    try:
-        customer_data = order.customer.model_dump()
-        customer_response = supabase.table("customers").upsert(customer_data, on_conflict="phone_number").execute()
-        if not customer_response.data:
-            raise HTTPException(status_code=500, detail="Failed to create or update customer.")
-        customer_id = customer_response.data[0]['id']
-        order_data = order.model_dump(exclude={"order_items", "customer"})
-        order_data["customer_id"] = customer_id
-        if order.shipping_method == 'delivery' and order.delivery_area_id:
-            delivery_area_response = supabase.table("delivery_areas").select("price").eq("id", order.delivery_area_id).execute()
-            if delivery_area_response.data:
-                order_data["delivery_fee"] = delivery_area_response.data[0]["price"]
-            else:
-                raise HTTPException(status_code=400, detail=f"Invalid delivery_area_id: {order.delivery_area_id}")
-        else:
-            order_data["delivery_fee"] = 0
-        order_response = supabase.table("orders").insert(order_data).execute()
-        if not order_response.data:
-            raise HTTPException(status_code=500, detail=f"Failed to create order: {str(order_response)}")
-        new_order = order_response.data[0]
-        order_items_data = []
-        for item in order.order_items:
-            item_data = item.model_dump()
-            if "price" in item_data:
-                del item_data["price"]
-            if item_data.get("product_variant_id"):
-                item_data["product_id"] = None
-            order_items_data.append({"order_id": new_order['id'], **item_data})
-        if order_items_data:
-            items_response = supabase.table("order_items").insert(order_items_data).execute()
-            if not items_response.data:
-                supabase.table("orders").delete().eq("id", new_order['id']).execute()
-                raise HTTPException(status_code=500, detail="Failed to create order items.")
-        return get_order(new_order['id'], supabase)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-def create_order(order: schemas.OrderCreate, supabase: Client = Depends(get_supabase_client)) -> schemas.Order:
+def _raise_order_error(error: APIError):
+    """
+    Maps errors raised inside the order functions to HTTP errors: stock
+    conflicts (SQLSTATE PT409) to 409, and other RAISE EXCEPTIONs and
+    unknown products or variants (foreign key violations) to 400.
+    """
+    if error.code == "PT409":
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=error.message)
+    if error.code in ("P0001", "23503"):
+        raise HTTPException(status_code=400, detail=error.message)
+    raise HTTPException(status_code=500, detail=error.message)
+
+async def _invalidate_order_stock(order_items: list[dict], supabase: AClient) -> None:
+    """
+    Drops cached products whose stock moved with these order items.
+    """
+    product_ids = set()
+    variant_ids = []
+    for item in order_items:
+        variant = item.get("product_variant") or {}
+        if item.get("product_id") or variant.get("product_id"):
+            product_ids.add(item.get("product_id") or variant["product_id"])
+        elif item.get("product_variant_id"):
+            variant_ids.append(item["product_variant_id"])
+    if variant_ids:
+        response = await supabase.table("product_variants").select("product_id").in_("id", variant_ids).execute()
+        product_ids.update(row["product_id"] for row in response.data)
+    for product_id in product_ids:
+        invalidate_product(product_id)
+
+def _order_items_payload(order_items: list[schemas.OrderItemCreate]) -> list[dict]:
+    items = []
+    for item in order_items:
+        item_data = item.model_dump()
+        if item_data.get("product_variant_id"):
+            item_data["product_id"] = None
+        items.append(item_data)
+    return items
+
+async def _place_order(params: dict, supabase: AClient) -> dict:
+    """
+    Calls the `place_order` database function, which writes the customer,
+    order and items in one transaction and returns the compact order.
+    """
     try:
-        customer_data = order.customer.model_dump()
-        customer_response = supabase.table("customers").upsert(customer_data, on_conflict="phone_number").execute()
-        if not customer_response.data:
-            raise HTTPException(status_code=500, detail="Failed to create or update customer.")
-        customer_id = customer_response.data[0]['id']
-        order_data = order.model_dump(exclude={"order_items", "customer"})
-        order_data["customer_id"] = customer_id
-        order_response = supabase.table("orders").insert(order_data).execute()
-        if not order_response.data:
-            raise HTTPException(status_code=500, detail=f"Failed to create order: {str(order_response)}")
-        new_order = order_response.data[0]
-        order_items_data = []
-        for item in order.order_items:
-            item_data = item.model_dump()
-            if "price" in item_data:
-                del item_data["price"]
-            if item_data.get("product_variant_id"):
-                item_data["product_id"] = None
-            order_items_data.append({"order_id": new_order['id'], **item_data})
-        if order_items_data:
-            items_response = supabase.table("order_items").insert(order_items_data).execute()
-            if not items_response.data:
-                supabase.table("orders").delete().eq("id", new_order['id']).execute()
-                raise HTTPException(status_code=500, detail="Failed to create order items.")
-        return get_order(new_order['id'], supabase)
+        response = await supabase.rpc("place_order", params).execute()
+    except APIError as e:
+        _raise_order_error(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    if not response.data:
+        raise HTTPException(status_code=500, detail="Failed to create order.")
+    new_order = response.data[0]
+    _notify_order_change()
+    await _invalidate_order_stock(new_order["order_items"], supabase)
+    return new_order
+
+async def create_public_order(order: schemas.PublicOrderCreate, supabase: AClient = Depends(get_supabase_client)) -> schemas.Order:
+    """
+    Prices delivery from the in-memory store config; `place_order` waives the
+    fee when the items reach the free delivery threshold.
+    """
+    config = await store_config.load(supabase)
+    delivery_fee = 0.0
+    if order.shipping_method == schemas.ShippingMethod.delivery and order.delivery_area_id:
+        area = await store_config.delivery_area(order.delivery_area_id, supabase)
+        if area is None:
+            raise HTTPException(status_code=400, detail=f"Invalid delivery_area_id: {order.delivery_area_id}")
+        delivery_fee = area["price"]
+    return await _place_order({
+        "p_order": {**order.model_dump(mode="json", exclude={"order_items", "customer"}), "delivery_fee": delivery_fee},
+        "p_items": _order_items_payload(order.order_items),
+        "p_customer": order.customer.model_dump(mode="json"),
+        "p_free_delivery_threshold": config.app_settings.free_delivery_threshold,
+    }, supabase)
+
+async def create_order(order: schemas.OrderCreate, supabase: AClient = Depends(get_supabase_client)) -> schemas.Order:
+    new_order = await _place_order({
+        "p_order": order.model_dump(mode="json", exclude={"order_items"}),
+        "p_items": _order_items_payload(order.order_items),
+    }, supabase)
+    # The admin UI shows product details on the created order.
+    return await get_order(new_order["id"], supabase)
+
+ORDER_SELECT = "*, customer:customers(*), delivery_area:delivery_areas(*), order_items(*, product:products(*, product_images(*)), product_variant:product_variants(*, product:products(*, product_images(*))))"
+# Enough to list and total orders; images are left to the order detail view.
+ORDER_SUMMARY_SELECT = (
+    "*, customer:customers(*), delivery_area:delivery_areas(*), "
+    "order_items(id, order_id, product_id, product_variant_id, quantity, "
+    "product:products(id, name, price), "
+    "product_variant:product_variants(id, product_id, name, price, stock_quantity, image_url, product:products(id, name, price)))"
+)
+
+ORDER_SORT_COLUMNS = {
+    schemas.OrderSort.newest: ("id", True),
+    schemas.OrderSort.oldest: ("id", False),
+}
+
+async def get_orders_page(query: schemas.OrderListQuery, page_size: int, supabase: AClient = Depends(get_supabase_client)) -> tuple[list[schemas.Order], int | None, str | None]:
+    """
+    One page of orders with the summary embed, filtered and sorted by PostgREST.
+
+    `q` is an order id if it is a number and otherwise part of the customer's
+    name. `product_id` matches orders with an item of the product or of one
+    of its variants, through a second, inner-joined order_items embed so the
+    listed items stay complete.
+    """
+    column, descending = ORDER_SORT_COLUMNS[query.sort]
+    select = ORDER_SUMMARY_SELECT
+    search = (query.q or "").strip()
+    by_name = bool(search) and not search.isdigit()
+    if by_name:
+        select = select.replace("customer:customers(*)", "customer:customers!inner(*)")
+    if query.product_id is not None:
+        select += ", matched_items:order_items!inner(id)"
+    builder = supabase.table("orders").select(select, count=None if query.cursor else "exact")
+    if by_name:
+        builder = builder.ilike("customer.name", f"*{search}*")
+    elif search:
+        builder = builder.eq("id", int(search))
+    if query.product_id is not None:
+        variants = await supabase.table("product_variants").select("id").eq("product_id", query.product_id).execute()
+        matched = f"product_id.eq.{query.product_id}"
+        if variants.data:
+            matched += f",product_variant_id.in.({','.join(str(variant['id']) for variant in variants.data)})"
+        builder = builder.or_(matched, reference_table="matched_items")
+    if query.status:
+        builder = builder.in_("status", [order_status.value for order_status in query.status])
+    if query.shipping_method is not None:
+        builder = builder.eq("shipping_method", query.shipping_method.value)
+    if query.customer_id is not None:
+        builder = builder.eq("customer_id", query.customer_id)
+    if query.delivery_area_id is not None:
+        builder = builder.eq("delivery_area_id", query.delivery_area_id)
+    if query.created_from is not None:
+        builder = builder.gte("created_at", query.created_from.isoformat())
+    if query.created_to is not None:
+        builder = builder.lt("created_at", query.created_to.isoformat())
+    orders, total, next_cursor = await _execute_page(builder, column, descending, query.cursor, query.offset, query.limit or page_size)
+    for order in orders:
+        order.pop("matched_items", None)
+    return orders, total, next_cursor
+
+# Callables run after this process writes an order, e.g. to wake the order feed.
+order_change_hooks: list[Callable[[], None]] = []
+
+def _notify_order_change() -> None:
+    for hook in order_change_hooks:
+        hook()
+
+async def get_order_changes(cursor: str | None, limit: int, supabase: AClient = Depends(get_supabase_client)) -> schemas.OrderChanges:
+    """
+    Orders created, updated or deleted after `cursor`, oldest change first.
+
+    Once the feed is caught up, the returned cursor points a few seconds back
+    (ORDER_FEED_OVERLAP_SECONDS) so a write committed late with an earlier
+    updated_at is still picked up; clients apply changes by order id, so the
+    repeats are harmless.
+    """
+    builder = supabase.table("order_changes").select("id, updated_at, deleted")
+    if cursor:
+        last_value, last_id = _decode_cursor(cursor)
+        if last_id == 0:
+            try:
+                since = datetime.fromisoformat(last_value) - timedelta(seconds=settings.ORDER_FEED_OVERLAP_SECONDS)
+            except (TypeError, ValueError):
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+            builder = builder.gte("updated_at", since.isoformat())
+        else:
+            value = _filter_value(last_value)
+            builder = builder.or_(f"updated_at.gt.{value},and(updated_at.eq.{value},id.gt.{last_id})")
+    response = await builder.order("updated_at").order("id").limit(limit + 1).execute()
+    changes = response.data[:limit]
+    has_more = len(response.data) > limit
+    if not changes:
+        return schemas.OrderChanges(cursor=cursor)
+    orders = []
+    live_ids = [change["id"] for change in changes if not change["deleted"]]
+    if live_ids:
+        orders_response = await supabase.table("orders").select(ORDER_SUMMARY_SELECT).in_("id", live_ids).order("updated_at").order("id").execute()
+        orders = orders_response.data
+    last = changes[-1]
+    return schemas.OrderChanges(
+        orders=orders,
+        deleted=[change["id"] for change in changes if change["deleted"]],
+        cursor=_encode_cursor(last["updated_at"], last["id"] if has_more else 0),
+        has_more=has_more,
+    )
 
-def get_orders(supabase: Client = Depends(get_supabase_client)) -> list[schemas.Order]:
+async def get_orders(supabase: AClient = Depends(get_supabase_client)) -> list[schemas.Order]:
     try:
-        response = supabase.table("orders").select("*, customer:customers(*), delivery_area:delivery_areas(*), order_items(*, product:products(*, product_images(*)), product_variant:product_variants(*, product:products(*, product_images(*))))").execute()
+        response = await supabase.table("orders").select(ORDER_SELECT).execute()
         return response.data
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-def get_order(order_id: int, supabase: Client = Depends(get_supabase_client)) -> schemas.Order | None:
+async def get_order(order_id: int, supabase: AClient = Depends(get_supabase_client)) -> schemas.Order | None:
     try:
-        response = supabase.table("orders").select("*, customer:customers(*), delivery_area:delivery_areas(*), order_items(*, product:products(*, product_images(*)), product_variant:product_variants(*, product:products(*, product_images(*))))").eq("id", order_id).execute()
+        response = await supabase.table("orders").select(ORDER_SELECT).eq("id", order_id).execute()
         return response.data[0] if response.data else None
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-def update_order(order_id: int, order: schemas.OrderUpdate, supabase: Client = Depends(get_supabase_client)) -> schemas.Order | None:
+async def update_order(order_id: int, order: schemas.OrderUpdate, supabase: AClient = Depends(get_supabase_client)) -> schemas.Order | None:
     try:
         order_data = order.model_dump(exclude_unset=True, exclude={"order_items"})
         if order_data:
-            response = supabase.table("orders").update(order_data).eq("id", order_id).execute()
+            response = await supabase.table("orders").update(order_data).eq("id", order_id).execute()
             if not response.data:
                 return None
         if order.order_items is not None:
-            supabase.table("order_items").delete().eq("order_id", order_id).execute()
-            order_items_data = []
-            for item in order.order_items:
-                item_data = item.model_dump()
-                if "price" in item_data:
-                    del item_data["price"]
-                if item_data.get("product_variant_id"):
-                    item_data["product_id"] = None
-                order_items_data.append({"order_id": order_id, **item_data})
-            if order_items_data:
-                items_response = supabase.table("order_items").insert(order_items_data).execute()
-                if not items_response.data:
-                    raise HTTPException(status_code=500, detail="Failed to update order items.")
-        return get_order(order_id, supabase)
+            # Old and new items are swapped in one transaction so a stock
+            # conflict leaves the order as it was.
+            items_response = await supabase.rpc("replace_order_items", {
+                "p_order_id": order_id,
+                "p_items": _order_items_payload(order.order_items),
+            }).execute()
+            for product_id in items_response.data:
+                invalidate_product(product_id)
+        _notify_order_change()
+        updated_order = await get_order(order_id, supabase)
+        if updated_order and "status" in order_data:
+            # Cancelling (or reinstating) an order moves its stock.
+            await _invalidate_order_stock(updated_order["order_items"], supabase)
+        return updated_order
+    except APIError as e:
+        _raise_order_error(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-def delete_order(order_id: int, supabase: Client = Depends(get_supabase_client)) -> bool:
-    supabase.table("order_items").delete().eq("order_id", order_id).execute()
-    response = supabase.table("orders").delete().eq("id", order_id).execute()
+async def delete_order(order_id: int, supabase: AClient = Depends(get_supabase_client)) -> bool:
+    items_response = await supabase.table("order_items").delete().eq("order_id", order_id).execute()
+    response = await supabase.table("orders").delete().eq("id", order_id).execute()
+    _notify_order_change()
+    await _invalidate_order_stock(items_response.data, supabase)
     return bool(response.data)
 
-def get_delivery_areas(supabase: Client = Depends(get_supabase_client)) -> list[schemas.DeliveryArea]:
-    response = supabase.table("delivery_areas").select("*").execute()
-    return response.data
+async def get_delivery_areas(supabase: AClient = Depends(get_supabase_client)) -> list[schemas.DeliveryArea]:
+    config = await store_config.load(supabase)
+    return config.delivery_areas
 
-def create_delivery_area(delivery_area: schemas.DeliveryAreaCreate, supabase: Client = Depends(get_supabase_client)) -> schemas.DeliveryArea:
-    response = supabase.table("delivery_areas").insert(delivery_area.model_dump()).execute()
+async def create_delivery_area(delivery_area: schemas.DeliveryAreaCreate, supabase: AClient = Depends(get_supabase_client)) -> schemas.DeliveryArea:
+    response = await supabase.table("delivery_areas").insert(delivery_area.model_dump()).execute()
+    await store_config.changed(supabase)
     return response.data[0]
 
-def update_delivery_area(delivery_area_id: int, delivery_area: schemas.DeliveryAreaCreate, supabase: Client = Depends(get_supabase_client)) -> schemas.DeliveryArea | None:
-    response = supabase.table("delivery_areas").update(delivery_area.model_dump()).eq("id", delivery_area_id).execute()
+async def update_delivery_area(delivery_area_id: int, delivery_area: schemas.DeliveryAreaCreate, supabase: AClient = Depends(get_supabase_client)) -> schemas.DeliveryArea | None:
+    response = await supabase.table("delivery_areas").update(delivery_area.model_dump()).eq("id", delivery_area_id).execute()
+    await store_config.changed(supabase)
     return response.data[0] if response.data else None
 
-def delete_delivery_area(delivery_area_id: int, supabase: Client = Depends(get_supabase_client)) -> bool:
-    response = supabase.table("delivery_areas").delete().eq("id", delivery_area_id).execute()
+async def delete_delivery_area(delivery_area_id: int, supabase: AClient = Depends(get_supabase_client)) -> bool:
+    response = await supabase.table("delivery_areas").delete().eq("id", delivery_area_id).execute()
+    await store_config.changed(supabase)
     return bool(response.data)
 
-def get_app_settings(supabase: Client = Depends(get_supabase_client)) -> schemas.AppSettings:
-    response = supabase.table("app_settings").select("*").execute()
-    settings_dict = {item['key']: item['value'] for item in response.data}
-    free_delivery_threshold_str = settings_dict.get('free_delivery_threshold')
-    free_delivery_threshold = float(free_delivery_threshold_str) if free_delivery_threshold_str else 0.0
-    return schemas.AppSettings(
-        free_delivery_threshold=free_delivery_threshold,
-        delivery_message=settings_dict.get('delivery_message', ''),
-        pickup_message=settings_dict.get('pickup_message', '')
-    )
+async def get_app_settings(supabase: AClient = Depends(get_supabase_client)) -> schemas.AppSettings:
+    config = await store_config.load(supabase)
+    return config.app_settings
 
-def update_app_settings(settings_data: schemas.AppSettings, supabase: Client = Depends(get_supabase_client)) -> schemas.AppSettings:
+async def update_app_settings(settings_data: schemas.AppSettings, supabase: AClient = Depends(get_supabase_client)) -> schemas.AppSettings:
     settings_to_update = settings_data.model_dump(exclude_unset=True)
-    for key, value in settings_to_update.items():
-        if value is not None:
-            supabase.table("app_settings").upsert({"key": key, "value": str(value)}).execute()
-    return get_app_settings(supabase)
-
-def get_all_translations(supabase: Client = Depends(get_supabase_client)) -> list[schemas.Translation]:
-    response = supabase.table("translations").select("*").execute()
+    rows = [{"key": key, "value": str(value)} for key, value in settings_to_update.items() if value is not None]
+    if rows:
+        await supabase.table("app_settings").upsert(rows).execute()
+    await store_config.changed(supabase)
+    return store_config.app_settings
+
+async def get_all_translations(supabase: AClient = Depends(get_supabase_client)) -> list[schemas.Translation]:
+    response = await supabase.table("translations").select("*").execute()
     return response.data
 
-def update_translation(translation_id: int, translation: schemas.TranslationUpdate, supabase: Client = Depends(get_supabase_client)) -> schemas.Translation | None:
-    response = supabase.table("translations").update(translation.model_dump()).eq("id", translation_id).execute()
+def _translation_namespace(key: str) -> str:
+    return key.split(".", 1)[0]
+
+def _compile_bundle(translations: dict[str, str]) -> dict:
+    """
+    A bundle with its version: a hash of its content, so a bundle fetched by
+    version never changes.
+    """
+    content = json.dumps(translations, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return {"version": hashlib.sha256(content.encode()).hexdigest()[:16], "translations": translations}
+
+async def _load_translation_bundle(namespaces: list[str], supabase: AClient) -> dict:
+    if namespaces:
+        full = await catalog_cache.get_or_load(translation_bundle_key([]), lambda: _load_translation_bundle([], supabase))
+        wanted = set(namespaces)
+        return _compile_bundle({key: value for key, value in full["translations"].items() if _translation_namespace(key) in wanted})
+    response = await supabase.table("translations").select("key, value").execute()
+    return _compile_bundle({row["key"]: row["value"] for row in response.data})
+
+async def get_translation_bundle(namespaces: list[str] | None = None, supabase: AClient = Depends(get_supabase_client)) -> schemas.TranslationBundle:
+    """
+    The translations as one flat key -> value dict, optionally only the keys
+    in the given namespaces (the part of the key before the first dot).
+    Bundles are compiled once and cached until a translation changes.
+    """
+    namespaces = sorted(set(namespaces or []))
+    key = translation_bundle_key(namespaces)
+    return await catalog_cache.get_or_load(key, lambda: _load_translation_bundle(namespaces, supabase))
+
+async def update_translation(translation_id: int, translation: schemas.TranslationUpdate, supabase: AClient = Depends(get_supabase_client)) -> schemas.Translation | None:
+    response = await supabase.table("translations").update(translation.model_dump()).eq("id", translation_id).execute()
+    invalidate_translations()
     return response.data[0] if response.data else None
 
-def create_translation(translation: schemas.TranslationCreate, supabase: Client = Depends(get_supabase_client)) -> schemas.Translation:
-    response = supabase.table("translations").insert(translation.model_dump()).execute()
+async def create_translation(translation: schemas.TranslationCreate, supabase: AClient = Depends(get_supabase_client)) -> schemas.Translation:
+    response = await supabase.table("translations").insert(translation.model_dump()).execute()
+    invalidate_translations()
     return response.data[0]
@@ -0,0 +1,106 @@
+import asyncio
+
+import structlog
+from supabase import AClient
+
+from . import schemas
+from .cache import publish_invalidation
+from .config import settings
+from .supabase_client import get_supabase_client
+
+logger = structlog.get_logger(__name__)
+
+
+def _app_settings(rows: list[dict]) -> schemas.AppSettings:
+    settings_dict = {item['key']: item['value'] for item in rows}
+    free_delivery_threshold_str = settings_dict.get('free_delivery_threshold')
+    free_delivery_threshold = float(free_delivery_threshold_str) if free_delivery_threshold_str else 0.0
+    return schemas.AppSettings(
+        free_delivery_threshold=free_delivery_threshold,
+        delivery_message=settings_dict.get('delivery_message', ''),
+        pickup_message=settings_dict.get('pickup_message', '')
+    )
+
+
+class StoreConfig:
+    """
+    In-process snapshot of the app settings and delivery areas, so reading
+    them (including pricing delivery at checkout) costs no round trip. It is
+    loaded in one `get_store_config` call at startup, reloaded right after
+    this process changes either table (and in other processes through
+    cache_sync), and reloaded when the version the database bumps on every
+    change moves, checked every STORE_CONFIG_POLL_SECONDS.
+    """
+
+    def __init__(self):
+        self.version: int | None = None
+        self.app_settings = _app_settings([])
+        self.delivery_areas: list[dict] = []
+        self._areas_by_id: dict[int, dict] = {}
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+
+    async def refresh(self, supabase: AClient) -> None:
+        async with self._lock:
+            response = await supabase.rpc("get_store_config", {}).execute()
+            snapshot = response.data[0]
+            self.app_settings = _app_settings(snapshot["settings"])
+            self.delivery_areas = snapshot["delivery_areas"]
+            self._areas_by_id = {area["id"]: area for area in self.delivery_areas}
+            self.version = snapshot["version"]
+
+    async def changed(self, supabase: AClient) -> None:
+        """
+        Reloads after this process wrote settings or delivery areas, and
+        tells other processes to reload too.
+        """
+        await self.refresh(supabase)
+        publish_invalidation("store_config")
+
+    async def load(self, supabase: AClient) -> "StoreConfig":
+        """
+        The snapshot, loading it first if this process has none yet.
+        """
+        if self.version is None:
+            await self.refresh(supabase)
+        return self
+
+    async def delivery_area(self, area_id: int, supabase: AClient) -> dict | None:
+        """
+        A delivery area by id from the snapshot. An unknown id does not
+        reload it: checkout is public, so that would let anyone force a
+        reload per request. Areas added by another process arrive through
+        cache_sync or the next version poll.
+        """
+        await self.load(supabase)
+        return self._areas_by_id.get(area_id)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._poll())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._task = None
+
+    async def _poll(self) -> None:
+        supabase = await get_supabase_client()
+        while True:
+            try:
+                if self.version is None:
+                    await self.refresh(supabase)
+                else:
+                    response = await supabase.table("store_config_version").select("version").execute()
+                    if response.data and response.data[0]["version"] != self.version:
+                        await self.refresh(supabase)
+            except Exception as e:
+                logger.warning("store_config_refresh_failed", error=str(e))
+            await asyncio.sleep(settings.STORE_CONFIG_POLL_SECONDS)
+
+
+store_config = StoreConfig()
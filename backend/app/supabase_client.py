@@ -1,19 +1,192 @@
+import asyncio
+import math
 import os
-from supabase import create_client, Client, ClientOptions
+import time
+import httpx
+from gotrue import AsyncMemoryStorage
+from supabase import acreate_client, AClient, AClientOptions
 from .config import settings
+from .metrics import observe_upstream
 
-def get_supabase_client() -> Client:
+_client: AClient | None = None
+# Serializes (re)builds so concurrent callers share one client, not one each.
+_client_lock = asyncio.Lock()
+_pool_metrics = {"clients_created": 0, "clients_rebuilt": 0, "checkouts": 0}
+
+def _pool_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=settings.SUPABASE_POOL_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.SUPABASE_POOL_MAX_KEEPALIVE,
+        keepalive_expiry=settings.SUPABASE_POOL_KEEPALIVE_EXPIRY,
+    )
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    def __init__(self, stream: httpx.AsyncByteStream, release):
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self):
+        try:
+            await self._stream.aclose()
+        finally:
+            release, self._release = self._release, None
+            if release is not None:
+                release()
+
+class _ShardedTransport(httpx.AsyncBaseTransport):
+    """
+    Spreads the connection pool over several small httpx transports.
+
+    httpcore's async pool does work proportional to the square of its
+    connection count on every request, which dominates CPU once the pool
+    grows past a few dozen connections. A semaphore caps requests in flight
+    at `max_connections`, and each request goes to the least busy shard;
+    waiting for it is bounded by the request's pool timeout, as in httpx.
+    Each call is timed, including any wait for a free connection, until
+    its response body is closed.
+    """
+
+    def __init__(self, limits: httpx.Limits, shard_size: int, http2: bool):
+        count = max(1, math.ceil(limits.max_connections / shard_size))
+        shard_limits = httpx.Limits(
+            max_connections=math.ceil(limits.max_connections / count),
+            max_keepalive_connections=math.ceil(limits.max_keepalive_connections / count),
+            keepalive_expiry=limits.keepalive_expiry,
+        )
+        self.shards = [httpx.AsyncHTTPTransport(limits=shard_limits, http2=http2) for _ in range(count)]
+        self._in_flight = [0] * count
+        self._gate = asyncio.Semaphore(limits.max_connections)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        started = time.perf_counter()
+        pool_timeout = request.extensions.get("timeout", {}).get("pool")
+        try:
+            await asyncio.wait_for(self._gate.acquire(), pool_timeout)
+        except asyncio.TimeoutError:
+            raise httpx.PoolTimeout("Timed out waiting for a free Supabase connection", request=request) from None
+        index = min(range(len(self.shards)), key=self._in_flight.__getitem__)
+        self._in_flight[index] += 1
+        status = None
+
+        def release():
+            self._in_flight[index] -= 1
+            self._gate.release()
+            observe_upstream(request, status, time.perf_counter() - started)
+
+        try:
+            response = await self.shards[index].handle_async_request(request)
+        except BaseException:
+            release()
+            raise
+        status = response.status_code
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_ReleasingStream(response.stream, release),
+            extensions=response.extensions,
+        )
+
+    async def aclose(self) -> None:
+        for shard in self.shards:
+            await shard.aclose()
+
+async def _pooled_session(session: httpx.AsyncClient) -> httpx.AsyncClient:
     """
-    Creates and returns a Supabase client configured with longer timeouts
-    to mitigate transient network errors.
+    Rebuilds an httpx session created by the Supabase SDK with our keep-alive
+    pool limits, preserving its base URL, headers and timeout.
     """
+    pooled = httpx.AsyncClient(
+        base_url=session.base_url,
+        headers=session.headers,
+        timeout=session.timeout,
+        follow_redirects=True,
+        transport=_ShardedTransport(_pool_limits(), settings.SUPABASE_POOL_SHARD_SIZE, http2=True),
+    )
+    await session.aclose()
+    return pooled
+
+async def _build_client() -> AClient:
     supabase_url = os.getenv("SUPABASE_URL", settings.SUPABASE_URL)
-    options = ClientOptions(
-        postgrest_client_timeout=15,  # Timeout for PostgREST requests
-        storage_client_timeout=15   # Timeout for Storage requests
+    options = AClientOptions(
+        storage=AsyncMemoryStorage(),
+        postgrest_client_timeout=settings.SUPABASE_POSTGREST_TIMEOUT,
+        storage_client_timeout=settings.SUPABASE_STORAGE_TIMEOUT,
     )
-    return create_client(
+    client = await acreate_client(
         supabase_url,
         settings.SUPABASE_KEY,
         options=options
     )
+    client.postgrest.session = await _pooled_session(client.postgrest.session)
+    client.storage.session = await _pooled_session(client.storage.session)
+    client.storage._client = client.storage.session
+    _pool_metrics["clients_created"] += 1
+    return client
+
+def _is_healthy(client: AClient) -> bool:
+    return not (client.postgrest.session.is_closed or client.storage.session.is_closed)
+
+async def init_supabase_client() -> AClient:
+    """
+    Builds the process-wide Supabase client. Called once at application startup.
+    """
+    global _client
+    async with _client_lock:
+        if _client is None:
+            _client = await _build_client()
+    return _client
+
+async def close_supabase_client() -> None:
+    """
+    Closes the pooled HTTP connections of the shared client on shutdown.
+    """
+    global _client
+    if _client is not None:
+        await _client.postgrest.session.aclose()
+        await _client.storage.session.aclose()
+        _client = None
+
+async def get_supabase_client() -> AClient:
+    """
+    Returns the shared Supabase client, rebuilding it if its connection
+    pools have been closed.
+    """
+    global _client
+    client = _client
+    if client is None or not _is_healthy(client):
+        async with _client_lock:
+            # Another caller may have rebuilt it while we waited.
+            if _client is None:
+                _client = await _build_client()
+            elif not _is_healthy(_client):
+                _client = await _build_client()
+                _pool_metrics["clients_rebuilt"] += 1
+            client = _client
+    _pool_metrics["checkouts"] += 1
+    return client
+
+def _session_stats(session: httpx.AsyncClient) -> dict:
+    connections = [
+        connection
+        for shard in session._transport.shards
+        for connection in shard._pool.connections
+    ]
+    idle = sum(1 for connection in connections if connection.is_idle())
+    return {"connections": len(connections), "idle": idle, "active": len(connections) - idle}
+
+def get_pool_stats() -> dict:
+    stats = {
+        **_pool_metrics,
+        "max_connections": settings.SUPABASE_POOL_MAX_CONNECTIONS,
+        "max_keepalive_connections": settings.SUPABASE_POOL_MAX_KEEPALIVE,
+        "shard_size": settings.SUPABASE_POOL_SHARD_SIZE,
+    }
+    client = _client
+    if client is not None:
+        stats["postgrest"] = _session_stats(client.postgrest.session)
+        stats["storage"] = _session_stats(client.storage.session)
+    return stats
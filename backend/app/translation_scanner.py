@@ -1,7 +1,169 @@
+import hashlib
+import json
 import os
 import re
-from typing import List, Set
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import List, Optional
+
+from .config import settings
+
+SOURCE_SUFFIXES = ('.js', '.jsx', '.ts', '.tsx')
+SKIP_DIRS = {'node_modules', 'dist', 'build', '.git'}
+# Bump when the patterns change, so cached keys from older patterns are dropped.
+CACHE_VERSION = 2
+
+# The key is a string literal without interpolation; the call may pass options
+# after it and may span lines. Matches t('key'), t("key", {...}), i18n.t(`key`)
+# and <Trans i18nKey="key" />.
+KEY_PATTERNS = [
+    re.compile(r"""\bt\(\s*(['"`])((?:(?!\1)[^\\\n$])+)\1\s*[,)]"""),
+    re.compile(r"""\bi18nKey=\{?\s*(['"`])((?:(?!\1)[^\\\n$])+)\1"""),
+]
+# t(`orderManagement.status.${order.status}`) uses every key under the prefix.
+PREFIX_PATTERN = re.compile(r"""\bt\(\s*`([^`$\\]*)\$\{""")
+
+
+def extract_keys(content: str) -> tuple[list[str], list[str]]:
+    """
+    The literal translation keys used in a source file, and the prefixes of
+    keys built from template literals.
+    """
+    keys = {match.group(2).strip() for pattern in KEY_PATTERNS for match in pattern.finditer(content)}
+    prefixes = {prefix for prefix in PREFIX_PATTERN.findall(content) if prefix}
+    return sorted(key for key in keys if key), sorted(prefixes)
+
+
+def default_frontend_path() -> Path:
+    if settings.TRANSLATION_SCAN_PATH:
+        return Path(settings.TRANSLATION_SCAN_PATH)
+    # frontend/src next to the backend directory.
+    return Path(__file__).parent.parent.parent / "frontend" / "src"
+
+
+class TranslationKeyScanner:
+    """
+    Extracts translation keys from the frontend sources, keeping each file's
+    size, mtime, content hash and keys between scans (and on disk when given
+    a `cache_path`). A scan stats every file but only reads the ones whose
+    size or mtime changed, and only re-extracts keys when the content hash
+    changed too. Changed files are read in a thread pool.
+    """
+
+    def __init__(self, root: Path, cache_path: Optional[Path] = None, workers: int = 8):
+        self.root = root
+        self.cache_path = cache_path
+        self.workers = workers
+        self.last_scan = {"files": 0, "rescanned": 0, "duration_ms": 0.0}
+        self._files: dict[str, dict] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _load(self) -> None:
+        self._loaded = True
+        if self.cache_path is None or not self.cache_path.exists():
+            return
+        try:
+            cached = json.loads(self.cache_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return
+        if cached.get("version") == CACHE_VERSION and cached.get("root") == str(self.root):
+            self._files = cached["files"]
+
+    def _save(self) -> None:
+        if self.cache_path is None:
+            return
+        temp = self.cache_path.with_suffix(self.cache_path.suffix + ".tmp")
+        try:
+            temp.write_text(json.dumps({"version": CACHE_VERSION, "root": str(self.root), "files": self._files}), encoding='utf-8')
+            os.replace(temp, self.cache_path)
+        except OSError as e:
+            print(f"Warning: Could not write translation scan cache {self.cache_path}: {e}")
+
+    def _source_files(self) -> dict[str, os.stat_result]:
+        found = {}
+        pending = [self.root]
+        while pending:
+            with os.scandir(pending.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in SKIP_DIRS:
+                            pending.append(entry.path)
+                    elif entry.name.endswith(SOURCE_SUFFIXES):
+                        found[os.path.relpath(entry.path, self.root)] = entry.stat()
+        return found
+
+    def _scan_file(self, relpath: str, stat: os.stat_result) -> dict | None:
+        try:
+            data = (self.root / relpath).read_bytes()
+        except OSError as e:
+            print(f"Warning: Could not read {self.root / relpath}: {e}")
+            return None
+        digest = hashlib.sha256(data).hexdigest()
+        entry = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "sha256": digest}
+        cached = self._files.get(relpath)
+        if cached is not None and cached["sha256"] == digest:
+            return {**entry, "keys": cached["keys"], "prefixes": cached["prefixes"]}
+        keys, prefixes = extract_keys(data.decode('utf-8', errors='replace'))
+        return {**entry, "keys": keys, "prefixes": prefixes}
+
+    def scan(self) -> tuple[set[str], set[str]]:
+        """
+        Returns the literal keys and the dynamic key prefixes used across
+        the frontend sources.
+        """
+        with self._lock:
+            started = time.perf_counter()
+            if not self._loaded:
+                self._load()
+            if not self.root.exists():
+                raise FileNotFoundError(f"Frontend path not found: {self.root}")
+            current = self._source_files()
+            stale = [
+                (relpath, stat) for relpath, stat in current.items()
+                if (cached := self._files.get(relpath)) is None
+                or cached["mtime_ns"] != stat.st_mtime_ns or cached["size"] != stat.st_size
+            ]
+            removed = self._files.keys() - current.keys()
+            if stale:
+                with ThreadPoolExecutor(max_workers=min(self.workers, len(stale))) as pool:
+                    scanned = list(pool.map(lambda item: self._scan_file(*item), stale))
+                for (relpath, _), entry in zip(stale, scanned):
+                    if entry is None:
+                        self._files.pop(relpath, None)
+                    else:
+                        self._files[relpath] = entry
+            for relpath in removed:
+                del self._files[relpath]
+            if stale or removed:
+                self._save()
+            keys = {key for entry in self._files.values() for key in entry["keys"]}
+            prefixes = {prefix for entry in self._files.values() for prefix in entry["prefixes"]}
+            self.last_scan = {
+                "files": len(current),
+                "rescanned": len(stale),
+                "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+            }
+            return keys, prefixes
+
+
+_scanners: dict[Path, TranslationKeyScanner] = {}
+_scanners_lock = threading.Lock()
+
+
+def get_scanner(frontend_path: str = None) -> TranslationKeyScanner:
+    """
+    The scanner for a frontend directory, kept for the life of the process.
+    Only the default directory's scanner persists its cache to disk.
+    """
+    root = Path(frontend_path) if frontend_path is not None else default_frontend_path()
+    with _scanners_lock:
+        if root not in _scanners:
+            cache_path = Path(settings.TRANSLATION_SCAN_CACHE_PATH) if frontend_path is None and settings.TRANSLATION_SCAN_CACHE_PATH else None
+            _scanners[root] = TranslationKeyScanner(root, cache_path, settings.TRANSLATION_SCAN_WORKERS)
+        return _scanners[root]
 
 
 def scan_frontend_translation_keys(frontend_path: str = None) -> List[str]:
@@ -9,58 +171,18 @@ def scan_frontend_translation_keys(frontend_path: str = None) -> List[str]:
     Scans the frontend directory for all translation keys used in t('key') or t("key") calls.
     Returns a sorted list of unique translation keys.
     """
-    if frontend_path is None:
-        # Default to the frontend/src directory relative to backend
-        backend_dir = Path(__file__).parent.parent
-        frontend_path = backend_dir.parent / "frontend" / "src"
-    else:
-        frontend_path = Path(frontend_path)
-    
-    if not frontend_path.exists():
-        raise FileNotFoundError(f"Frontend path not found: {frontend_path}")
-    
-    keys: Set[str] = set()
-    
-    # Regex patterns to match t('key') or t("key") with support for nested quotes
-    patterns = [
-        re.compile(r"t\(['\"]([^'\"]+)['\"]\)"),  # Basic: t('key') or t("key")
-        re.compile(r"t\(`([^`]+)`\)"),  # Template literals: t(`key`)
-    ]
-    
-    # Walk through all .js, .jsx, .ts, .tsx files
-    for root, _, files in os.walk(frontend_path):
-        for file in files:
-            if file.endswith(('.js', '.jsx', '.ts', '.tsx')):
-                filepath = Path(root) / file
-                try:
-                    with open(filepath, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                        
-                        # Apply all patterns
-                        for pattern in patterns:
-                            matches = pattern.findall(content)
-                            for match in matches:
-                                # Clean up the key (remove extra spaces, etc.)
-                                key = match.strip()
-                                if key:  # Only add non-empty keys
-                                    keys.add(key)
-                except Exception as e:
-                    # Skip files that can't be read
-                    print(f"Warning: Could not read {filepath}: {e}")
-                    continue
-    
-    # Return sorted list for consistency
-    return sorted(list(keys))
+    keys, _ = get_scanner(frontend_path).scan()
+    return sorted(keys)
 
 
 def get_missing_translation_keys(existing_keys: List[str], frontend_path: str = None) -> List[str]:
     """
     Returns translation keys that exist in the frontend code but not in the database.
-    
+
     Args:
         existing_keys: List of translation keys already in the database
         frontend_path: Optional path to frontend directory
-    
+
     Returns:
         List of missing translation keys
     """
@@ -70,6 +192,23 @@ def get_missing_translation_keys(existing_keys: List[str], frontend_path: str =
     return sorted(missing_keys)
 
 
+def translation_key_report(existing_keys: List[str], frontend_path: str = None) -> dict:
+    """
+    Compares the keys used in the frontend with the keys in the database.
+    A database key counts as used when the code uses it literally or it
+    falls under a dynamic prefix such as `orderManagement.status.`.
+    """
+    scanner = get_scanner(frontend_path)
+    used, prefixes = scanner.scan()
+    existing = set(existing_keys)
+    return {
+        "missing": sorted(used - existing),
+        "unused": sorted(key for key in existing - used if not key.startswith(tuple(prefixes))),
+        "dynamic_prefixes": sorted(prefixes),
+        **scanner.last_scan,
+    }
+
+
 if __name__ == '__main__':
     # Test the scanner
     try:
@@ -0,0 +1,77 @@
+"""
+Compares GET /api/products throughput of the async service layer against the
+previous sync path (a plain `def` handler calling the blocking SDK client in
+Starlette's threadpool). Both hit the same fake PostgREST with injected latency.
+
+Run from the backend directory:
+
+    python -m benchmarks.async_vs_sync --requests 2000 --concurrency 200 --latency 0.25
+"""
+import argparse
+import asyncio
+import json
+import os
+
+from .fake_supabase import create_app, seed_catalog, serve_in_process
+from .load import get, run_load
+
+FAKE_PORT = 8731
+SYNC_PORT = 8732
+ASYNC_PORT = 8733
+
+os.environ.setdefault("SUPABASE_URL", f"http://127.0.0.1:{FAKE_PORT}")
+os.environ.setdefault("SUPABASE_KEY", "bench.bench.bench")
+os.environ.setdefault("AZHAR_ADMIN_EMAIL", "bench@example.com")
+os.environ.setdefault("AZHAR_ADMIN_INITIAL_PASSWORD", "bench")
+os.environ.setdefault("SECRET_KEY", "bench")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+
+def build_sync_app():
+    from typing import List
+    from fastapi import FastAPI
+    from supabase import create_client, ClientOptions
+    from app import schemas
+
+    client = create_client(os.environ["SUPABASE_URL"], os.environ["SUPABASE_KEY"], options=ClientOptions(postgrest_client_timeout=15))
+    sync_app = FastAPI()
+
+    @sync_app.get("/api/products", response_model=List[schemas.Product])
+    def list_products():
+        response = client.table("products").select("*, category:categories(*), product_images(*), product_variants(*)").execute()
+        for product in response.data:
+            images = product.get("product_images") or []
+            product["images"] = [img["image_url"] for img in images]
+            product["primary_image_url"] = next((img["image_url"] for img in images if img.get("is_primary")), None)
+        return response.data
+
+    return sync_app
+
+
+def build_async_app():
+    from main import app
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.25, help="Injected PostgREST latency in seconds")
+    parser.add_argument("--products", type=int, default=5)
+    args = parser.parse_args()
+
+    fake = serve_in_process(lambda: create_app(seed_catalog(args.products), latency=args.latency), FAKE_PORT)
+
+    results = {}
+    for name, factory, port in (("sync", build_sync_app, SYNC_PORT), ("async", build_async_app, ASYNC_PORT)):
+        server = serve_in_process(factory, port)
+        asyncio.run(run_load(port, args.concurrency, args.concurrency, get("/api/products")))
+        results[name] = asyncio.run(run_load(port, args.requests, args.concurrency, get("/api/products")))
+        server.terminate()
+    fake.terminate()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Measures response compression on the full product list: bytes on the wire
+and the API process's CPU time per request for identity, gzip and brotli.
+
+GET /api/products is a public endpoint, so its compressed bytes are
+reused from the compressed-body cache; GET /api/admin/products returns the
+same body to a signed-in admin and is compressed on every request, which
+shows what the cache saves. CPU time is read from /proc (Linux). Run from
+the backend directory:
+
+    python -m benchmarks.compression --products 1000 --requests 200
+"""
+import argparse
+import asyncio
+import json
+import os
+
+from .fake_supabase import create_app, seed_catalog, serve_in_process
+from .load import HTTPConnection, cpu_seconds, get, run_load
+
+FAKE_PORT = 8831
+APP_PORT = 8832
+
+os.environ.setdefault("SUPABASE_URL", f"http://127.0.0.1:{FAKE_PORT}")
+os.environ.setdefault("SUPABASE_KEY", "bench.bench.bench")
+os.environ.setdefault("AZHAR_ADMIN_EMAIL", "bench@example.com")
+os.environ.setdefault("AZHAR_ADMIN_INITIAL_PASSWORD", "bench")
+os.environ.setdefault("SECRET_KEY", "bench")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("JOBS_ENABLED", "false")
+os.environ.setdefault("SLOW_REQUEST_SECONDS", "60")
+
+
+def build_fake(products: int):
+    return create_app(seed_catalog(products))
+
+
+def build_app():
+    from main import app
+    return app
+
+
+async def measure(pid: int, requests: int, concurrency: int) -> dict:
+    connection = HTTPConnection("127.0.0.1", APP_PORT)
+    _, _, body = await connection.request("POST", "/api/login", json.dumps({"password": "bench"}).encode(), {"Content-Type": "application/json"})
+    admin = {"Authorization": f"Bearer {json.loads(body)['access_token']}"}
+    results = {}
+    for path, auth in (("/api/products", {}), ("/api/admin/products", admin)):
+        for encoding in ("identity", "gzip", "br"):
+            headers = {"Accept-Encoding": encoding, **auth}
+            _, response_headers, payload = await connection.request("GET", path, None, headers)
+            await run_load(APP_PORT, concurrency * 2, concurrency, get(path, headers))
+            before = cpu_seconds(pid)
+            result = await run_load(APP_PORT, requests, concurrency, get(path, headers))
+            result["cpu_ms_per_request"] = round((cpu_seconds(pid) - before) * 1000 / requests, 2)
+            result["content_encoding"] = response_headers.get("content-encoding", "identity")
+            result["bytes"] = len(payload)
+            results[f"{path} {encoding}"] = result
+    await connection.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    fake = serve_in_process(build_fake, FAKE_PORT, args.products)
+    app = serve_in_process(build_app, APP_PORT)
+    try:
+        results = asyncio.run(measure(app.pid, args.requests, args.concurrency))
+    finally:
+        app.terminate()
+        fake.terminate()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,691 @@
+"""
+A small in-memory stand-in for the PostgREST API used by the benchmarks.
+
+It understands just enough of PostgREST to serve the backend: horizontal
+filters including `or`/`and` groups, ordering, `limit`/`offset`, exact
+counts, inserts, upserts, updates, deletes and pluggable RPC handlers, plus
+Storage uploads, removals and public downloads kept in memory.
+Embedded selects are not resolved; rows are seeded already shaped the way
+the app expects.
+Every request sleeps for `latency` seconds to mimic the network hop.
+"""
+import asyncio
+import gc
+import json
+import multiprocessing
+import operator
+import random
+import re
+import socket
+import time
+from datetime import datetime, timedelta, timezone
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+
+def seed_catalog(product_count: int, variants_per_product: int = 3, images_per_product: int = 3) -> dict[str, list[dict]]:
+    rng = random.Random(42)
+    created_at = datetime(2025, 1, 1, tzinfo=timezone.utc).isoformat()
+    categories = [{"id": i, "name": f"Category {i}"} for i in range(1, 11)]
+    products = []
+    for product_id in range(1, product_count + 1):
+        category = categories[product_id % len(categories)]
+        products.append({
+            "id": product_id,
+            "name": f"Product {product_id}",
+            "description": "<p>" + "Lorem ipsum dolor sit amet. " * 10 + "</p>",
+            "price": round(rng.uniform(1, 50), 3),
+            "stock_quantity": rng.randint(0, 100),
+            "category_id": category["id"],
+            "category": category,
+            "product_images": [
+                {
+                    "id": product_id * 100 + n,
+                    "product_id": product_id,
+                    "image_url": f"https://example.supabase.co/storage/v1/object/public/products/{product_id}/{n}.jpg",
+                    "is_primary": n == 0,
+                    "created_at": created_at,
+                    "renditions": [],
+                    "placeholder": None,
+                    "width": None,
+                    "height": None,
+                }
+                for n in range(images_per_product)
+            ],
+            "product_variants": [
+                {
+                    "id": product_id * 100 + n,
+                    "product_id": product_id,
+                    "name": f"Variant {n}",
+                    "price": round(rng.uniform(1, 50), 3),
+                    "stock_quantity": rng.randint(0, 100),
+                    "image_url": None,
+                    "image_renditions": [],
+                    "image_placeholder": None,
+                }
+                for n in range(variants_per_product)
+            ],
+        })
+    product_cards = [
+        {
+            "id": product["id"],
+            "name": product["name"],
+            "price": product["price"],
+            "category_id": product["category_id"],
+            "primary_image_url": product["product_images"][0]["image_url"] if product["product_images"] else None,
+            "primary_image_renditions": [],
+            "primary_image_placeholder": None,
+            "in_stock": product["stock_quantity"] > 0 or any(v["stock_quantity"] > 0 for v in product["product_variants"]),
+        }
+        for product in products
+    ]
+    # Variant and image rows are shared with the product embeds, so changes show in both.
+    product_variants = [variant for product in products for variant in product["product_variants"]]
+    product_images = [image for product in products for image in product["product_images"]]
+    return {
+        "products": products,
+        "categories": categories,
+        "product_cards": product_cards,
+        "product_variants": product_variants,
+        "product_images": product_images,
+    }
+
+
+
+def seed_orders(tables: dict[str, list[dict]], order_count: int, items_per_order: int = 2) -> dict[str, list[dict]]:
+    """
+    Adds customers, delivery areas, app settings and `order_count` orders
+    over the seeded catalog, with orders stored already embedded the way
+    the order listing selects them. Newer orders have higher ids.
+    """
+    rng = random.Random(7)
+    started = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    areas = tables.setdefault("delivery_areas", [{"id": i, "name": f"Area {i}", "price": float(i)} for i in range(1, 6)])
+    tables.setdefault("app_settings", [
+        {"key": "free_delivery_threshold", "value": "100"},
+        {"key": "delivery_message", "value": ""},
+        {"key": "pickup_message", "value": ""},
+    ])
+    customers = tables.setdefault("customers", [])
+    for customer_id in range(len(customers) + 1, max(1, order_count // 4) + 1):
+        customers.append({"id": customer_id, "name": f"Customer {customer_id}", "phone_number": f"+9730{customer_id:07d}"})
+    variants = tables.get("product_variants", [])
+    orders = tables.setdefault("orders", [])
+    order_items = tables.setdefault("order_items", [])
+    statuses = ["processing", "processing", "ready", "shipped", "delivered", "cancelled"]
+    for order_id in range(len(orders) + 1, len(orders) + order_count + 1):
+        customer = rng.choice(customers)
+        area = rng.choice(areas) if rng.random() < 0.7 else None
+        created_at = (started + timedelta(minutes=order_id)).isoformat()
+        items = []
+        for variant in rng.sample(variants, min(items_per_order, len(variants))):
+            item = {
+                "id": len(order_items) + 1,
+                "order_id": order_id,
+                "product_id": None,
+                "product_variant_id": variant["id"],
+                "quantity": rng.randint(1, 3),
+            }
+            order_items.append(item)
+            items.append({**item, "product": None, "product_variant": variant})
+        orders.append({
+            "id": order_id,
+            "customer_id": customer["id"],
+            "customer": customer,
+            "shipping_method": "delivery" if area else "pick_up",
+            "delivery_area_id": area["id"] if area else None,
+            "delivery_area": area,
+            "delivery_fee": area["price"] if area else None,
+            "status": rng.choice(statuses),
+            "comments": None,
+            "created_at": created_at,
+            "updated_at": created_at,
+            "order_items": items,
+        })
+    return tables
+
+def _split_top_level(text: str) -> list[str]:
+    parts, depth, quoted, current = [], 0, False, []
+    for char in text:
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        elif not quoted and depth == 0 and char == ",":
+            parts.append("".join(current))
+            current = []
+            continue
+        current.append(char)
+    if current:
+        parts.append("".join(current))
+    return parts
+
+
+def _unquote(value: str) -> str:
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return value[1:-1].replace('\\"', '"').replace("\\\\", "\\")
+    return value
+
+
+def _coerce(raw: str, sample):
+    if isinstance(sample, bool):
+        return raw == "true"
+    if isinstance(sample, int):
+        return int(raw)
+    if isinstance(sample, float):
+        return float(raw)
+    if isinstance(sample, (list, dict)):
+        return json.loads(raw)
+    return raw
+
+
+COMPARISONS = {
+    "eq": operator.eq,
+    "neq": operator.ne,
+    "gt": operator.gt,
+    "gte": operator.ge,
+    "lt": operator.lt,
+    "lte": operator.le,
+}
+
+
+def _comparison(op: str, raw: str):
+    """
+    A test of one column value, parsed once per filter rather than per row,
+    so filtering large seeded tables stays cheap.
+    """
+    if op == "is":
+        expected = {"null": None, "true": True, "false": False}[raw]
+        return lambda value: value is expected
+    if op == "in":
+        options = {_unquote(option) for option in _split_top_level(raw.strip("()"))}
+        return lambda value: value is not None and str(value) in options
+    if op in ("like", "ilike"):
+        pattern = re.compile("^" + re.escape(_unquote(raw)).replace("\\*", ".*").replace("%", ".*") + "$", re.IGNORECASE if op == "ilike" else 0)
+        return lambda value: value is not None and pattern.match(str(value)) is not None
+    compare = COMPARISONS[op]
+    raw = _unquote(raw)
+    # The filter value coerced to each column type seen, like Postgres casts it.
+    targets: dict[type, object] = {}
+
+    def test(value) -> bool:
+        if value is None:
+            return False
+        kind = type(value)
+        if kind not in targets:
+            targets[kind] = _coerce(raw, value)
+        return compare(value, targets[kind])
+    return test
+
+
+def _condition(expression: str):
+    """
+    Parses one PostgREST condition, either `column.op.value` or a nested
+    `and(...)`/`or(...)` group, into a predicate over rows.
+    """
+    for group in ("and", "or"):
+        if expression.startswith(group + "("):
+            return _group(group, expression[len(group) + 1:-1])
+    column, op, raw = expression.split(".", 2)
+    test = _comparison(op, raw)
+    return lambda row: test(row.get(column))
+
+
+def _group(kind: str, body: str):
+    predicates = [_condition(part) for part in _split_top_level(body)]
+    combine = all if kind == "and" else any
+    return lambda row: combine(predicate(row) for predicate in predicates)
+
+
+def _predicates(params) -> list:
+    predicates = []
+    for key, value in params:
+        if key in ("select", "order", "limit", "offset", "on_conflict", "columns"):
+            continue
+        if key in ("and", "or"):
+            predicates.append(_group(key, value[1:-1]))
+        else:
+            op, _, raw = value.partition(".")
+            predicates.append(lambda row, column=key, test=_comparison(op, raw): test(row.get(column)))
+    return predicates
+
+
+def _sort(rows: list[dict], order: str | None) -> list[dict]:
+    if not order:
+        return rows
+    for clause in reversed(order.split(",")):
+        column, *modifiers = clause.split(".")
+        present = [row for row in rows if row.get(column) is not None]
+        missing = [row for row in rows if row.get(column) is None]
+        present.sort(key=lambda row: row[column], reverse="desc" in modifiers)
+        rows = missing + present if "desc" in modifiers else present + missing
+    return rows
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+# Rows by id per table, rebuilt when the table's list is replaced or grows.
+_id_indexes: dict[str, tuple[list[dict], int, dict]] = {}
+
+
+def _by_id(table: str, rows: list[dict]) -> dict:
+    cached = _id_indexes.get(table)
+    if cached is None or cached[0] is not rows or cached[1] != len(rows):
+        cached = _id_indexes[table] = (rows, len(rows), {row["id"]: row for row in rows if "id" in row})
+    return cached[2]
+
+
+class RPCError(Exception):
+    """
+    Raised by RPC handlers to answer like PostgREST does for a Postgres error.
+    """
+
+    def __init__(self, message: str, code: str = "P0001", status_code: int = 400):
+        super().__init__(message)
+        self.message = message
+        self.code = code
+        self.status_code = status_code
+
+
+def place_order(tables: dict[str, list[dict]], params: dict) -> list[dict]:
+    """
+    Mirrors the `place_order` database function closely enough for checkout
+    traffic: upserts the customer, applies the free delivery threshold and
+    stores the order.
+    """
+    def insert(table: str, row: dict) -> dict:
+        rows = tables.setdefault(table, [])
+        # Ids only grow, so the last row has the highest.
+        row = {"id": rows[-1]["id"] + 1 if rows else 1, **row}
+        rows.append(row)
+        return row
+
+    order = params["p_order"]
+    customer = params.get("p_customer")
+    if customer is not None:
+        existing = next((c for c in tables.setdefault("customers", []) if c["phone_number"] == customer["phone_number"]), None)
+        if existing is not None:
+            existing.update(customer)
+        customer = existing or insert("customers", customer)
+    else:
+        customer = next(c for c in tables.get("customers", []) if c["id"] == order["customer_id"])
+    area = None
+    if order.get("delivery_area_id") is not None:
+        area = next(a for a in tables.get("delivery_areas", []) if a["id"] == order["delivery_area_id"])
+    # Handlers run without awaiting, so checking and then decrementing is
+    # as atomic here as the conditional updates are in Postgres.
+    stock_rows = []
+    variants = {}
+    for item in params["p_items"]:
+        if item.get("product_variant_id") is not None:
+            table, row_id, label = "product_variants", item["product_variant_id"], "product variant"
+        else:
+            table, row_id, label = "products", item["product_id"], "product"
+        row = _by_id(table, tables.get(table, [])).get(row_id)
+        if row is None:
+            raise RPCError(f'insert or update on table "order_items" violates foreign key constraint ({label} {row_id})', code="23503", status_code=409)
+        available = row["stock_quantity"]
+        reserved = sum(quantity for r, quantity in stock_rows if r is row)
+        # NULL stock is untracked: never short, and left as it is.
+        if available is not None and available - reserved < item["quantity"]:
+            raise RPCError(
+                f"Insufficient stock for {label} {row_id}: requested {item['quantity']}, available {available - reserved}",
+                code="PT409",
+                status_code=409,
+            )
+        stock_rows.append((row, item["quantity"]))
+        if table == "product_variants":
+            variants[row_id] = row
+    for row, quantity in stock_rows:
+        if row["stock_quantity"] is not None:
+            row["stock_quantity"] -= quantity
+    fee = order.get("delivery_fee")
+    threshold = params.get("p_free_delivery_threshold")
+    if threshold and fee:
+        subtotal = sum(row["price"] * quantity for row, quantity in stock_rows)
+        if subtotal >= threshold:
+            fee = 0
+    created = insert("orders", {
+        **order,
+        "customer_id": customer["id"],
+        "status": order.get("status") or "processing",
+        "delivery_fee": fee,
+        "created_at": _now(),
+        "updated_at": _now(),
+    })
+    items = []
+    for item in params["p_items"]:
+        row = insert("order_items", {**item, "order_id": created["id"], "stock_reserved": True})
+        items.append({**row, "product": None, "product_variant": variants.get(item.get("product_variant_id"))})
+    # Stored already embedded, like the seeded products, so order listings work.
+    created.update(customer=customer, delivery_area=area, order_items=items)
+    return [created]
+
+
+def update_product_bulk(tables: dict[str, list[dict]], params: dict) -> list[dict]:
+    """
+    Mirrors the `update_product_bulk` database function on the seeded,
+    already embedded product rows.
+    """
+    product = next((p for p in tables.get("products", []) if p["id"] == params["p_product_id"]), None)
+    if product is None:
+        return []
+    product.update(params.get("p_product") or {})
+    variants_data = params.get("p_variants")
+    if variants_data is not None:
+        variants = tables.setdefault("product_variants", [])
+        listed = {variant["id"] for variant in variants_data if variant.get("id") is not None}
+        removed = {variant["id"] for variant in product["product_variants"] if variant["id"] not in listed}
+        if any(item.get("product_variant_id") in removed for item in tables.get("order_items", [])):
+            raise RPCError("Cannot delete product variants that are part of an existing order.", code="PT409", status_code=409)
+        product["product_variants"] = [variant for variant in product["product_variants"] if variant["id"] not in removed]
+        tables["product_variants"] = variants = [variant for variant in variants if variant["id"] not in removed]
+        by_id = {variant["id"]: variant for variant in product["product_variants"]}
+        for variant in variants_data:
+            if variant.get("id") is not None:
+                if variant["id"] in by_id:
+                    by_id[variant["id"]].update({k: v for k, v in variant.items() if k != "id"})
+                continue
+            row = {"image_url": None, **variant, "id": max((v["id"] for v in variants), default=0) + 1, "product_id": product["id"]}
+            variants.append(row)
+            product["product_variants"].append(row)
+    images_data = params.get("p_images")
+    if images_data is not None:
+        listed = {image["id"] for image in images_data}
+        removed_urls = [
+            url
+            for image in product["product_images"] if image["id"] not in listed
+            for url in [image["image_url"], *(r["url"] for r in image.get("renditions", []))]
+        ]
+        product["product_images"] = [image for image in product["product_images"] if image["id"] in listed]
+        tables["product_images"] = [image for image in tables.get("product_images", []) if image["product_id"] != product["id"] or image["id"] in listed]
+        # As the product_images_remove_files trigger does.
+        enqueue_storage_removal(tables, {"p_urls": removed_urls})
+        primary_id = next((image["id"] for image in images_data if image.get("is_primary")), None)
+        if primary_id is None and not any(image["is_primary"] for image in product["product_images"]) and product["product_images"]:
+            primary_id = min(product["product_images"], key=lambda image: image["created_at"])["id"]
+        if primary_id is not None:
+            for image in product["product_images"]:
+                image["is_primary"] = image["id"] == primary_id
+    return [{"product": product}]
+
+
+def order_changes(tables: dict[str, list[dict]]) -> list[dict]:
+    """
+    The `order_changes` view: live orders plus deletion tombstones.
+    """
+    return [
+        *({"id": order["id"], "updated_at": order["updated_at"], "deleted": False} for order in tables.get("orders", [])),
+        *({"id": row["order_id"], "updated_at": row["deleted_at"], "deleted": True} for row in tables.get("order_deletions", [])),
+    ]
+
+
+def storage_references(tables: dict[str, list[dict]]) -> list[dict]:
+    """
+    The `storage_references` view: every image URL still in use.
+    """
+    urls = set()
+    for image in tables.get("product_images", []):
+        urls.update([image["image_url"], *(r["url"] for r in image.get("renditions", []))])
+    for variant in tables.get("product_variants", []):
+        urls.update([variant.get("image_url"), *(r["url"] for r in variant.get("image_renditions", []))])
+    return [{"url": url} for url in sorted(url for url in urls if url)]
+
+
+def _job_row(tables: dict[str, list[dict]], kind: str, payload: dict, delay: float = 0.0, dedupe_key: str | None = None, max_attempts: int = 5) -> dict:
+    jobs = tables.setdefault("jobs", [])
+    row = {
+        "id": max((job["id"] for job in jobs), default=0) + 1,
+        "kind": kind,
+        "payload": payload,
+        "status": "queued",
+        "attempts": 0,
+        "max_attempts": max_attempts,
+        "run_at": (datetime.now(timezone.utc) + timedelta(seconds=delay)).isoformat(),
+        "locked_until": None,
+        "last_error": None,
+        "dedupe_key": dedupe_key,
+        "created_at": _now(),
+        "updated_at": _now(),
+    }
+    jobs.append(row)
+    return row
+
+
+def enqueue_job(tables: dict[str, list[dict]], params: dict) -> list[dict]:
+    dedupe_key = params.get("p_dedupe_key")
+    if dedupe_key and any(job["dedupe_key"] == dedupe_key and job["status"] in ("queued", "running") for job in tables.get("jobs", [])):
+        return []
+    return [_job_row(tables, params["p_kind"], params.get("p_payload") or {}, params.get("p_delay_seconds") or 0, dedupe_key, params.get("p_max_attempts") or 5)]
+
+
+def claim_jobs(tables: dict[str, list[dict]], params: dict) -> list[dict]:
+    now = datetime.now(timezone.utc)
+
+    def due(job):
+        if job["status"] == "queued":
+            return datetime.fromisoformat(job["run_at"]) <= now
+        return job["status"] == "running" and datetime.fromisoformat(job["locked_until"]) < now
+
+    claimed = sorted((job for job in tables.get("jobs", []) if due(job)), key=lambda job: (job["run_at"], job["id"]))[:params["p_limit"]]
+    for job in claimed:
+        job.update(
+            status="running",
+            attempts=job["attempts"] + 1,
+            locked_until=(now + timedelta(seconds=params["p_lease_seconds"])).isoformat(),
+            updated_at=_now(),
+        )
+    return claimed
+
+
+def get_store_config(tables: dict[str, list[dict]], params: dict) -> list[dict]:
+    version = tables.setdefault("store_config_version", [{"id": True, "version": 1}])[0]["version"]
+    return [{
+        "version": version,
+        "settings": tables.get("app_settings", []),
+        "delivery_areas": sorted(tables.get("delivery_areas", []), key=lambda area: area["id"]),
+    }]
+
+
+def enqueue_storage_removal(tables: dict[str, list[dict]], params: dict) -> None:
+    referenced = {row["url"] for row in storage_references(tables)}
+    urls = sorted({url for url in params.get("p_urls") or [] if url and url not in referenced})
+    if urls:
+        _job_row(tables, "storage.remove", {"urls": urls})
+
+
+def create_app(tables: dict[str, list[dict]], latency: float = 0.0, rpc: dict | None = None, views: dict | None = None) -> Starlette:
+    """
+    `rpc` maps function names to `handler(tables, params)` callables that
+    stand in for Postgres functions exposed under /rest/v1/rpc, and `views`
+    maps read-only relation names to `view(tables)` callables returning rows.
+    Like the database triggers, updates bump `updated_at` on rows that have
+    one, deleting orders leaves tombstones in `order_deletions`, deleting
+    product images queues their files for removal and writes to the store
+    config tables bump `store_config_version`. The job queue and store config
+    functions are always available.
+    """
+    rpc = {
+        "enqueue_job": enqueue_job,
+        "claim_jobs": claim_jobs,
+        "enqueue_storage_removal": enqueue_storage_removal,
+        "get_store_config": get_store_config,
+        **(rpc or {}),
+    }
+    # Storage objects by "bucket/path": (content type, body, created_at).
+    objects: dict[str, tuple[str, bytes, str]] = {}
+    views = {"order_changes": order_changes, "storage_references": storage_references, **(views or {})}
+    # Requests served per "METHOD relation", readable and resettable at /__requests.
+    request_counts: dict[str, int] = {}
+
+    def count(request: Request, relation: str) -> None:
+        key = f"{request.method} {relation}"
+        request_counts[key] = request_counts.get(key, 0) + 1
+
+    async def table_endpoint(request: Request):
+        if latency:
+            await asyncio.sleep(latency)
+        table = request.path_params["table"]
+        count(request, table)
+        rows = views[table](tables) if table in views else tables.setdefault(table, [])
+        if table in ("app_settings", "delivery_areas") and request.method != "GET":
+            get_store_config(tables, {})
+            tables["store_config_version"][0]["version"] += 1
+        predicates = _predicates(request.query_params.multi_items())
+
+        def matches(row):
+            return all(predicate(row) for predicate in predicates)
+
+        if request.method == "GET":
+            selected = rows
+            if table not in views and request.query_params.get("id", "").startswith("eq."):
+                row = _by_id(table, rows).get(int(request.query_params["id"][3:]))
+                selected = [row] if row is not None else []
+            # One pass per filter, so later filters only see the rows left.
+            for predicate in predicates:
+                selected = [row for row in selected if predicate(row)]
+            selected = _sort(list(selected), request.query_params.get("order"))
+            total = len(selected)
+            offset = int(request.query_params.get("offset", 0))
+            limit = request.query_params.get("limit")
+            selected = selected[offset:offset + int(limit)] if limit else selected[offset:]
+            headers = {}
+            if "count=" in request.headers.get("prefer", ""):
+                headers["Content-Range"] = f"{offset}-{offset + len(selected) - 1}/{total}"
+            return JSONResponse(selected, headers=headers)
+        if request.method == "POST":
+            payload = await request.json()
+            payload = payload if isinstance(payload, list) else [payload]
+            conflict = request.query_params.get("on_conflict", "id")
+            upsert = "resolution=" in request.headers.get("prefer", "")
+            written = []
+            for row in payload:
+                existing = next((r for r in rows if conflict in row and r.get(conflict) == row[conflict]), None) if upsert else None
+                if existing is not None:
+                    existing.update(row)
+                    written.append(existing)
+                    continue
+                row = {"id": max((r["id"] for r in rows), default=0) + 1, "created_at": _now(), **row}
+                rows.append(row)
+                written.append(row)
+            return JSONResponse(written, status_code=201)
+        if request.method == "PATCH":
+            changes = await request.json()
+            updated = []
+            for row in rows:
+                if matches(row):
+                    row.update(changes)
+                    if "updated_at" in row:
+                        row["updated_at"] = _now()
+                    updated.append(row)
+            return JSONResponse(updated)
+        if request.method == "DELETE":
+            removed = [row for row in rows if matches(row)]
+            tables[table] = [row for row in rows if not matches(row)]
+            if table == "orders":
+                tables.setdefault("order_deletions", []).extend({"order_id": row["id"], "deleted_at": _now()} for row in removed)
+            if table == "product_images":
+                enqueue_storage_removal(tables, {"p_urls": [url for row in removed for url in [row["image_url"], *(r["url"] for r in row.get("renditions", []))]]})
+            return JSONResponse(removed)
+        return Response(status_code=405)
+
+    async def rpc_endpoint(request: Request):
+        if latency:
+            await asyncio.sleep(latency)
+        count(request, "rpc/" + request.path_params["function"])
+        handler = rpc.get(request.path_params["function"])
+        if handler is None:
+            return JSONResponse({"message": "function not found", "code": "PGRST202"}, status_code=404)
+        params = await request.json() if request.method == "POST" else dict(request.query_params)
+        try:
+            return JSONResponse(handler(tables, params))
+        except RPCError as error:
+            return JSONResponse({"message": error.message, "code": error.code, "details": None, "hint": None}, status_code=error.status_code)
+
+    async def storage_endpoint(request: Request):
+        if latency:
+            await asyncio.sleep(latency)
+        key = request.path_params["key"]
+        count(request, "storage/" + key.split("/", 1)[0])
+        if request.method == "POST":
+            form = await request.form()
+            upload = form["file"]
+            objects[key] = (upload.content_type or "application/octet-stream", await upload.read(), _now())
+            return JSONResponse({"Key": key})
+        if request.method == "GET":
+            return await public_object_endpoint(request)
+        # DELETE /object/{bucket} with {"prefixes": [...]}
+        payload = await request.json()
+        removed = [{"name": path} for path in payload["prefixes"] if objects.pop(f"{key}/{path}", None) is not None]
+        return JSONResponse(removed)
+
+    async def list_endpoint(request: Request):
+        # One folder level, like Storage: files with an id, sub-folders without.
+        body = await request.json()
+        prefix = f"{request.path_params['bucket']}/{body.get('prefix') or ''}".rstrip("/") + "/"
+        entries = {}
+        for key, (_, _, created_at) in objects.items():
+            if not key.startswith(prefix):
+                continue
+            name, _, rest = key[len(prefix):].partition("/")
+            entries[name] = {"name": name, "id": None} if rest else {"name": name, "id": key, "created_at": created_at}
+        listed = [entries[name] for name in sorted(entries)]
+        offset = body.get("offset", 0)
+        return JSONResponse(listed[offset:offset + body.get("limit", 100)])
+
+    async def public_object_endpoint(request: Request):
+        stored = objects.get(request.path_params["key"])
+        if stored is None:
+            return JSONResponse({"message": "Object not found"}, status_code=404)
+        return Response(stored[1], media_type=stored[0])
+
+    async def requests_endpoint(request: Request):
+        if request.method == "DELETE":
+            request_counts.clear()
+        return JSONResponse(request_counts)
+
+    return Starlette(routes=[
+        Route("/__requests", requests_endpoint, methods=["GET", "DELETE"]),
+        Route("/rest/v1/rpc/{function}", rpc_endpoint, methods=["GET", "POST"]),
+        Route("/rest/v1/{table}", table_endpoint, methods=["GET", "POST", "PATCH", "DELETE"]),
+        Route("/storage/v1/object/public/{key:path}", public_object_endpoint, methods=["GET"]),
+        Route("/storage/v1/object/list/{bucket}", list_endpoint, methods=["POST"]),
+        Route("/storage/v1/object/{key:path}", storage_endpoint, methods=["GET", "POST", "DELETE"]),
+    ])
+
+
+def _wait_for_port(port: int, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"Server on port {port} did not start")
+
+
+def serve_in_process(app_factory, port: int, *args) -> multiprocessing.Process:
+    """
+    Runs `app_factory(*args)` with uvicorn in a separate process, so the server
+    under test does not share a GIL with the load generator, and waits until
+    it accepts connections. Terminate the returned process when done.
+    """
+    def run():
+        app = app_factory(*args)
+        # Keep the collector from rescanning large seeded datasets on every pass.
+        gc.freeze()
+        uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning", backlog=4096, timeout_keep_alive=75)
+
+    process = multiprocessing.Process(target=run, daemon=True)
+    process.start()
+    _wait_for_port(port)
+    return process
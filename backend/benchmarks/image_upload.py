@@ -0,0 +1,112 @@
+"""
+Compares adding several photos to a product one request at a time through
+POST /api/admin/products/{id}/images with a single request to the batch
+endpoint POST /api/admin/products/{id}/images/batch.
+
+Photos are generated JPEGs of the given size; storage and PostgREST calls go
+to the in-memory fake with injected latency. Run from the backend directory:
+
+    python -m benchmarks.image_upload --files 10 --size 3000x2000 --latency 0.05
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import uuid
+
+from PIL import Image
+
+from .fake_supabase import _wait_for_port, create_app, seed_catalog, serve_in_process
+from .load import HTTPConnection
+
+FAKE_PORT = 8781
+APP_PORT = 8782
+PRODUCT_ID = 1
+
+os.environ.setdefault("SUPABASE_URL", f"http://127.0.0.1:{FAKE_PORT}")
+os.environ.setdefault("SUPABASE_KEY", "bench.bench.bench")
+os.environ.setdefault("AZHAR_ADMIN_EMAIL", "bench@example.com")
+os.environ.setdefault("AZHAR_ADMIN_INITIAL_PASSWORD", "bench")
+os.environ.setdefault("SECRET_KEY", "bench")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+
+def build_fake(latency: float):
+    return create_app(seed_catalog(5, images_per_product=0), latency=latency)
+
+
+def photo(width: int, height: int, seed: int) -> bytes:
+    rng = random.Random(seed)
+    image = Image.effect_noise((width // 8, height // 8), 60).convert("RGB").resize((width, height))
+    image = Image.blend(image, Image.new("RGB", (width, height), tuple(rng.randrange(256) for _ in range(3))), 0.5)
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def multipart(field: str, files: list[tuple[str, bytes]]) -> tuple[bytes, str]:
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, data in files:
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{field}"; filename="{name}"\r\n'
+            f"Content-Type: image/jpeg\r\n\r\n".encode() + data + b"\r\n"
+        )
+    return b"".join(parts) + f"--{boundary}--\r\n".encode(), f"multipart/form-data; boundary={boundary}"
+
+
+async def measure(photos: list[tuple[str, bytes]]) -> dict:
+    app = HTTPConnection("127.0.0.1", APP_PORT)
+    _, _, body = await app.request("POST", "/api/login", json.dumps({"password": "bench"}).encode(), {"Content-Type": "application/json"})
+    token = json.loads(body)["access_token"]
+
+    async def post(path: str, files: list[tuple[str, bytes]], field: str) -> float:
+        payload, content_type = multipart(field, files)
+        started = time.perf_counter()
+        status, _, response = await app.request("POST", path, payload, {"Authorization": f"Bearer {token}", "Content-Type": content_type})
+        if status != 200:
+            raise RuntimeError(f"POST {path} returned {status}: {response[:200]}")
+        return time.perf_counter() - started
+
+    # Warm the process pool so neither side pays for starting it.
+    await post(f"/api/admin/products/{PRODUCT_ID}/images", photos[:1], "file")
+
+    per_file = [await post(f"/api/admin/products/{PRODUCT_ID}/images", [item], "file") for item in photos]
+    batch = await post(f"/api/admin/products/{PRODUCT_ID}/images/batch", photos, "files")
+    await app.close()
+    return {
+        "files": len(photos),
+        "sequential_total_ms": round(sum(per_file) * 1000, 1),
+        "slowest_single_ms": round(max(per_file) * 1000, 1),
+        "batch_ms": round(batch * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=10)
+    parser.add_argument("--size", default="3000x2000", help="Photo size as WIDTHxHEIGHT")
+    parser.add_argument("--latency", type=float, default=0.05, help="Injected PostgREST and Storage latency in seconds")
+    args = parser.parse_args()
+
+    width, height = (int(n) for n in args.size.split("x"))
+    photos = [(f"photo-{n}.jpg", photo(width, height, n)) for n in range(args.files)]
+    fake = serve_in_process(build_fake, FAKE_PORT, args.latency)
+    # A separate interpreter rather than serve_in_process: the app starts its
+    # image process pool, which daemonic processes are not allowed to do.
+    server = subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--port", str(APP_PORT), "--log-level", "warning"])
+    try:
+        _wait_for_port(APP_PORT)
+        print(json.dumps(asyncio.run(measure(photos)), indent=2))
+    finally:
+        server.terminate()
+        fake.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Measures server CPU time per request for GET /api/products and
+GET /api/admin/orders with FAST_RESPONSES off (responses validated against
+their response_model and rendered by JSONResponse) and on (trusted routes
+rendered straight from the service data with orjson).
+
+Each mode starts the API in its own process against the in-memory fake and
+reads that process's CPU time from /proc (Linux) around the timed requests,
+so the load generator and the fake are not counted. Product reads are
+served from the catalog cache, so the numbers are mostly serialization.
+Run from the backend directory:
+
+    python -m benchmarks.json_responses --products 1000 --orders 1000 --requests 300
+"""
+import argparse
+import asyncio
+import json
+import os
+
+from .fake_supabase import create_app, place_order, seed_catalog, seed_orders, serve_in_process
+from .load import HTTPConnection, cpu_seconds, get, run_load
+
+FAKE_PORT = 8821
+APP_PORT = 8822
+
+os.environ.setdefault("SUPABASE_URL", f"http://127.0.0.1:{FAKE_PORT}")
+os.environ.setdefault("SUPABASE_KEY", "bench.bench.bench")
+os.environ.setdefault("AZHAR_ADMIN_EMAIL", "bench@example.com")
+os.environ.setdefault("AZHAR_ADMIN_INITIAL_PASSWORD", "bench")
+os.environ.setdefault("SECRET_KEY", "bench")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("JOBS_ENABLED", "false")
+# Measure rendering, not the ETag middleware hashing the body.
+os.environ.setdefault("HTTP_CACHE_ENABLED", "false")
+os.environ.setdefault("SLOW_REQUEST_SECONDS", "60")
+
+
+def build_fake(products: int, orders: int):
+    return create_app(seed_orders(seed_catalog(products), orders), rpc={"place_order": place_order})
+
+
+def build_app(fast: bool):
+    os.environ["FAST_RESPONSES"] = "true" if fast else "false"
+    from main import app
+    return app
+
+
+async def login() -> str:
+    connection = HTTPConnection("127.0.0.1", APP_PORT)
+    _, _, body = await connection.request("POST", "/api/login", json.dumps({"password": "bench"}).encode(), {"Content-Type": "application/json"})
+    await connection.close()
+    return json.loads(body)["access_token"]
+
+
+async def measure(pid: int, requests: int, concurrency: int) -> dict:
+    token = await login()
+    endpoints = {
+        "/api/products": get("/api/products"),
+        "/api/products?limit=100": get("/api/products?limit=100"),
+        "/api/admin/orders?limit=100": get("/api/admin/orders?limit=100", {"Authorization": f"Bearer {token}"}),
+    }
+    results = {}
+    for name, next_request in endpoints.items():
+        await run_load(APP_PORT, concurrency * 2, concurrency, next_request)
+        before = cpu_seconds(pid)
+        result = await run_load(APP_PORT, requests, concurrency, next_request)
+        result["cpu_ms_per_request"] = round((cpu_seconds(pid) - before) * 1000 / requests, 2)
+        results[name] = result
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--orders", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    fake = serve_in_process(build_fake, FAKE_PORT, args.products, args.orders)
+    report = {}
+    try:
+        for fast in (False, True):
+            app = serve_in_process(build_app, APP_PORT, fast)
+            try:
+                report["fast" if fast else "validated"] = asyncio.run(measure(app.pid, args.requests, args.concurrency))
+            finally:
+                app.terminate()
+                app.join()
+    finally:
+        fake.terminate()
+    report["cpu_saved_pct"] = {
+        name: round((1 - report["fast"][name]["cpu_ms_per_request"] / result["cpu_ms_per_request"]) * 100, 1)
+        for name, result in report["validated"].items() if result["cpu_ms_per_request"]
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+A minimal keep-alive HTTP/1.1 load generator built on asyncio streams.
+
+httpx's async connection pool spends CPU that grows with the number of
+concurrent connections, which on a small machine makes the load generator
+the bottleneck. Each worker here owns one connection and issues requests
+back to back, so the server under test stays the thing being measured.
+"""
+import asyncio
+import json
+import os
+import time
+
+
+class HTTPConnection:
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def request(self, method: str, path: str, body: bytes | None = None, headers: dict | None = None) -> tuple[int, dict, bytes]:
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}"]
+        for name, value in (headers or {}).items():
+            lines.append(f"{name}: {value}")
+        if body is not None:
+            lines.append(f"Content-Length: {len(body)}")
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode() + (body or b""))
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("Server closed the connection")
+        status = int(status_line.split()[1])
+        response_headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            response_headers[name.strip().lower()] = value.strip()
+        if response_headers.get("transfer-encoding") == "chunked":
+            chunks = []
+            while True:
+                size = int((await self.reader.readline()).strip(), 16)
+                chunk = await self.reader.readexactly(size + 2)
+                if size == 0:
+                    break
+                chunks.append(chunk[:-2])
+            payload = b"".join(chunks)
+        else:
+            payload = await self.reader.readexactly(int(response_headers.get("content-length", 0)))
+        if response_headers.get("connection") == "close":
+            await self.close()
+        return status, response_headers, payload
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies: list[float], seconds: float | None = None) -> dict:
+    """
+    Latency percentiles in milliseconds, plus throughput when the wall time
+    the latencies were collected over is given.
+    """
+    latencies = sorted(latencies)
+    summary = {"requests": len(latencies)}
+    if seconds is not None:
+        summary["seconds"] = round(seconds, 3)
+        summary["rps"] = round(len(latencies) / seconds, 1) if seconds else 0.0
+    summary.update(
+        p50_ms=round(percentile(latencies, 0.50) * 1000, 2),
+        p95_ms=round(percentile(latencies, 0.95) * 1000, 2),
+        p99_ms=round(percentile(latencies, 0.99) * 1000, 2),
+    )
+    return summary
+
+
+async def run_load(port: int, total: int, concurrency: int, next_request, host: str = "127.0.0.1") -> dict:
+    """
+    Issues `total` requests over `concurrency` keep-alive connections.
+    `next_request(i)` returns `(method, path, body, headers)` for the i-th
+    request, optionally followed by a label; labelled requests are also
+    summarized per label under "by_label".
+    """
+    latencies: list[float] = []
+    labelled: dict[str, list[float]] = {}
+    statuses: dict[int, int] = {}
+    errors = 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        connection = HTTPConnection(host, port)
+        for i in counter:
+            method, path, body, headers, *label = next_request(i)
+            started = time.perf_counter()
+            try:
+                status, _, _ = await connection.request(method, path, body, headers)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                await connection.close()
+                errors += 1
+                continue
+            latency = time.perf_counter() - started
+            latencies.append(latency)
+            if label:
+                labelled.setdefault(label[0], []).append(latency)
+            statuses[status] = statuses.get(status, 0) + 1
+            if status >= 500:
+                errors += 1
+        await connection.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    summary = summarize(latencies, elapsed)
+    result = {
+        "requests": total,
+        "errors": errors,
+        "statuses": dict(sorted(statuses.items())),
+        "seconds": summary["seconds"],
+        "rps": round(total / elapsed, 1),
+        "p50_ms": summary["p50_ms"],
+        "p95_ms": summary["p95_ms"],
+        "p99_ms": summary["p99_ms"],
+    }
+    if labelled:
+        result["by_label"] = {label: summarize(values) for label, values in sorted(labelled.items())}
+    return result
+
+
+def get(path: str, headers: dict | None = None):
+    return lambda i: ("GET", path, None, headers)
+
+
+def post_json(path: str, payload_factory, headers: dict | None = None):
+    def build(i):
+        return "POST", path, json.dumps(payload_factory(i)).encode(), {"Content-Type": "application/json", **(headers or {})}
+    return build
+
+
+def cpu_seconds(pid: int) -> float:
+    """
+    CPU time a process has used so far, read from /proc (Linux only).
+    """
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    # utime and stime, fields 14 and 15 of stat(5).
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
@@ -0,0 +1,157 @@
+"""
+Counts PostgREST round trips and wall time per PATCH /api/admin/products/{id}
+for the previous per-row update path and the bulk `update_product_bulk` RPC.
+
+Each edit renames the product, changes every existing variant, adds two new
+variants (dropping the two added by the previous edit) and moves the
+primary image, which is what the admin product form sends.
+
+Run from the backend directory:
+
+    python -m benchmarks.product_update_round_trips --variants 30 --edits 20 --latency 0.005
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+
+from .fake_supabase import create_app, seed_catalog, serve_in_process, update_product_bulk
+from .load import HTTPConnection
+
+FAKE_PORT = 8771
+LEGACY_PORT = 8772
+BULK_PORT = 8773
+PRODUCT_ID = 1
+
+os.environ.setdefault("SUPABASE_URL", f"http://127.0.0.1:{FAKE_PORT}")
+os.environ.setdefault("SUPABASE_KEY", "bench.bench.bench")
+os.environ.setdefault("AZHAR_ADMIN_EMAIL", "bench@example.com")
+os.environ.setdefault("AZHAR_ADMIN_INITIAL_PASSWORD", "bench")
+os.environ.setdefault("SECRET_KEY", "bench")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+
+async def legacy_update_product(product_id, product, supabase):
+    """
+    The update path before the bulk RPC: one request per variant and several
+    for the primary image, then a full re-read.
+    """
+    from app import services
+
+    product_data = product.model_dump(exclude_unset=True)
+    if "product_images" in product_data:
+        images_data = product_data.pop("product_images")
+        request_ids = {img["id"] for img in images_data}
+        response = await supabase.table("product_images").select("id, image_url").eq("product_id", product_id).execute()
+        to_delete = [img["id"] for img in response.data if img["id"] not in request_ids]
+        if to_delete:
+            await supabase.table("product_images").delete().in_("id", to_delete).execute()
+        primary = next((img for img in images_data if img.get("is_primary")), None)
+        if primary:
+            await supabase.table("product_images").update({"is_primary": False}).eq("product_id", product_id).execute()
+            await supabase.table("product_images").update({"is_primary": True}).eq("id", primary["id"]).execute()
+    if "product_variants" in product_data:
+        variants_data = product_data.pop("product_variants")
+        response = await supabase.table("product_variants").select("id").eq("product_id", product_id).execute()
+        current_ids = {item["id"] for item in response.data}
+        kept_ids = set()
+        for variant in variants_data:
+            variant_id = variant.get("id")
+            data = {k: v for k, v in variant.items() if k != "id"}
+            if variant_id:
+                kept_ids.add(variant_id)
+                await supabase.table("product_variants").update(data).eq("id", variant_id).execute()
+            else:
+                response = await supabase.table("product_variants").insert({**data, "product_id": product_id}).execute()
+                kept_ids.add(response.data[0]["id"])
+        to_delete = list(current_ids - kept_ids)
+        if to_delete:
+            await supabase.table("order_items").select("id").in_("product_variant_id", to_delete).execute()
+            await supabase.table("product_variants").delete().in_("id", to_delete).execute()
+    if product_data:
+        await supabase.table("products").update(product_data).eq("id", product_id).execute()
+    services.invalidate_product(product_id)
+    return await services.get_product(product_id=product_id, supabase=supabase)
+
+
+def build_fake(variants: int, latency: float):
+    return create_app(seed_catalog(5, variants_per_product=variants), latency=latency, rpc={"update_product_bulk": update_product_bulk})
+
+
+def build_legacy_app():
+    from app import services
+    from main import app
+    services._update_product = legacy_update_product
+    return app
+
+
+def build_bulk_app():
+    from main import app
+    return app
+
+
+def edit_payload(i: int, base_variant_ids: list[int], image_ids: list[int]) -> dict:
+    return {
+        "name": f"Product 1 (edit {i})",
+        "product_variants": [
+            *({"id": variant_id, "name": f"Variant {variant_id}", "price": 10 + i, "stock_quantity": 5} for variant_id in base_variant_ids),
+            {"name": f"New A {i}", "price": 1.0, "stock_quantity": 1},
+            {"name": f"New B {i}", "price": 2.0, "stock_quantity": 1},
+        ],
+        "product_images": [{"id": image_id, "is_primary": n == i % len(image_ids)} for n, image_id in enumerate(image_ids)],
+    }
+
+
+async def measure(port: int, edits: int, base_variant_ids: list[int], image_ids: list[int]) -> dict:
+    app = HTTPConnection("127.0.0.1", port)
+    fake = HTTPConnection("127.0.0.1", FAKE_PORT)
+    _, _, body = await app.request("POST", "/api/login", json.dumps({"password": "bench"}).encode(), {"Content-Type": "application/json"})
+    headers = {"Authorization": f"Bearer {json.loads(body)['access_token']}", "Content-Type": "application/json"}
+    timings, round_trips = [], []
+    for i in range(edits):
+        await fake.request("DELETE", "/__requests")
+        started = time.perf_counter()
+        status, _, _ = await app.request("PATCH", f"/api/admin/products/{PRODUCT_ID}", json.dumps(edit_payload(i, base_variant_ids, image_ids)).encode(), headers)
+        timings.append(time.perf_counter() - started)
+        if status != 200:
+            raise RuntimeError(f"PATCH returned {status}")
+        _, _, counts = await fake.request("GET", "/__requests")
+        round_trips.append(sum(json.loads(counts).values()))
+    await app.close()
+    await fake.close()
+    return {
+        "edits": edits,
+        "round_trips_per_edit": statistics.mean(round_trips),
+        "mean_ms": round(statistics.mean(timings) * 1000, 2),
+        "p50_ms": round(statistics.median(timings) * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--variants", type=int, default=30)
+    parser.add_argument("--edits", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.005, help="Injected PostgREST latency in seconds")
+    args = parser.parse_args()
+
+    seed = seed_catalog(5, variants_per_product=args.variants)["products"][PRODUCT_ID - 1]
+    base_variant_ids = [variant["id"] for variant in seed["product_variants"]]
+    image_ids = [image["id"] for image in seed["product_images"]]
+
+    results = {}
+    for name, factory, port in (("legacy", build_legacy_app, LEGACY_PORT), ("bulk", build_bulk_app, BULK_PORT)):
+        fake = serve_in_process(build_fake, FAKE_PORT, args.variants, args.latency)
+        server = serve_in_process(factory, port)
+        try:
+            results[name] = asyncio.run(measure(port, args.edits, base_variant_ids, image_ids))
+        finally:
+            server.terminate()
+            fake.terminate()
+            fake.join()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Measures build time and query latency of the in-process product search index
+on a synthetic bilingual catalog.
+
+Run from the backend directory:
+
+    python -m benchmarks.search_index --products 50000
+"""
+import argparse
+import json
+import os
+import random
+import time
+
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:1")
+os.environ.setdefault("SUPABASE_KEY", "bench.bench.bench")
+os.environ.setdefault("AZHAR_ADMIN_EMAIL", "bench@example.com")
+os.environ.setdefault("AZHAR_ADMIN_INITIAL_PASSWORD", "bench")
+os.environ.setdefault("SECRET_KEY", "bench")
+
+from app.search import ProductSearchIndex
+
+ARABIC_WORDS = ["عطر", "العود", "مسك", "بخور", "زيت", "الورد", "عنبر", "صندل", "فاخر", "طبيعي", "هدية", "مجموعة", "كريم", "صابون", "شموع"]
+ENGLISH_WORDS = ["perfume", "oud", "musk", "incense", "oil", "rose", "amber", "sandal", "luxury", "natural", "gift", "set", "cream", "soap", "candle"]
+QUERIES = ["عطر", "العود", "عود", "مس", "ورد فاخر", "perf", "oud oil", "gift set", "luxury rose perfume", "شموع هدية", "zzz"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=50000)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    cards, details = [], {}
+    for product_id in range(1, args.products + 1):
+        words = rng.sample(ARABIC_WORDS, 3) + rng.sample(ENGLISH_WORDS, 2) + [f"sku{product_id}"]
+        cards.append({"id": product_id, "name": " ".join(words), "price": 10.0, "category_id": 1, "primary_image_url": None, "in_stock": True})
+        details[product_id] = {"description": "<p>" + " ".join(rng.sample(ARABIC_WORDS + ENGLISH_WORDS, 8)) + "</p>", "category": {"name": rng.choice(ARABIC_WORDS)}}
+
+    started = time.perf_counter()
+    index = ProductSearchIndex._build(cards, details)
+    build_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    index.add({**cards[0], "name": "منتج جديد new product"}, None, None)
+    incremental_ms = (time.perf_counter() - started) * 1000
+
+    results = {"products": args.products, "build_seconds": round(build_seconds, 2), "incremental_update_ms": round(incremental_ms, 3), "queries": {}}
+    for query in QUERIES:
+        timings = []
+        for _ in range(args.iterations):
+            started = time.perf_counter()
+            _, total = index.search(query, limit=24)
+            timings.append(time.perf_counter() - started)
+        timings.sort()
+        results["queries"][query] = {
+            "matches": total,
+            "p50_ms": round(timings[len(timings) // 2] * 1000, 2),
+            "p99_ms": round(timings[int(len(timings) * 0.99) - 1] * 1000, 2),
+        }
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
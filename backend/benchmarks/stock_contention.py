@@ -0,0 +1,130 @@
+"""
+Concurrent checkout stress test for stock reservation.
+
+Fires many simultaneous POST /api/orders for the same product variant and
+checks that no more units were sold than were in stock: every accepted
+order is backed by stock, every rejected one is a 409, and the remaining
+stock equals the starting stock minus what was sold.
+
+By default it runs the backend against the in-memory fake PostgREST,
+which only mirrors the reservation logic, so it checks the API's handling
+of conflicts rather than the SQL. tests/test_stock_reservation.py runs the
+db.sql functions against a real Postgres. Point this at a running backend
+wired to a real database to load the Postgres path end to end:
+
+    python -m benchmarks.stock_contention --checkouts 500 --concurrency 100 --stock 37
+    python -m benchmarks.stock_contention --target 127.0.0.1:8000 --product-id 12 --variant-id 40
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+from .fake_supabase import create_app, place_order, seed_catalog, serve_in_process
+from .load import HTTPConnection, post_json, run_load
+
+FAKE_PORT = 8751
+APP_PORT = 8752
+
+os.environ.setdefault("SUPABASE_URL", f"http://127.0.0.1:{FAKE_PORT}")
+os.environ.setdefault("SUPABASE_KEY", "bench.bench.bench")
+os.environ.setdefault("AZHAR_ADMIN_EMAIL", "bench@example.com")
+os.environ.setdefault("AZHAR_ADMIN_INITIAL_PASSWORD", "bench")
+os.environ.setdefault("SECRET_KEY", "bench")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+
+def build_fake(variant_id: int, stock: int, latency: float):
+    tables = seed_catalog(5)
+    tables["delivery_areas"] = [{"id": 1, "name": "Bench", "price": 1.0}]
+    for variant in tables["product_variants"]:
+        if variant["id"] == variant_id:
+            variant["stock_quantity"] = stock
+    return create_app(tables, latency=latency, rpc={"place_order": place_order})
+
+
+def build_app():
+    from main import app
+    return app
+
+
+async def read_stock(host: str, port: int, product_id: int, variant_id: int) -> int:
+    connection = HTTPConnection(host, port)
+    status, _, payload = await connection.request("GET", f"/api/products/{product_id}")
+    await connection.close()
+    if status != 200:
+        raise RuntimeError(f"GET /api/products/{product_id} returned {status}")
+    product = json.loads(payload)
+    return next(v["stock_quantity"] for v in product["product_variants"] if v["id"] == variant_id)
+
+
+def checkout(variant_id: int, quantity: int):
+    return lambda i: {
+        "customer": {"name": f"Stress {i}", "phone_number": f"+9999{i:07d}"},
+        "shipping_method": "pick_up",
+        "order_items": [{"product_variant_id": variant_id, "quantity": quantity}],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", help="host:port of a running backend; omit to start one against the fake")
+    parser.add_argument("--product-id", type=int, default=1)
+    parser.add_argument("--variant-id", type=int, default=100)
+    parser.add_argument("--stock", type=int, default=37, help="Starting stock (fake mode only)")
+    parser.add_argument("--quantity", type=int, default=1, help="Units per checkout")
+    parser.add_argument("--checkouts", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.01, help="Injected PostgREST latency in seconds (fake mode only)")
+    args = parser.parse_args()
+
+    servers = []
+    if args.target:
+        host, _, port = args.target.partition(":")
+        port = int(port)
+    else:
+        host, port = "127.0.0.1", APP_PORT
+        servers.append(serve_in_process(build_fake, FAKE_PORT, args.variant_id, args.stock, args.latency))
+        servers.append(serve_in_process(build_app, APP_PORT))
+
+    try:
+        before = asyncio.run(read_stock(host, port, args.product_id, args.variant_id))
+        result = asyncio.run(run_load(
+            port, args.checkouts, args.concurrency,
+            post_json("/api/orders", checkout(args.variant_id, args.quantity)),
+            host=host,
+        ))
+        after = asyncio.run(read_stock(host, port, args.product_id, args.variant_id))
+    finally:
+        for server in reversed(servers):
+            server.terminate()
+
+    accepted = result["statuses"].get(200, 0)
+    rejected = result["statuses"].get(409, 0)
+    report = {
+        **result,
+        "stock_before": before,
+        "stock_after": after,
+        "accepted": accepted,
+        "rejected": rejected,
+        "expected_accepted": min(args.checkouts, before // args.quantity),
+    }
+    print(json.dumps(report, indent=2))
+
+    failures = []
+    if after < 0:
+        failures.append("stock went negative")
+    if before - after != accepted * args.quantity:
+        failures.append("stock sold does not match accepted orders")
+    if accepted + rejected != args.checkouts:
+        failures.append("some checkouts failed with something other than 409")
+    if accepted != report["expected_accepted"]:
+        failures.append("accepted orders do not match available stock")
+    if failures:
+        sys.exit("FAIL: " + "; ".join(failures))
+    print("OK: no oversell")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""
+Reproducible load-test suite: runs scripted traffic mixes against the API
+over seeded datasets and reports latency percentiles and throughput as
+JSON, so runs can be kept and compared over time.
+
+For each dataset size it seeds the in-memory fake PostgREST with that many
+products (three variants and images each) and orders, starts the API
+against it and runs every mix:
+
+    browse          product card pages, category filters and search
+    product_detail  GET /api/products/{id} across the whole catalog
+    checkout        POST /api/orders with one or two variants
+    admin_orders    the admin order list, paged and filtered by status
+    storefront      the above weighted like real traffic
+
+Request plans come from a fixed seed, so two runs send the same requests.
+The fake filters rows in Python, so at 100k products its own CPU shows up
+in the numbers; compare runs made with the same sizes and latency. Run
+from the backend directory:
+
+    python -m benchmarks.suite --sizes 1000 10000 --requests 2000 --output results.json
+    python -m benchmarks.suite --sizes 1000 --mixes browse checkout --compare results.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+from .fake_supabase import create_app, place_order, seed_catalog, seed_orders, serve_in_process
+from .load import HTTPConnection, run_load
+
+FAKE_PORT = 8811
+APP_PORT = 8812
+PASSWORD = "bench"
+
+os.environ.setdefault("SUPABASE_URL", f"http://127.0.0.1:{FAKE_PORT}")
+os.environ.setdefault("SUPABASE_KEY", "bench.bench.bench")
+os.environ.setdefault("AZHAR_ADMIN_EMAIL", "bench@example.com")
+os.environ.setdefault("AZHAR_ADMIN_INITIAL_PASSWORD", PASSWORD)
+os.environ.setdefault("SECRET_KEY", "bench")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("JOBS_ENABLED", "false")
+
+SEARCH_TERMS = ["Product 1", "Product 42", "Variant", "product 7", "Lorem"]
+
+
+def build_fake(products: int, orders: int, latency: float):
+    tables = seed_orders(seed_catalog(products), orders)
+    # Checkouts should measure placing orders, not running out of stock.
+    for row in (*tables["products"], *tables["product_variants"]):
+        row["stock_quantity"] = 10 ** 9
+    return create_app(tables, latency=latency, rpc={"place_order": place_order})
+
+
+def build_app():
+    from main import app
+    return app
+
+
+def browse(rng: random.Random, products: int, token: str):
+    page = rng.randrange(max(1, min(products, 2400) // 24))
+    roll = rng.random()
+    if roll < 0.5:
+        path = f"/api/products/cards?limit=24&offset={page * 24}"
+    elif roll < 0.8:
+        path = f"/api/products/cards?limit=24&category_id={rng.randint(1, 10)}&sort=price_asc"
+    elif roll < 0.9:
+        path = "/api/categories"
+    else:
+        path = f"/api/products/search?q={rng.choice(SEARCH_TERMS).replace(' ', '+')}&limit=24"
+    return "GET", path, None, None, "browse"
+
+
+def product_detail(rng: random.Random, products: int, token: str):
+    return "GET", f"/api/products/{rng.randint(1, products)}", None, None, "product_detail"
+
+
+def checkout(rng: random.Random, products: int, token: str):
+    items = []
+    for product_id in rng.sample(range(1, products + 1), rng.choice([1, 1, 2])):
+        items.append({"product_variant_id": product_id * 100 + rng.randrange(3), "quantity": rng.randint(1, 2)})
+    delivery = rng.random() < 0.7
+    order = {
+        "customer": {"name": "Bench Customer", "phone_number": f"+9731{rng.randrange(10 ** 7):07d}"},
+        "shipping_method": "delivery" if delivery else "pick_up",
+        "delivery_area_id": rng.randint(1, 5) if delivery else None,
+        "order_items": items,
+    }
+    return "POST", "/api/orders", json.dumps(order).encode(), {"Content-Type": "application/json"}, "checkout"
+
+
+def admin_orders(rng: random.Random, products: int, token: str):
+    path = f"/api/admin/orders?limit=50&offset={rng.randrange(5) * 50}"
+    if rng.random() < 0.5:
+        path += f"&status={rng.choice(['processing', 'ready', 'delivered'])}"
+    return "GET", path, None, {"Authorization": f"Bearer {token}"}, "admin_orders"
+
+
+MIXES = {
+    "browse": [(1, browse)],
+    "product_detail": [(1, product_detail)],
+    "checkout": [(1, checkout)],
+    "admin_orders": [(1, admin_orders)],
+    "storefront": [(60, browse), (30, product_detail), (8, checkout), (2, admin_orders)],
+}
+
+
+def plan(mix: str, total: int, products: int, token: str, seed: int) -> list[tuple]:
+    """
+    The requests a mix sends, built up front from `seed` so that building
+    them is not timed and every run sends the same ones.
+    """
+    rng = random.Random(f"{seed}:{mix}:{products}")
+    weights, scenarios = zip(*MIXES[mix])
+    return [rng.choices(scenarios, weights)[0](rng, products, token) for _ in range(total)]
+
+
+async def login() -> str:
+    connection = HTTPConnection("127.0.0.1", APP_PORT)
+    status, _, body = await connection.request("POST", "/api/login", json.dumps({"password": PASSWORD}).encode(), {"Content-Type": "application/json"})
+    await connection.close()
+    if status != 200:
+        raise RuntimeError(f"Login returned {status}: {body[:200]}")
+    return json.loads(body)["access_token"]
+
+
+async def run_mix(mix: str, args, products: int, token: str) -> dict:
+    warmup = plan(mix, args.warmup, products, token, args.seed + 1)
+    await run_load(APP_PORT, len(warmup), args.concurrency, warmup.__getitem__)
+    requests = plan(mix, args.requests, products, token, args.seed)
+    return await run_load(APP_PORT, len(requests), args.concurrency, requests.__getitem__)
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: dict, baseline: dict) -> dict:
+    """
+    Percentage change of throughput and latency percentiles against a
+    previous run, for the sizes and mixes both runs have.
+    """
+    changes = {}
+    for size, mixes in results.items():
+        for mix, result in mixes.items():
+            before = baseline.get("results", {}).get(size, {}).get(mix)
+            if not before:
+                continue
+            changes.setdefault(size, {})[mix] = {
+                key: round((result[key] - before[key]) / before[key] * 100, 1) if before[key] else None
+                for key in ("rps", "p50_ms", "p95_ms", "p99_ms")
+            }
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000], help="Products per dataset, e.g. 1000 10000 100000")
+    parser.add_argument("--orders", type=int, help="Orders per dataset (default: as many as products)")
+    parser.add_argument("--mixes", nargs="+", choices=sorted(MIXES), default=list(MIXES))
+    parser.add_argument("--requests", type=int, default=2000, help="Timed requests per mix")
+    parser.add_argument("--warmup", type=int, default=200, help="Untimed requests per mix, sent first")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--latency", type=float, default=0.005, help="Injected PostgREST latency in seconds")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Also write the report to this file")
+    parser.add_argument("--compare", help="A previous report to compute changes against")
+    args = parser.parse_args()
+
+    results = {}
+    for products in args.sizes:
+        orders = args.orders if args.orders is not None else products
+        fake = serve_in_process(build_fake, FAKE_PORT, products, orders, args.latency)
+        try:
+            app = serve_in_process(build_app, APP_PORT)
+            try:
+                token = asyncio.run(login())
+                results[str(products)] = {mix: asyncio.run(run_mix(mix, args, products, token)) for mix in args.mixes}
+            finally:
+                app.terminate()
+                app.join()
+        finally:
+            fake.terminate()
+            fake.join()
+        print(f"{products} products: done", file=sys.stderr)
+
+    report = {
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        "results": results,
+    }
+    if args.compare:
+        with open(args.compare) as f:
+            report["changes_pct"] = compare(results, json.load(f))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Measures how GET /api/products/{id} throughput scales with the number of
+gunicorn workers, and how long an admin edit made through one worker takes
+to reach the caches of all of them.
+
+Each run starts `gunicorn -c gunicorn.conf.py` with WEB_CONCURRENCY set to
+the worker count against the in-memory fake. Reads are served from the
+catalog cache, so the API's own CPU is the bottleneck. The load generator
+shares the machine, so leave it a core. Run from the backend directory:
+
+    python -m benchmarks.workers --workers 1 2 4 --requests 5000 --concurrency 64
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+from .fake_supabase import _wait_for_port, create_app, seed_catalog, serve_in_process, update_product_bulk
+from .load import HTTPConnection, get, run_load
+
+FAKE_PORT = 8791
+APP_PORT = 8792
+PRODUCT_ID = 3
+
+os.environ.setdefault("SUPABASE_URL", f"http://127.0.0.1:{FAKE_PORT}")
+os.environ.setdefault("SUPABASE_KEY", "bench.bench.bench")
+os.environ.setdefault("AZHAR_ADMIN_EMAIL", "bench@example.com")
+os.environ.setdefault("AZHAR_ADMIN_INITIAL_PASSWORD", "bench")
+os.environ.setdefault("SECRET_KEY", "bench")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+
+def build_fake(latency: float):
+    return create_app(seed_catalog(200), latency=latency, rpc={"update_product_bulk": update_product_bulk})
+
+
+async def convergence(workers: int, timeout: float = 10.0) -> float:
+    """
+    Renames the product through one connection, then reads it over many
+    connections held open at once (so every worker serves some) until every
+    read for a second shows the new name. Returns the seconds until the
+    last stale read.
+    """
+    readers = [HTTPConnection("127.0.0.1", APP_PORT) for _ in range(workers * 16)]
+    await asyncio.gather(*(reader.request("GET", f"/api/products/{PRODUCT_ID}") for reader in readers))
+    admin = HTTPConnection("127.0.0.1", APP_PORT)
+    _, _, body = await admin.request("POST", "/api/login", json.dumps({"password": "bench"}).encode(), {"Content-Type": "application/json"})
+    token = json.loads(body)["access_token"]
+    name = f"Renamed {time.time()}"
+    started = time.perf_counter()
+    status, _, body = await admin.request("PATCH", f"/api/admin/products/{PRODUCT_ID}", json.dumps({"name": name}).encode(), {"Authorization": f"Bearer {token}", "Content-Type": "application/json"})
+    await admin.close()
+    if status != 200:
+        raise RuntimeError(f"PATCH returned {status}: {body[:200]}")
+    last_stale = 0.0
+    try:
+        while time.perf_counter() - started < timeout:
+            results = await asyncio.gather(*(reader.request("GET", f"/api/products/{PRODUCT_ID}") for reader in readers))
+            now = time.perf_counter() - started
+            if any(json.loads(body)["name"] != name for _, _, body in results):
+                last_stale = now
+            elif now - last_stale > 1.0:
+                return round(last_stale, 3)
+            await asyncio.sleep(0.05)
+    finally:
+        await asyncio.gather(*(reader.close() for reader in readers))
+    raise RuntimeError(f"Workers still served the old name after {timeout}s")
+
+
+async def measure(workers: int, requests: int, concurrency: int) -> dict:
+    # Warm every worker's cache before timing.
+    await run_load(APP_PORT, concurrency * 4, concurrency, get(f"/api/products/{PRODUCT_ID}"))
+    result = await run_load(APP_PORT, requests, concurrency, get(f"/api/products/{PRODUCT_ID}"))
+    result["converged_after_s"] = await convergence(workers)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--latency", type=float, default=0.01, help="Injected PostgREST latency in seconds")
+    args = parser.parse_args()
+
+    fake = serve_in_process(build_fake, FAKE_PORT, args.latency)
+    results = {}
+    try:
+        for workers in args.workers:
+            env = {**os.environ, "WEB_CONCURRENCY": str(workers), "PORT": str(APP_PORT), "CACHE_SYNC_ENABLED": "true", "JOBS_ENABLED": "false"}
+            server = subprocess.Popen([sys.executable, "-m", "gunicorn", "main:app", "-c", "gunicorn.conf.py"], env=env)
+            try:
+                _wait_for_port(APP_PORT)
+                results[workers] = asyncio.run(measure(workers, args.requests, args.concurrency))
+            finally:
+                server.terminate()
+                server.wait()
+    finally:
+        fake.terminate()
+    baseline = results[args.workers[0]]["rps"] / args.workers[0]
+    for workers, result in results.items():
+        result["scaling_efficiency"] = round(result["rps"] / (baseline * workers), 2)
+    print(json.dumps({"cpus": os.cpu_count(), "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
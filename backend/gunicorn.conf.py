@@ -0,0 +1,38 @@
+"""
+Multi-process deployment: gunicorn supervising uvicorn workers, configured
+from Settings (see app/config.py). Run from the backend directory:
+
+    gunicorn main:app -c gunicorn.conf.py
+
+WEB_CONCURRENCY sets the number of workers (0 means one per CPU). With
+more than one, the workers keep their caches coherent through cache_sync.
+SIGHUP restarts the workers gracefully; with GUNICORN_PRELOAD the app is
+imported once in the master before forking, so picking up new code takes
+a full restart. With several workers, /metrics aggregates all of them
+through a prometheus_client multiprocess directory.
+"""
+import os
+import tempfile
+
+from app.config import settings, web_concurrency
+
+bind = f"0.0.0.0:{settings.PORT}"
+workers = web_concurrency()
+worker_class = "uvicorn_worker.UvicornWorker"
+preload_app = settings.GUNICORN_PRELOAD
+timeout = settings.GUNICORN_TIMEOUT
+graceful_timeout = settings.GUNICORN_GRACEFUL_TIMEOUT
+keepalive = settings.GUNICORN_KEEPALIVE
+max_requests = settings.GUNICORN_MAX_REQUESTS
+max_requests_jitter = settings.GUNICORN_MAX_REQUESTS_JITTER
+accesslog = None
+
+if workers > 1 and not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+    # Must be set before the app (and prometheus_client) is imported.
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="prometheus-")
+
+
+def child_exit(server, worker):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -1,24 +1,63 @@
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse
 from app.api import main_router
+from app.services import get_operator
 from app.config import settings, allowed_origins
 from app.logging_config import setup_logging
 from app.errors import global_exception_handler, http_exception_handler
+from app.http_cache import ConditionalGetMiddleware
+from app.compression import CompressionMiddleware, compressed_bodies
+from app.metrics import RequestMetricsMiddleware, render_metrics
+from app.request_debug import RoundTripDebugMiddleware
+from app.supabase_client import init_supabase_client, close_supabase_client, get_pool_stats
+from app.cache import catalog_cache
+from app.order_feed import order_feed
+from app.images import shutdown_pool
+from app.jobs import job_worker
+from app.store_config import store_config
+from app.cache_sync import cache_sync
 
 setup_logging()
 
-app = FastAPI(title="AzharStore API", version="0.1.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await init_supabase_client()
+    job_worker.start()
+    store_config.start()
+    cache_sync.start()
+    yield
+    await cache_sync.stop()
+    await store_config.stop()
+    await job_worker.stop()
+    await order_feed.close()
+    shutdown_pool()
+    await close_supabase_client()
+
+app = FastAPI(
+    title="AzharStore API",
+    version="0.1.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse if settings.FAST_RESPONSES else JSONResponse,
+)
 
 app.add_exception_handler(Exception, global_exception_handler)
 app.add_exception_handler(HTTPException, http_exception_handler)
 
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(ConditionalGetMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=allowed_origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count", "X-Next-Cursor", "X-Request-ID"],
 )
+if settings.REQUEST_DEBUG:
+    app.add_middleware(RoundTripDebugMiddleware)
+app.add_middleware(RequestMetricsMiddleware)
 
 @app.get("/")
 async def root():
@@ -32,4 +71,18 @@ async def health():
 async def health_head():
     return None
 
+# Pool, cache and traffic internals; see METRICS_TOKEN in app/config.py.
+@app.get("/health/pool", dependencies=[Depends(get_operator)])
+async def health_pool():
+    return get_pool_stats()
+
+@app.get("/metrics", include_in_schema=False, dependencies=[Depends(get_operator)])
+async def metrics():
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+@app.get("/health/cache", dependencies=[Depends(get_operator)])
+async def health_cache():
+    return {"catalog": catalog_cache.stats(), "compressed": compressed_bodies.stats(), "sync": cache_sync.stats()}
+
 app.include_router(main_router)
@@ -0,0 +1,210 @@
+"""
+Runs the inventory functions and triggers in db.sql against a disposable
+Postgres cluster. Needs the packages in requirements-dev.txt; skipped
+without them.
+
+The base tables live in Supabase and are not part of db.sql, so BASE_SCHEMA
+recreates the columns the migration and the API rely on.
+"""
+import json
+import threading
+from pathlib import Path
+
+import pytest
+
+pgserver = pytest.importorskip("pgserver")
+psycopg = pytest.importorskip("psycopg")
+
+MIGRATION = Path(__file__).resolve().parents[2] / "db.sql"
+
+BASE_SCHEMA = """
+CREATE TABLE categories (
+    id bigint GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    name text NOT NULL,
+    created_at timestamptz NOT NULL DEFAULT now()
+);
+CREATE TABLE products (
+    id bigint GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    name text NOT NULL,
+    description text,
+    price numeric NOT NULL,
+    stock_quantity integer,
+    category_id bigint REFERENCES categories (id),
+    created_at timestamptz NOT NULL DEFAULT now()
+);
+CREATE TABLE product_images (
+    id bigint GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    product_id bigint NOT NULL REFERENCES products (id) ON DELETE CASCADE,
+    image_url text NOT NULL,
+    is_primary boolean NOT NULL DEFAULT false,
+    created_at timestamptz NOT NULL DEFAULT now()
+);
+CREATE TABLE product_variants (
+    id bigint GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    product_id bigint NOT NULL REFERENCES products (id) ON DELETE CASCADE,
+    name text NOT NULL,
+    price numeric NOT NULL,
+    stock_quantity integer,
+    image_url text,
+    created_at timestamptz NOT NULL DEFAULT now()
+);
+CREATE TABLE customers (
+    id bigint GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    name text NOT NULL,
+    phone_number text NOT NULL UNIQUE,
+    town text,
+    address_home text,
+    address_road text,
+    address_block text,
+    created_at timestamptz NOT NULL DEFAULT now()
+);
+CREATE TABLE delivery_areas (
+    id bigint GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    name text NOT NULL,
+    price numeric NOT NULL
+);
+CREATE TABLE app_settings (
+    id bigint GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    key text NOT NULL UNIQUE,
+    value text
+);
+CREATE TABLE orders (
+    id bigint GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    customer_id bigint REFERENCES customers (id),
+    shipping_method text NOT NULL,
+    status text NOT NULL DEFAULT 'processing',
+    comments text,
+    delivery_area_id bigint REFERENCES delivery_areas (id),
+    delivery_fee numeric,
+    created_at timestamp NOT NULL DEFAULT now()
+);
+CREATE TABLE order_items (
+    id bigint GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    order_id bigint NOT NULL REFERENCES orders (id) ON DELETE CASCADE,
+    product_id bigint REFERENCES products (id),
+    product_variant_id bigint REFERENCES product_variants (id),
+    quantity integer NOT NULL
+);
+"""
+
+
+@pytest.fixture(scope="module")
+def database(tmp_path_factory):
+    server = pgserver.get_server(tmp_path_factory.mktemp("pgdata"), cleanup_mode="stop")
+    uri = server.get_uri()
+    try:
+        with psycopg.connect(uri, autocommit=True) as conn:
+            conn.execute(BASE_SCHEMA)
+            # An order placed before the migration, which reserved nothing.
+            conn.execute("INSERT INTO customers (name, phone_number) VALUES ('Legacy', '0000')")
+            conn.execute("INSERT INTO products (name, price, stock_quantity) VALUES ('Legacy', 1, 10)")
+            conn.execute("INSERT INTO orders (customer_id, shipping_method) VALUES (1, 'pickup')")
+            conn.execute("INSERT INTO order_items (order_id, product_id, quantity) VALUES (1, 1, 4)")
+            conn.execute(MIGRATION.read_text())
+        yield uri
+    finally:
+        server.cleanup()
+
+
+@pytest.fixture
+def conn(database):
+    with psycopg.connect(database, autocommit=True) as connection:
+        yield connection
+
+
+def _create_product(conn, stock_quantity):
+    return conn.execute(
+        "INSERT INTO products (name, price, stock_quantity) VALUES ('Item', 5, %s) RETURNING id",
+        (stock_quantity,),
+    ).fetchone()[0]
+
+
+def _stock(conn, product_id):
+    return conn.execute("SELECT stock_quantity FROM products WHERE id = %s", (product_id,)).fetchone()[0]
+
+
+def _place_order(conn, product_id, quantity, phone="5550000"):
+    row = conn.execute(
+        "SELECT place_order(%s::jsonb, %s::jsonb, %s::jsonb)",
+        (
+            json.dumps({"shipping_method": "pickup"}),
+            json.dumps([{"product_id": product_id, "quantity": quantity}]),
+            json.dumps({"name": "Buyer", "phone_number": phone}),
+        ),
+    ).fetchone()
+    return row[0]
+
+
+def test_concurrent_checkouts_never_oversell(database, conn):
+    product_id = _create_product(conn, 5)
+    buyers = 12
+    barrier = threading.Barrier(buyers)
+    placed, conflicts, errors = [], [], []
+
+    def checkout(index):
+        with psycopg.connect(database, autocommit=True) as own:
+            barrier.wait()
+            try:
+                placed.append(_place_order(own, product_id, 1, phone=f"555{index:04d}"))
+            except psycopg.Error as e:
+                (conflicts if e.sqlstate == "PT409" else errors).append(e)
+
+    threads = [threading.Thread(target=checkout, args=(i,)) for i in range(buyers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len(placed) == 5
+    assert len(conflicts) == buyers - 5
+    assert _stock(conn, product_id) == 0
+
+
+def test_untracked_stock_is_unlimited(conn):
+    product_id = _create_product(conn, None)
+    order = _place_order(conn, product_id, 3)
+    assert order["order_items"][0]["stock_reserved"] is True
+    assert _stock(conn, product_id) is None
+
+
+def test_cancelling_and_deleting_release_reserved_items(conn):
+    product_id = _create_product(conn, 5)
+    order = _place_order(conn, product_id, 2)
+    assert _stock(conn, product_id) == 3
+
+    conn.execute("UPDATE orders SET status = 'cancelled' WHERE id = %s", (order["id"],))
+    assert _stock(conn, product_id) == 5
+    conn.execute("UPDATE orders SET status = 'processing' WHERE id = %s", (order["id"],))
+    assert _stock(conn, product_id) == 3
+
+    conn.execute("DELETE FROM order_items WHERE order_id = %s", (order["id"],))
+    assert _stock(conn, product_id) == 3 + 2
+
+
+def test_replacing_items_moves_reservations(conn):
+    product_id = _create_product(conn, 5)
+    order = _place_order(conn, product_id, 2)
+    conn.execute(
+        "SELECT replace_order_items(%s, %s::jsonb)",
+        (order["id"], json.dumps([{"product_id": product_id, "quantity": 4}])),
+    )
+    assert _stock(conn, product_id) == 1
+
+    with pytest.raises(psycopg.Error) as excinfo:
+        conn.execute(
+            "SELECT replace_order_items(%s, %s::jsonb)",
+            (order["id"], json.dumps([{"product_id": product_id, "quantity": 6}])),
+        )
+    assert excinfo.value.sqlstate == "PT409"
+    assert _stock(conn, product_id) == 1
+
+
+def test_orders_from_before_the_migration_release_nothing(conn):
+    # Order 1 and product 1 were created before db.sql was applied.
+    conn.execute("UPDATE orders SET status = 'cancelled' WHERE id = 1")
+    assert _stock(conn, 1) == 10
+    conn.execute("UPDATE orders SET status = 'processing' WHERE id = 1")
+    assert _stock(conn, 1) == 10
+    conn.execute("DELETE FROM order_items WHERE order_id = 1")
+    assert _stock(conn, 1) == 10
@@ -12,3 +12,711 @@ ALTER COLUMN created_at SET DEFAULT (NOW() AT TIME ZONE 'Asia/Riyadh');
 
 -- Note: All existing timestamps will be interpreted as UTC and converted to GMT+3
 -- New orders will automatically use GMT+3 timezone
+
+-- Compact storefront listing: one row per product with the primary image and
+-- stock flag resolved in SQL, read by GET /api/products/cards.
+CREATE OR REPLACE VIEW product_cards AS
+SELECT
+    p.id,
+    p.name,
+    p.price,
+    p.category_id,
+    (
+        SELECT pi.image_url
+        FROM product_images pi
+        WHERE pi.product_id = p.id
+        ORDER BY pi.is_primary DESC, pi.created_at ASC
+        LIMIT 1
+    ) AS primary_image_url,
+    (
+        COALESCE(p.stock_quantity, 0) > 0
+        OR EXISTS (
+            SELECT 1 FROM product_variants pv
+            WHERE pv.product_id = p.id AND pv.stock_quantity > 0
+        )
+    ) AS in_stock
+FROM products p;
+
+CREATE INDEX IF NOT EXISTS product_images_product_id_idx ON product_images (product_id, is_primary DESC, created_at);
+CREATE INDEX IF NOT EXISTS product_variants_product_id_idx ON product_variants (product_id);
+CREATE INDEX IF NOT EXISTS products_category_id_idx ON products (category_id);
+
+-- Places an order in a single round trip. The customer upsert (public
+-- checkout), delivery area lookup, order insert and item inserts run in the
+-- function's transaction, so a failure leaves nothing behind. The delivery
+-- fee comes priced in p_order; with p_free_delivery_threshold, it is waived
+-- when the items' subtotal reaches it. Returns one row: the order with its
+-- customer, delivery area and items.
+DROP FUNCTION IF EXISTS place_order(jsonb, jsonb, jsonb, boolean);
+DROP FUNCTION IF EXISTS place_order(jsonb, jsonb, jsonb, boolean, numeric);
+CREATE OR REPLACE FUNCTION place_order(
+    p_order jsonb,
+    p_items jsonb,
+    p_customer jsonb DEFAULT NULL,
+    p_free_delivery_threshold numeric DEFAULT NULL
+)
+RETURNS SETOF jsonb
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_customer customers;
+    v_area delivery_areas;
+    v_order orders;
+    v_fee numeric;
+BEGIN
+    IF p_customer IS NOT NULL THEN
+        INSERT INTO customers (name, phone_number, town, address_home, address_road, address_block)
+        SELECT c.name, c.phone_number, c.town, c.address_home, c.address_road, c.address_block
+        FROM jsonb_populate_record(NULL::customers, p_customer) c
+        ON CONFLICT (phone_number) DO UPDATE SET
+            name = EXCLUDED.name,
+            town = EXCLUDED.town,
+            address_home = EXCLUDED.address_home,
+            address_road = EXCLUDED.address_road,
+            address_block = EXCLUDED.address_block
+        RETURNING * INTO v_customer;
+    ELSE
+        SELECT * INTO v_customer FROM customers WHERE id = (p_order->>'customer_id')::bigint;
+        IF NOT FOUND THEN
+            RAISE EXCEPTION 'Invalid customer_id: %', p_order->>'customer_id';
+        END IF;
+    END IF;
+
+    IF p_order->>'delivery_area_id' IS NOT NULL THEN
+        SELECT * INTO v_area FROM delivery_areas WHERE id = (p_order->>'delivery_area_id')::bigint;
+        IF NOT FOUND THEN
+            RAISE EXCEPTION 'Invalid delivery_area_id: %', p_order->>'delivery_area_id';
+        END IF;
+    END IF;
+
+    v_fee := (p_order->>'delivery_fee')::numeric;
+
+    INSERT INTO orders (customer_id, shipping_method, status, comments, delivery_area_id, delivery_fee)
+    SELECT v_customer.id, o.shipping_method, COALESCE(o.status, 'processing'), o.comments, o.delivery_area_id, v_fee
+    FROM jsonb_populate_record(NULL::orders, p_order) o
+    RETURNING * INTO v_order;
+
+    -- Items are inserted in a fixed order so concurrent checkouts lock stock
+    -- rows in the same order and cannot deadlock.
+    INSERT INTO order_items (order_id, product_id, product_variant_id, quantity, stock_reserved)
+    SELECT v_order.id, i.product_id, i.product_variant_id, i.quantity, true
+    FROM jsonb_populate_recordset(NULL::order_items, p_items) i
+    ORDER BY i.product_variant_id NULLS LAST, i.product_id;
+
+    IF p_free_delivery_threshold > 0 AND v_order.delivery_fee > 0 AND (
+        SELECT COALESCE(sum(COALESCE(pv.price, p.price) * oi.quantity), 0)
+        FROM order_items oi
+        LEFT JOIN product_variants pv ON pv.id = oi.product_variant_id
+        LEFT JOIN products p ON p.id = oi.product_id
+        WHERE oi.order_id = v_order.id
+    ) >= p_free_delivery_threshold THEN
+        UPDATE orders SET delivery_fee = 0 WHERE id = v_order.id RETURNING * INTO v_order;
+    END IF;
+
+    RETURN NEXT to_jsonb(v_order) || jsonb_build_object(
+        'customer', to_jsonb(v_customer),
+        'delivery_area', CASE WHEN v_area.id IS NULL THEN NULL ELSE to_jsonb(v_area) END,
+        'order_items', COALESCE(
+            (SELECT jsonb_agg(to_jsonb(oi) || jsonb_build_object('product_variant', to_jsonb(pv)) ORDER BY oi.id)
+             FROM order_items oi LEFT JOIN product_variants pv ON pv.id = oi.product_variant_id
+             WHERE oi.order_id = v_order.id),
+            '[]'::jsonb
+        )
+    );
+END;
+$$;
+
+-- Inventory. Stock on hand is kept net of every order that is not cancelled:
+-- adding an item reserves its quantity, removing it (or deleting the order)
+-- returns it, and cancelling an order returns all of its items. Reservations
+-- are conditional decrements, so concurrent checkouts for the last units of
+-- a product serialize on its row lock and the losers fail with SQLSTATE
+-- PT409, which the API reports as 409 Conflict. A NULL stock_quantity means
+-- the stock is not tracked, and is never short.
+--
+-- Only items flagged stock_reserved take part. place_order and
+-- replace_order_items set the flag; items that existed before this migration
+-- never reserved anything, so cancelling or deleting them returns nothing.
+ALTER TABLE order_items ADD COLUMN IF NOT EXISTS stock_reserved boolean NOT NULL DEFAULT false;
+
+CREATE OR REPLACE FUNCTION reserve_stock(p_product_id bigint, p_variant_id bigint, p_quantity integer)
+RETURNS void
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_available integer;
+BEGIN
+    IF p_variant_id IS NOT NULL THEN
+        UPDATE product_variants SET stock_quantity = stock_quantity - p_quantity
+        WHERE id = p_variant_id AND (stock_quantity IS NULL OR stock_quantity >= p_quantity);
+        IF NOT FOUND THEN
+            SELECT stock_quantity INTO v_available FROM product_variants WHERE id = p_variant_id;
+            RAISE EXCEPTION 'Insufficient stock for product variant %: requested %, available %',
+                p_variant_id, p_quantity, COALESCE(v_available, 0)
+                USING ERRCODE = 'PT409';
+        END IF;
+    ELSE
+        UPDATE products SET stock_quantity = stock_quantity - p_quantity
+        WHERE id = p_product_id AND (stock_quantity IS NULL OR stock_quantity >= p_quantity);
+        IF NOT FOUND THEN
+            SELECT stock_quantity INTO v_available FROM products WHERE id = p_product_id;
+            RAISE EXCEPTION 'Insufficient stock for product %: requested %, available %',
+                p_product_id, p_quantity, COALESCE(v_available, 0)
+                USING ERRCODE = 'PT409';
+        END IF;
+    END IF;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION release_stock(p_product_id bigint, p_variant_id bigint, p_quantity integer)
+RETURNS void
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF p_variant_id IS NOT NULL THEN
+        UPDATE product_variants SET stock_quantity = stock_quantity + p_quantity WHERE id = p_variant_id;
+    ELSE
+        UPDATE products SET stock_quantity = stock_quantity + p_quantity WHERE id = p_product_id;
+    END IF;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION order_items_stock()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_item order_items;
+    v_status text;
+BEGIN
+    v_item := CASE WHEN TG_OP = 'DELETE' THEN OLD ELSE NEW END;
+    IF NOT v_item.stock_reserved THEN
+        RETURN NULL;
+    END IF;
+    SELECT status INTO v_status FROM orders WHERE id = v_item.order_id;
+    IF v_status IS NOT DISTINCT FROM 'cancelled' THEN
+        RETURN NULL;
+    END IF;
+    IF TG_OP = 'INSERT' THEN
+        PERFORM reserve_stock(v_item.product_id, v_item.product_variant_id, v_item.quantity);
+    ELSE
+        PERFORM release_stock(v_item.product_id, v_item.product_variant_id, v_item.quantity);
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS order_items_stock ON order_items;
+CREATE TRIGGER order_items_stock
+AFTER INSERT OR DELETE ON order_items
+FOR EACH ROW EXECUTE FUNCTION order_items_stock();
+
+CREATE OR REPLACE FUNCTION orders_status_stock()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_item order_items;
+BEGIN
+    IF NEW.status = 'cancelled' AND OLD.status <> 'cancelled' THEN
+        FOR v_item IN SELECT * FROM order_items WHERE order_id = NEW.id AND stock_reserved
+                      ORDER BY product_variant_id NULLS LAST, product_id LOOP
+            PERFORM release_stock(v_item.product_id, v_item.product_variant_id, v_item.quantity);
+        END LOOP;
+    ELSIF OLD.status = 'cancelled' AND NEW.status <> 'cancelled' THEN
+        FOR v_item IN SELECT * FROM order_items WHERE order_id = NEW.id AND stock_reserved
+                      ORDER BY product_variant_id NULLS LAST, product_id LOOP
+            PERFORM reserve_stock(v_item.product_id, v_item.product_variant_id, v_item.quantity);
+        END LOOP;
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS orders_status_stock ON orders;
+CREATE TRIGGER orders_status_stock
+AFTER UPDATE OF status ON orders
+FOR EACH ROW EXECUTE FUNCTION orders_status_stock();
+
+-- Replaces an order's items in one transaction, so a stock conflict on the
+-- new items leaves the old ones (and their reservations) in place. Returns
+-- the ids of every product whose stock changed.
+CREATE OR REPLACE FUNCTION replace_order_items(p_order_id bigint, p_items jsonb)
+RETURNS jsonb
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_product_ids bigint[];
+BEGIN
+    WITH removed AS (
+        DELETE FROM order_items WHERE order_id = p_order_id
+        RETURNING product_id, product_variant_id
+    )
+    SELECT array_agg(COALESCE(r.product_id, pv.product_id)) INTO v_product_ids
+    FROM removed r LEFT JOIN product_variants pv ON pv.id = r.product_variant_id;
+
+    INSERT INTO order_items (order_id, product_id, product_variant_id, quantity, stock_reserved)
+    SELECT p_order_id, i.product_id, i.product_variant_id, i.quantity, true
+    FROM jsonb_populate_recordset(NULL::order_items, p_items) i
+    ORDER BY i.product_variant_id NULLS LAST, i.product_id;
+
+    RETURN COALESCE((
+        SELECT jsonb_agg(DISTINCT product_id) FROM (
+            SELECT unnest(v_product_ids) AS product_id
+            UNION
+            SELECT COALESCE(i.product_id, pv.product_id)
+            FROM jsonb_populate_recordset(NULL::order_items, p_items) i
+            LEFT JOIN product_variants pv ON pv.id = i.product_variant_id
+        ) changed WHERE product_id IS NOT NULL
+    ), '[]'::jsonb);
+END;
+$$;
+
+-- Admin order listing: keyset pages on id, filters on status, customer,
+-- delivery area and creation date, and the order_items embed by order.
+CREATE INDEX IF NOT EXISTS orders_status_id_idx ON orders (status, id DESC);
+CREATE INDEX IF NOT EXISTS orders_customer_id_idx ON orders (customer_id, id DESC);
+CREATE INDEX IF NOT EXISTS orders_delivery_area_id_idx ON orders (delivery_area_id, id DESC);
+CREATE INDEX IF NOT EXISTS orders_created_at_idx ON orders (created_at);
+CREATE INDEX IF NOT EXISTS order_items_order_id_idx ON order_items (order_id);
+CREATE INDEX IF NOT EXISTS order_items_product_id_idx ON order_items (product_id);
+CREATE INDEX IF NOT EXISTS order_items_product_variant_id_idx ON order_items (product_variant_id);
+
+-- Computed column of products for the admin product listing
+-- (?has_orders=true): whether any order item refers to the product or to
+-- one of its variants.
+CREATE OR REPLACE FUNCTION has_orders(products)
+RETURNS boolean
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT EXISTS (SELECT 1 FROM order_items WHERE product_id = $1.id)
+        OR EXISTS (
+            SELECT 1 FROM order_items oi
+            JOIN product_variants pv ON pv.id = oi.product_variant_id
+            WHERE pv.product_id = $1.id
+        );
+$$;
+
+-- Incremental order feed (GET /api/admin/orders/changes). Every write to an
+-- order or its items bumps orders.updated_at, deletes leave a tombstone, and
+-- order_changes lists both in one (updated_at, id) keyset.
+ALTER TABLE orders ADD COLUMN IF NOT EXISTS updated_at timestamptz NOT NULL DEFAULT clock_timestamp();
+CREATE INDEX IF NOT EXISTS orders_updated_at_id_idx ON orders (updated_at, id);
+
+CREATE TABLE IF NOT EXISTS order_deletions (
+    order_id bigint PRIMARY KEY,
+    deleted_at timestamptz NOT NULL DEFAULT clock_timestamp()
+);
+CREATE INDEX IF NOT EXISTS order_deletions_deleted_at_idx ON order_deletions (deleted_at, order_id);
+
+CREATE OR REPLACE FUNCTION orders_touch_updated_at()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    NEW.updated_at := clock_timestamp();
+    RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS orders_touch_updated_at ON orders;
+CREATE TRIGGER orders_touch_updated_at
+BEFORE UPDATE ON orders
+FOR EACH ROW EXECUTE FUNCTION orders_touch_updated_at();
+
+CREATE OR REPLACE FUNCTION order_items_touch_order()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    UPDATE orders SET updated_at = clock_timestamp()
+    WHERE id IN (SELECT DISTINCT order_id FROM changed_items);
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS order_items_touch_order_insert ON order_items;
+CREATE TRIGGER order_items_touch_order_insert
+AFTER INSERT ON order_items
+REFERENCING NEW TABLE AS changed_items
+FOR EACH STATEMENT EXECUTE FUNCTION order_items_touch_order();
+
+DROP TRIGGER IF EXISTS order_items_touch_order_delete ON order_items;
+CREATE TRIGGER order_items_touch_order_delete
+AFTER DELETE ON order_items
+REFERENCING OLD TABLE AS changed_items
+FOR EACH STATEMENT EXECUTE FUNCTION order_items_touch_order();
+
+CREATE OR REPLACE FUNCTION orders_record_deletion()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    INSERT INTO order_deletions (order_id) VALUES (OLD.id)
+    ON CONFLICT (order_id) DO UPDATE SET deleted_at = EXCLUDED.deleted_at;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS orders_record_deletion ON orders;
+CREATE TRIGGER orders_record_deletion
+AFTER DELETE ON orders
+FOR EACH ROW EXECUTE FUNCTION orders_record_deletion();
+
+CREATE OR REPLACE VIEW order_changes AS
+SELECT id, updated_at, false AS deleted FROM orders
+UNION ALL
+SELECT order_id AS id, deleted_at AS updated_at, true AS deleted FROM order_deletions;
+
+-- Applies a product edit in one transaction: column changes, the variant
+-- diff (update listed ids, insert entries without an id, delete the rest)
+-- and the image list (delete unlisted images, settle the primary). Keys
+-- missing from p_product or from a variant entry keep their current value;
+-- a NULL p_variants or p_images leaves that list alone. Returns one row,
+-- {product}, or none if the product does not exist. The files of removed
+-- images are cleaned up by the product_images_remove_files trigger.
+CREATE OR REPLACE FUNCTION update_product_bulk(
+    p_product_id bigint,
+    p_product jsonb DEFAULT '{}'::jsonb,
+    p_variants jsonb DEFAULT NULL,
+    p_images jsonb DEFAULT NULL
+)
+RETURNS SETOF jsonb
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_primary_id bigint;
+BEGIN
+    -- Serializes concurrent edits of the same product.
+    PERFORM 1 FROM products WHERE id = p_product_id FOR UPDATE;
+    IF NOT FOUND THEN
+        RETURN;
+    END IF;
+
+    IF p_product <> '{}'::jsonb THEN
+        UPDATE products p
+        SET (name, description, price, stock_quantity, category_id) = (
+            SELECT m.name, m.description, m.price, m.stock_quantity, m.category_id
+            FROM jsonb_populate_record(p, p_product) m
+        )
+        WHERE p.id = p_product_id;
+    END IF;
+
+    IF p_variants IS NOT NULL THEN
+        IF EXISTS (
+            SELECT 1 FROM order_items oi
+            JOIN product_variants v ON v.id = oi.product_variant_id
+            WHERE v.product_id = p_product_id
+              AND v.id NOT IN (
+                  SELECT (e->>'id')::bigint FROM jsonb_array_elements(p_variants) e WHERE e->>'id' IS NOT NULL
+              )
+        ) THEN
+            RAISE EXCEPTION 'Cannot delete product variants that are part of an existing order.'
+                USING ERRCODE = 'PT409';
+        END IF;
+
+        DELETE FROM product_variants v
+        WHERE v.product_id = p_product_id
+          AND v.id NOT IN (
+              SELECT (e->>'id')::bigint FROM jsonb_array_elements(p_variants) e WHERE e->>'id' IS NOT NULL
+          );
+
+        UPDATE product_variants v
+        SET (name, price, stock_quantity, image_url) = (
+            SELECT m.name, m.price, m.stock_quantity, m.image_url
+            FROM jsonb_populate_record(v, e.value) m
+        )
+        FROM jsonb_array_elements(p_variants) e
+        WHERE v.id = (e.value->>'id')::bigint AND v.product_id = p_product_id;
+
+        INSERT INTO product_variants (product_id, name, price, stock_quantity, image_url)
+        SELECT p_product_id, m.name, m.price, m.stock_quantity, m.image_url
+        FROM jsonb_array_elements(p_variants) e,
+             jsonb_populate_record(NULL::product_variants, e.value) m
+        WHERE e.value->>'id' IS NULL;
+    END IF;
+
+    IF p_images IS NOT NULL THEN
+        DELETE FROM product_images i
+        WHERE i.product_id = p_product_id
+          AND i.id NOT IN (SELECT (e->>'id')::bigint FROM jsonb_array_elements(p_images) e);
+
+        SELECT (e->>'id')::bigint INTO v_primary_id
+        FROM jsonb_array_elements(p_images) e
+        WHERE (e->>'is_primary')::boolean
+        LIMIT 1;
+        IF v_primary_id IS NULL AND NOT EXISTS (
+            SELECT 1 FROM product_images WHERE product_id = p_product_id AND is_primary
+        ) THEN
+            SELECT id INTO v_primary_id FROM product_images
+            WHERE product_id = p_product_id ORDER BY created_at LIMIT 1;
+        END IF;
+        IF v_primary_id IS NOT NULL THEN
+            UPDATE product_images SET is_primary = (id = v_primary_id)
+            WHERE product_id = p_product_id AND is_primary IS DISTINCT FROM (id = v_primary_id);
+        END IF;
+    END IF;
+
+    RETURN NEXT jsonb_build_object(
+        'product', (
+            SELECT to_jsonb(p) || jsonb_build_object(
+                'category', (SELECT to_jsonb(c) FROM categories c WHERE c.id = p.category_id),
+                'product_images', COALESCE((SELECT jsonb_agg(to_jsonb(i) ORDER BY i.created_at) FROM product_images i WHERE i.product_id = p.id), '[]'::jsonb),
+                'product_variants', COALESCE((SELECT jsonb_agg(to_jsonb(v) ORDER BY v.id) FROM product_variants v WHERE v.product_id = p.id), '[]'::jsonb)
+            )
+            FROM products p WHERE p.id = p_product_id
+        )
+    );
+END;
+$$;
+
+-- Responsive images: uploads are resized into WebP/AVIF renditions at fixed
+-- widths. Each rendition is {url, width, height, format}; image_url points at
+-- the largest WebP so older clients keep working. placeholder is a tiny
+-- blurred data URI shown while the real image loads.
+ALTER TABLE product_images ADD COLUMN IF NOT EXISTS renditions jsonb NOT NULL DEFAULT '[]'::jsonb;
+ALTER TABLE product_images ADD COLUMN IF NOT EXISTS placeholder text;
+ALTER TABLE product_images ADD COLUMN IF NOT EXISTS width integer;
+ALTER TABLE product_images ADD COLUMN IF NOT EXISTS height integer;
+ALTER TABLE product_variants ADD COLUMN IF NOT EXISTS image_renditions jsonb NOT NULL DEFAULT '[]'::jsonb;
+ALTER TABLE product_variants ADD COLUMN IF NOT EXISTS image_placeholder text;
+
+CREATE OR REPLACE VIEW product_cards AS
+SELECT
+    p.id,
+    p.name,
+    p.price,
+    p.category_id,
+    pi.image_url AS primary_image_url,
+    (
+        COALESCE(p.stock_quantity, 0) > 0
+        OR EXISTS (
+            SELECT 1 FROM product_variants pv
+            WHERE pv.product_id = p.id AND pv.stock_quantity > 0
+        )
+    ) AS in_stock,
+    COALESCE(pi.renditions, '[]'::jsonb) AS primary_image_renditions,
+    pi.placeholder AS primary_image_placeholder
+FROM products p
+LEFT JOIN LATERAL (
+    SELECT i.image_url, i.renditions, i.placeholder
+    FROM product_images i
+    WHERE i.product_id = p.id
+    ORDER BY i.is_primary DESC, i.created_at ASC
+    LIMIT 1
+) pi ON true;
+
+-- Background jobs: durable queue for slow side effects such as storage
+-- deletes and image processing, worked by app/jobs.py in each API process.
+-- Workers claim due jobs with SKIP LOCKED under a lease; a job whose lease
+-- runs out (its worker died) is claimed again. Failures are retried with
+-- backoff until max_attempts, then left as 'failed'. A dedupe_key keeps at
+-- most one queued or running job per key (used for periodic jobs).
+CREATE TABLE IF NOT EXISTS jobs (
+    id bigserial PRIMARY KEY,
+    kind text NOT NULL,
+    payload jsonb NOT NULL DEFAULT '{}'::jsonb,
+    status text NOT NULL DEFAULT 'queued' CHECK (status IN ('queued', 'running', 'done', 'failed')),
+    attempts integer NOT NULL DEFAULT 0,
+    max_attempts integer NOT NULL DEFAULT 5,
+    run_at timestamptz NOT NULL DEFAULT now(),
+    locked_until timestamptz,
+    last_error text,
+    dedupe_key text,
+    created_at timestamptz NOT NULL DEFAULT now(),
+    updated_at timestamptz NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS jobs_due_idx ON jobs (run_at, id) WHERE status IN ('queued', 'running');
+CREATE INDEX IF NOT EXISTS jobs_finished_idx ON jobs (updated_at) WHERE status = 'done';
+CREATE UNIQUE INDEX IF NOT EXISTS jobs_dedupe_key_idx ON jobs (dedupe_key) WHERE status IN ('queued', 'running');
+
+CREATE OR REPLACE FUNCTION enqueue_job(
+    p_kind text,
+    p_payload jsonb DEFAULT '{}'::jsonb,
+    p_delay_seconds double precision DEFAULT 0,
+    p_dedupe_key text DEFAULT NULL,
+    p_max_attempts integer DEFAULT 5
+)
+RETURNS SETOF jobs
+LANGUAGE sql
+AS $$
+    INSERT INTO jobs (kind, payload, run_at, dedupe_key, max_attempts)
+    VALUES (p_kind, p_payload, now() + make_interval(secs => p_delay_seconds), p_dedupe_key, p_max_attempts)
+    ON CONFLICT (dedupe_key) WHERE status IN ('queued', 'running') DO NOTHING
+    RETURNING *;
+$$;
+
+CREATE OR REPLACE FUNCTION claim_jobs(p_limit integer, p_lease_seconds integer)
+RETURNS SETOF jobs
+LANGUAGE sql
+AS $$
+    UPDATE jobs j
+    SET status = 'running',
+        attempts = j.attempts + 1,
+        locked_until = now() + make_interval(secs => p_lease_seconds),
+        updated_at = now()
+    WHERE j.id IN (
+        SELECT id FROM jobs
+        WHERE (status = 'queued' AND run_at <= now())
+           OR (status = 'running' AND locked_until < now())
+        ORDER BY run_at, id
+        LIMIT p_limit
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING j.*;
+$$;
+
+-- Every public URL of the products bucket still in use; the orphan sweeper
+-- keeps these and the removal triggers below skip them.
+CREATE OR REPLACE VIEW storage_references AS
+SELECT image_url AS url FROM product_images
+UNION
+SELECT r->>'url' FROM product_images, jsonb_array_elements(renditions) r
+UNION
+SELECT image_url FROM product_variants WHERE image_url IS NOT NULL
+UNION
+SELECT r->>'url' FROM product_variants, jsonb_array_elements(image_renditions) r;
+
+-- Queues a 'storage.remove' job for the given URLs that nothing references
+-- any more. Called from triggers, so the job commits with the delete that
+-- orphaned the files, including deletes cascading from products.
+CREATE OR REPLACE FUNCTION enqueue_storage_removal(p_urls jsonb)
+RETURNS void
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_urls jsonb;
+BEGIN
+    SELECT jsonb_agg(DISTINCT u.url) INTO v_urls
+    FROM jsonb_array_elements_text(COALESCE(p_urls, '[]'::jsonb)) u(url)
+    WHERE u.url IS NOT NULL
+      AND NOT EXISTS (SELECT 1 FROM storage_references s WHERE s.url = u.url);
+    IF v_urls IS NOT NULL THEN
+        INSERT INTO jobs (kind, payload) VALUES ('storage.remove', jsonb_build_object('urls', v_urls));
+    END IF;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION product_images_remove_files()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    PERFORM enqueue_storage_removal((
+        SELECT jsonb_agg(u.url)
+        FROM old_images o,
+             LATERAL (
+                 SELECT o.image_url AS url
+                 UNION ALL
+                 SELECT r->>'url' FROM jsonb_array_elements(o.renditions) r
+             ) u
+    ));
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS product_images_remove_files ON product_images;
+CREATE TRIGGER product_images_remove_files
+AFTER DELETE ON product_images
+REFERENCING OLD TABLE AS old_images
+FOR EACH STATEMENT EXECUTE FUNCTION product_images_remove_files();
+
+-- Variant images are removed when the variant is deleted or its image is
+-- replaced.
+CREATE OR REPLACE FUNCTION product_variants_remove_files()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        PERFORM enqueue_storage_removal((
+            SELECT jsonb_agg(u.url)
+            FROM old_variants o,
+                 LATERAL (
+                     SELECT o.image_url AS url
+                     UNION ALL
+                     SELECT r->>'url' FROM jsonb_array_elements(o.image_renditions) r
+                 ) u
+        ));
+    ELSE
+        PERFORM enqueue_storage_removal((
+            SELECT jsonb_agg(u.url)
+            FROM old_variants o
+            JOIN new_variants n ON n.id = o.id AND n.image_url IS DISTINCT FROM o.image_url,
+                 LATERAL (
+                     SELECT o.image_url AS url
+                     UNION ALL
+                     SELECT r->>'url' FROM jsonb_array_elements(o.image_renditions) r
+                 ) u
+        ));
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS product_variants_remove_files_delete ON product_variants;
+CREATE TRIGGER product_variants_remove_files_delete
+AFTER DELETE ON product_variants
+REFERENCING OLD TABLE AS old_variants
+FOR EACH STATEMENT EXECUTE FUNCTION product_variants_remove_files();
+
+DROP TRIGGER IF EXISTS product_variants_remove_files_update ON product_variants;
+CREATE TRIGGER product_variants_remove_files_update
+AFTER UPDATE ON product_variants
+REFERENCING OLD TABLE AS old_variants NEW TABLE AS new_variants
+FOR EACH STATEMENT EXECUTE FUNCTION product_variants_remove_files();
+
+-- Store config. The API keeps app_settings and delivery_areas in memory; it
+-- loads both with get_store_config() and polls store_config_version, which
+-- every change to either table bumps, to notice edits made elsewhere.
+CREATE TABLE IF NOT EXISTS store_config_version (
+    id boolean PRIMARY KEY DEFAULT true CHECK (id),
+    version bigint NOT NULL DEFAULT 1
+);
+INSERT INTO store_config_version (id) VALUES (true) ON CONFLICT (id) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION bump_store_config_version()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    UPDATE store_config_version SET version = version + 1;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS app_settings_bump_store_config ON app_settings;
+CREATE TRIGGER app_settings_bump_store_config
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON app_settings
+FOR EACH STATEMENT EXECUTE FUNCTION bump_store_config_version();
+
+DROP TRIGGER IF EXISTS delivery_areas_bump_store_config ON delivery_areas;
+CREATE TRIGGER delivery_areas_bump_store_config
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON delivery_areas
+FOR EACH STATEMENT EXECUTE FUNCTION bump_store_config_version();
+
+CREATE OR REPLACE FUNCTION get_store_config()
+RETURNS SETOF jsonb
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT jsonb_build_object(
+        'version', (SELECT version FROM store_config_version),
+        'settings', COALESCE((SELECT jsonb_agg(to_jsonb(s)) FROM app_settings s), '[]'::jsonb),
+        'delivery_areas', COALESCE((SELECT jsonb_agg(to_jsonb(a) ORDER BY a.id) FROM delivery_areas a), '[]'::jsonb)
+    );
+$$;
+
+-- Cache coherence between API processes. Each process appends the cache
+-- invalidations it makes and reads the other processes' ones every second
+-- or so; a periodic job deletes events older than an hour.
+CREATE TABLE IF NOT EXISTS cache_invalidations (
+    id bigserial PRIMARY KEY,
+    origin text NOT NULL,
+    kind text NOT NULL,
+    target_id bigint,
+    created_at timestamptz NOT NULL DEFAULT now()
+);
+CREATE INDEX IF NOT EXISTS cache_invalidations_created_at_idx ON cache_invalidations (created_at);
@@ -2,14 +2,22 @@ import React, { useState } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { Plus } from 'lucide-react';
 import AddToCartDialog from '../modals/AddToCartDialog';
+import TransformedImage from './TransformedImage';
+import { productService } from '../../services/api';
 
 const ProductGrid = ({ products = [] }) => {
   const navigate = useNavigate();
   const [selectedProduct, setSelectedProduct] = useState(null);
 
-  const handleAddToCartClick = (e, product) => {
+  const handleAddToCartClick = async (e, product) => {
     e.stopPropagation();
-    setSelectedProduct(product);
+    // Grid cards carry no variants; the dialog needs the full product.
+    try {
+      const response = await productService.getProduct(product.id);
+      setSelectedProduct(response.data);
+    } catch (error) {
+      console.error('Error fetching product:', error);
+    }
   };
 
   const closeDialog = () => {
@@ -27,8 +35,11 @@ const ProductGrid = ({ products = [] }) => {
           {/* Image */}
           <div className="aspect-square bg-gray-200">
             {product.primary_image_url ? (
-              <img
-                src={product.primary_image_url}
+              <TransformedImage
+                url={product.primary_image_url}
+                renditions={product.primary_image_renditions}
+                placeholder={product.primary_image_placeholder}
+                sizes="(min-width: 1024px) 25vw, 50vw"
                 alt={product.name}
                 className="w-full h-full object-cover"
                 onError={(e) => {
@@ -68,14 +79,10 @@ const ProductGrid = ({ products = [] }) => {
 
           {/* Info */}
           <div className="p-3">
-            <h3 className="font-semibold text-sm sm:text-base mb-1 line-clamp-2">
+            <h3 className="font-semibold text-sm sm:text-base mb-3 line-clamp-2">
               {product.name}
             </h3>
 
-            <p className="text-gray-600 text-xs sm:text-sm mb-3 line-clamp-2">
-              {product.description}
-            </p>
-
             <div className="flex items-center justify-between">
               <span className="text-base font-bold text-brand-purple">
                 {product.price} د.ب
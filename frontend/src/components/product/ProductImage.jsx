@@ -13,6 +13,9 @@ const ProductImage = ({ image, isPrimary, onRemove, onSetPrimary, onView, onDown
       <div className="w-full h-full rounded-lg overflow-hidden border border-soft-border">
         <TransformedImage
           url={imageUrl}
+          renditions={image.file ? [] : image.renditions}
+          placeholder={image.placeholder}
+          sizes="200px"
           alt={t('productManagement.imageAlt')}
           className="w-full h-full object-cover"
         />
@@ -1,7 +1,47 @@
 import React from 'react';
 
-const TransformedImage = ({ url, alt, ...props }) => {
-  return <img src={url} alt={alt} {...props} />;
+// Browsers pick the first <source> whose type they support, so AVIF goes first.
+const FORMATS = ['avif', 'webp'];
+
+const srcSetFor = (renditions, format) => renditions
+  .filter(r => r.format === format)
+  .map(r => `${r.url} ${r.width}w`)
+  .join(', ');
+
+/**
+ * Renders an uploaded image at the size the layout needs. With `renditions`
+ * ({ url, width, height, format } from the API) it lets the browser choose
+ * a width via `sizes`, and shows the blurred `placeholder` until it loads.
+ * Older images without renditions fall back to a plain <img> of `url`.
+ */
+const TransformedImage = ({ url, alt, renditions = [], placeholder, sizes = '100vw', style, ...props }) => {
+  if (!renditions?.length) {
+    return <img src={url} alt={alt} style={style} {...props} />;
+  }
+
+  const largest = renditions.reduce((a, b) => (b.width > a.width ? b : a));
+  const placeholderStyle = placeholder
+    ? { backgroundImage: `url(${placeholder})`, backgroundSize: 'cover', backgroundPosition: 'center' }
+    : {};
+
+  return (
+    <picture>
+      {FORMATS.map(format => {
+        const srcSet = srcSetFor(renditions, format);
+        return srcSet ? <source key={format} type={`image/${format}`} srcSet={srcSet} sizes={sizes} /> : null;
+      })}
+      <img
+        src={url}
+        alt={alt}
+        width={largest.width}
+        height={largest.height}
+        loading="lazy"
+        decoding="async"
+        style={{ ...placeholderStyle, ...style }}
+        {...props}
+      />
+    </picture>
+  );
 };
 
 export default TransformedImage;
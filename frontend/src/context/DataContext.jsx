@@ -1,11 +1,16 @@
 import React, { createContext, useState, useEffect, useCallback, useContext } from 'react';
-import { apiService, getAllTranslations } from '../services/api';
+import { apiService, getAllTranslations, getTranslationBundle, getVersionedTranslationBundle } from '../services/api';
 import { AuthContext } from './AuthContext';
 import { useLoading } from './LoadingContext';
 import i18n from '../i18n/config';
 
 export const DataContext = createContext();
 
+const TRANSLATIONS_VERSION_KEY = 'translationsVersion';
+
+const toTranslationsMap = (translationsList) =>
+  Object.fromEntries(translationsList.map(t => [t.key, t.value]));
+
 export const DataProvider = ({ children }) => {
   const { token, isLoading: isAuthLoading } = useContext(AuthContext);
   const { showLoading, hideLoading } = useLoading();
@@ -18,16 +23,17 @@ export const DataProvider = ({ children }) => {
   const [translations, setTranslations] = useState([]);
   const [error, setError] = useState('');
 
-  const updateI18nResources = (translationsData) => {
+  // Takes a flat { 'a.b': value } dict, as served by the translation bundle.
+  const updateI18nResources = (translationsMap) => {
     const resources = {
       ar: { translation: {} },
     };
-    translationsData.forEach(t => {
-      const keys = t.key.split('.');
+    Object.entries(translationsMap).forEach(([fullKey, value]) => {
+      const keys = fullKey.split('.');
       let currentLevel = resources.ar.translation;
       keys.forEach((key, index) => {
         if (index === keys.length - 1) {
-          currentLevel[key] = t.value;
+          currentLevel[key] = value;
         } else {
           currentLevel[key] = currentLevel[key] || {};
           currentLevel = currentLevel[key];
@@ -41,34 +47,39 @@ export const DataProvider = ({ children }) => {
   const fetchData = useCallback(async () => {
     showLoading();
     try {
+      // The storefront loads product cards a page at a time itself.
       const publicDataPromises = [
-        apiService.getAllProducts(),
         apiService.getAllCategories(),
-        getAllTranslations(),
+        getTranslationBundle(),
       ];
 
-      const [productsRes, categoriesRes, translationsRes] = await Promise.all(publicDataPromises);
-      setProducts(productsRes.data);
+      const [categoriesRes, bundleRes] = await Promise.all(publicDataPromises);
       setCategories(categoriesRes);
-      setTranslations(translationsRes);
-      updateI18nResources(translationsRes);
+      updateI18nResources(bundleRes.translations);
+      localStorage.setItem(TRANSLATIONS_VERSION_KEY, bundleRes.version);
 
       if (token) {
-        const [customersRes, ordersRes, deliveryAreasRes, appSettingsRes] = await Promise.all([
+        // Orders are loaded a page at a time by the order list, into `orders`.
+        // The full product list is for the admin's order form pickers.
+        const [productsRes, customersRes, deliveryAreasRes, appSettingsRes, translationsRes] = await Promise.all([
+          apiService.getAllProducts(),
           apiService.getAllCustomers(),
-          apiService.getAllOrders(),
           apiService.getAllDeliveryAreas(),
           apiService.getAppSettings(),
+          getAllTranslations(),
         ]);
+        setTranslations(translationsRes);
+        setProducts(productsRes.data);
         setCustomers(customersRes.data);
-        setOrders(ordersRes.data);
         setDeliveryAreas(deliveryAreasRes.data);
         setAppSettings(appSettingsRes.data);
       } else {
+        setProducts([]);
         setCustomers([]);
         setOrders([]);
         setDeliveryAreas([]);
         setAppSettings({});
+        setTranslations([]);
       }
 
       setError('');
@@ -86,6 +97,16 @@ export const DataProvider = ({ children }) => {
     }
   }, [token, showLoading, hideLoading]);
 
+  // The last bundle seen is in the browser's cache under its version, so the
+  // page is translated before the current bundle arrives with fetchData.
+  useEffect(() => {
+    const version = localStorage.getItem(TRANSLATIONS_VERSION_KEY);
+    if (!version) return;
+    getVersionedTranslationBundle(version)
+      .then(bundle => updateI18nResources(bundle.translations))
+      .catch(() => localStorage.removeItem(TRANSLATIONS_VERSION_KEY));
+  }, []);
+
   useEffect(() => {
     if (!isAuthLoading) {
       fetchData();
@@ -159,7 +180,7 @@ export const DataProvider = ({ children }) => {
   const updateTranslation = (updatedTranslation) => {
     setTranslations(prev => {
       const newTranslations = prev.map(t => t.id === updatedTranslation.id ? updatedTranslation : t);
-      updateI18nResources(newTranslations);
+      updateI18nResources(toTranslationsMap(newTranslations));
       return newTranslations;
     });
   };
@@ -167,7 +188,7 @@ export const DataProvider = ({ children }) => {
   const addTranslation = (translation) => {
     setTranslations(prev => {
       const newTranslations = [translation, ...prev];
-      updateI18nResources(newTranslations);
+      updateI18nResources(toTranslationsMap(newTranslations));
       return newTranslations;
     });
   };
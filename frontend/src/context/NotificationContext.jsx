@@ -1,4 +1,4 @@
-import React, { createContext, useContext } from 'react';
+import React, { createContext, useContext, useCallback } from 'react';
 import toast from 'react-hot-toast';
 
 const NotificationContext = createContext();
@@ -6,7 +6,8 @@ const NotificationContext = createContext();
 export const useNotifier = () => useContext(NotificationContext);
 
 export const NotificationProvider = ({ children }) => {
-  const notify = (message, type = 'success') => {
+  // Stable, so components can list it as a dependency of their effects.
+  const notify = useCallback((message, type = 'success') => {
     switch (type) {
       case 'success':
         toast.success(message);
@@ -17,7 +18,7 @@ export const NotificationProvider = ({ children }) => {
       default:
         toast(message);
     }
-  };
+  }, []);
 
   return (
     <NotificationContext.Provider value={notify}>
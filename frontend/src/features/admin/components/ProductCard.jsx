@@ -4,9 +4,10 @@ import TransformedImage from '../../../components/product/TransformedImage';
 
 const ProductCard = ({ product, onEdit, onDelete, optimistic }) => {
   // Find the primary image or use the first available image
-  const primaryImage = product.primary_image_url ||
-    product.product_images?.find(img => img.is_primary)?.image_url ||
-    product.product_images?.[0]?.image_url;
+  const primaryRecord = product.product_images?.find(img => img.is_primary) || product.product_images?.[0];
+  const primaryImage = product.primary_image_url || primaryRecord?.image_url;
+  const primaryRenditions = product.primary_image_renditions || primaryRecord?.renditions;
+  const primaryPlaceholder = product.primary_image_placeholder || primaryRecord?.placeholder;
 
   // Calculate total stock: if variants exist, sum their quantities; otherwise use product stock
   const totalStock = product.product_variants && product.product_variants.length > 0
@@ -25,6 +26,9 @@ const ProductCard = ({ product, onEdit, onDelete, optimistic }) => {
         {primaryImage ? (
           <TransformedImage
             url={primaryImage}
+            renditions={primaryRenditions}
+            placeholder={primaryPlaceholder}
+            sizes="(min-width: 1024px) 25vw, 50vw"
             alt={product.name}
             className="w-full aspect-square object-cover rounded-lg"
           />
@@ -1,7 +1,7 @@
-import React, { useState, useContext } from 'react';
+import React, { useState, useContext, useEffect, useCallback, useRef } from 'react';
 import { useTranslation } from 'react-i18next';
 import { Plus } from 'lucide-react';
-import { apiService } from '../../../services/api';
+import { apiService, subscribeToOrderChanges } from '../../../services/api';
 import SearchBar from '../../../components/common/SearchBar';
 import Modal from '../../../components/modals/Modal';
 import LoadingScreen from '../../../components/common/LoadingScreen';
@@ -10,6 +10,7 @@ import OrderCard from '../components/OrderCard';
 import OrderDetails from '../components/OrderDetails';
 import ConfirmationModal from '../../../components/modals/ConfirmationModal';
 import Dropdown from '../../../components/common/Dropdown';
+import Pagination from '../../../components/common/Pagination';
 import { DataContext } from '../../../context/DataContext';
 import { SearchContext } from '../../../context/SearchContext';
 import { useNotifier } from '../../../context/NotificationContext';
@@ -27,6 +28,44 @@ const OrderManagement = () => {
   const [viewingOrder, setViewingOrder] = useState(null);
   const [isConfirmModalOpen, setIsConfirmModalOpen] = useState(false);
   const [deletingOrderId, setDeletingOrderId] = useState(null);
+  const [currentPage, setCurrentPage] = useState(1);
+  const [itemsPerPage] = useState(20);
+  const [totalOrders, setTotalOrders] = useState(0);
+  const latestRequest = useRef(0);
+
+  // The server filters and pages the orders; `orders` holds the current page.
+  const fetchOrdersPage = useCallback(async () => {
+    const request = ++latestRequest.current;
+    try {
+      const page = await apiService.getOrdersPage({
+        limit: itemsPerPage,
+        offset: (currentPage - 1) * itemsPerPage,
+        q: searchTerm.trim() || undefined,
+        customer_id: selectedCustomer ?? undefined,
+        product_id: selectedProduct ?? undefined,
+      });
+      // A slower response for earlier filters must not replace a newer page.
+      if (request !== latestRequest.current) return;
+      setOrders(page.items);
+      setTotalOrders(page.total ?? page.items.length);
+    } catch (error) {
+      const errorMsg = error.response?.data?.detail || t('orderManagement.errors.fetch');
+      notify(errorMsg, 'error');
+    }
+  }, [currentPage, itemsPerPage, searchTerm, selectedCustomer, selectedProduct, setOrders, notify, t]);
+
+  useEffect(() => {
+    // Wait for a pause in typing before searching.
+    const timer = setTimeout(fetchOrdersPage, searchTerm ? 300 : 0);
+    return () => clearTimeout(timer);
+  }, [fetchOrdersPage, searchTerm]);
+
+  const refreshPage = useRef(fetchOrdersPage);
+  refreshPage.current = fetchOrdersPage;
+
+  // Orders placed or edited elsewhere (the storefront, another admin)
+  // refresh the page being shown.
+  useEffect(() => subscribeToOrderChanges(() => refreshPage.current()), []);
 
   const updateOrderState = (updatedOrder) => {
     updateOrder(updatedOrder);
@@ -36,6 +75,7 @@ const OrderManagement = () => {
     try {
       await apiService.deleteOrder(orderId);
       removeOrder(orderId);
+      fetchOrdersPage();
       notify(t('orderManagement.notifications.deleted'));
     } catch (err) {
       const errorMsg = err.response?.data?.detail || t('orderManagement.errors.delete');
@@ -60,8 +100,7 @@ const OrderManagement = () => {
 
   const handleSuccess = async () => {
     try {
-      const response = await apiService.getAllOrders();
-      setOrders(response.data);
+      await fetchOrdersPage();
       notify(editingOrder ? t('orderManagement.notifications.updated') : t('orderManagement.notifications.added'));
     } catch (error) {
       const errorMsg = error.response?.data?.detail || t('orderManagement.errors.fetch');
@@ -84,14 +123,6 @@ const OrderManagement = () => {
     setDeletingOrderId(null);
   };
 
-  const filteredOrders = orders.filter(order => {
-    const searchMatch = (order.customer && order.customer.name.toLowerCase().includes(searchTerm.toLowerCase())) ||
-      order.id.toString().includes(searchTerm);
-    const customerMatch = selectedCustomer ? order.customer_id === selectedCustomer : true;
-    const productMatch = selectedProduct ? order.order_items.some(item => item.product_id === selectedProduct) : true;
-    return searchMatch && customerMatch && productMatch;
-  });
-
   if (isLoading) return <LoadingScreen fullScreen={false} />;
 
   return (
@@ -107,20 +138,20 @@ const OrderManagement = () => {
       </div>
 
       <div className="mb-4">
-        <SearchBar value={searchTerm} onChange={(e) => setSearchTerm(e.target.value)} />
+        <SearchBar value={searchTerm} onChange={(e) => { setSearchTerm(e.target.value); setCurrentPage(1); }} />
       </div>
 
       <div className="mb-8 grid grid-cols-1 md:grid-cols-2 gap-4">
         <Dropdown
           options={[{ value: null, label: t('common.allCustomers') }, ...customers.map(c => ({ value: c.id, label: c.name }))]}
           value={selectedCustomer}
-          onChange={(option) => setSelectedCustomer(option.value)}
+          onChange={(option) => { setSelectedCustomer(option.value); setCurrentPage(1); }}
           placeholder={t('common.filterByCustomer')}
         />
         <Dropdown
           options={[{ value: null, label: t('common.allProducts') }, ...products.map(p => ({ value: p.id, label: p.name }))]}
           value={selectedProduct}
-          onChange={(option) => setSelectedProduct(option.value)}
+          onChange={(option) => { setSelectedProduct(option.value); setCurrentPage(1); }}
           placeholder={t('common.filterByProduct')}
         />
       </div>
@@ -128,7 +159,7 @@ const OrderManagement = () => {
       {dataError && <div className="text-red-500">{dataError}</div>}
 
       <div className="grid grid-cols-1 sm:grid-cols-2 md:grid-cols-3 lg:grid-cols-4 gap-4">
-        {filteredOrders.map((order) => (
+        {orders.map((order) => (
           <OrderCard
             key={order.id}
             order={order}
@@ -138,6 +169,16 @@ const OrderManagement = () => {
           />
         ))}
       </div>
+      <div className="flex justify-center mt-8">
+        {totalOrders > itemsPerPage && (
+          <Pagination
+            currentPage={currentPage}
+            totalItems={totalOrders}
+            itemsPerPage={itemsPerPage}
+            onPageChange={setCurrentPage}
+          />
+        )}
+      </div>
 
       <Modal
         isOpen={isModalOpen}
@@ -1,4 +1,4 @@
-import React, { useState, useContext } from 'react';
+import React, { useState, useContext, useEffect, useCallback, useRef } from 'react';
 import { useTranslation } from 'react-i18next';
 import { DataContext } from '../../../context/DataContext';
 import { SearchContext } from '../../../context/SearchContext';
@@ -24,7 +24,6 @@ const ProductManagement = () => {
   const {
     products,
     categories,
-    orders,
     isLoading,
     error: dataError,
     addProduct,
@@ -48,8 +47,37 @@ const ProductManagement = () => {
   const [lightboxImageUrl, setLightboxImageUrl] = useState('');
   const [currentPage, setCurrentPage] = useState(1);
   const [itemsPerPage] = useState(20);
+  const [pageProducts, setPageProducts] = useState([]);
+  const [totalProducts, setTotalProducts] = useState(0);
+  const latestRequest = useRef(0);
   const [error, setError] = useState('');
 
+  // The server filters and pages the product list; only the current page is loaded.
+  const fetchProductsPage = useCallback(async () => {
+    const request = ++latestRequest.current;
+    try {
+      const page = await apiService.getAdminProductsPage({
+        limit: itemsPerPage,
+        offset: (currentPage - 1) * itemsPerPage,
+        q: searchTerm.trim() || undefined,
+        category_id: selectedCategory ?? undefined,
+        has_orders: orderFilter ? orderFilter === 'with-orders' : undefined,
+      });
+      // A slower response for earlier filters must not replace a newer page.
+      if (request !== latestRequest.current) return;
+      setPageProducts(page.items);
+      setTotalProducts(page.total ?? page.items.length);
+    } catch (err) {
+      notify(err.response?.data?.detail || t('productManagement.errors.unexpected'), 'error');
+    }
+  }, [currentPage, itemsPerPage, searchTerm, selectedCategory, orderFilter, notify, t]);
+
+  useEffect(() => {
+    // Wait for a pause in typing before searching.
+    const timer = setTimeout(fetchProductsPage, searchTerm ? 300 : 0);
+    return () => clearTimeout(timer);
+  }, [fetchProductsPage, searchTerm]);
+
 
   const initialFormState = {
     name: '',
@@ -353,9 +381,16 @@ const ProductManagement = () => {
       const newImages = editingProduct.product_images.filter(img => img.file);
       if (newImages.length > 0) {
         setUploadingImages(true);
-        const uploadPromises = newImages.map(img => apiService.uploadImage(productData.id, img.file));
-        await Promise.all(uploadPromises);
+        // The batch endpoint takes up to 20 files (IMAGE_UPLOAD_MAX_FILES) per request.
+        const results = [];
+        for (let i = 0; i < newImages.length; i += 20) {
+          const { data } = await apiService.uploadImages(productData.id, newImages.slice(i, i + 20).map(img => img.file));
+          results.push(...data);
+        }
         setUploadingImages(false);
+        results.filter(result => result.error).forEach(result => {
+          console.error(`Error uploading ${result.filename}:`, result.error);
+        });
       }
 
       // Step 3: Refresh product data to get the newly uploaded images with their IDs
@@ -397,8 +432,10 @@ const ProductManagement = () => {
       // Update local state immediately instead of refreshing all data
       if (isNewProduct) {
         addProduct(updatedProductResponse.data);
+        fetchProductsPage();
       } else {
         updateProduct(updatedProductResponse.data);
+        setPageProducts(prev => prev.map(p => p.id === updatedProductResponse.data.id ? updatedProductResponse.data : p));
       }
 
       closeModal();
@@ -421,35 +458,28 @@ const ProductManagement = () => {
     if (!deletingProductId) return;
 
     const originalProducts = [...products];
+    const originalPage = [...pageProducts];
     // Optimistically remove the product from the UI
     removeProduct(deletingProductId);
+    setPageProducts(prev => prev.filter(p => p.id !== deletingProductId));
     setIsConfirmModalOpen(false);
 
     try {
       await apiService.deleteProduct(deletingProductId);
       notify(t('productManagement.notifications.productDeleted'));
+      // Refill the page from the next one.
+      fetchProductsPage();
     } catch (err) {
       notify(t('productManagement.errors.delete'), 'error');
       console.error(err);
       // If the delete fails, revert the state
       setProducts(originalProducts);
+      setPageProducts(originalPage);
     } finally {
       setDeletingProductId(null);
     }
   };
 
-  const filteredProducts = products.filter(product => {
-    const searchMatch = product.name.toLowerCase().includes(searchTerm.toLowerCase());
-    const categoryMatch = selectedCategory ? product.category_id === selectedCategory : true;
-
-    const productHasOrders = orders.some(order => order.order_items.some(item => item.product_id === product.id));
-    const orderMatch = orderFilter ? (orderFilter === 'with-orders' ? productHasOrders : !productHasOrders) : true;
-
-    return searchMatch && categoryMatch && orderMatch;
-  });
-
-  const paginatedProducts = filteredProducts.slice((currentPage - 1) * itemsPerPage, currentPage * itemsPerPage);
-
   if (isLoading) return <LoadingScreen fullScreen={false} />;
 
   return (
@@ -465,14 +495,14 @@ const ProductManagement = () => {
       </div>
 
       <div className="mb-4">
-        <SearchBar value={searchTerm} onChange={(e) => setSearchTerm(e.target.value)} />
+        <SearchBar value={searchTerm} onChange={(e) => { setSearchTerm(e.target.value); setCurrentPage(1); }} />
       </div>
 
       <div className="mb-8 flex flex-col md:flex-row gap-4">
         <Dropdown
           options={[{ value: null, label: t('common.allCategories') }, ...categories.map(c => ({ value: c.id, label: c.name }))]}
           value={selectedCategory}
-          onChange={(option) => setSelectedCategory(option.value)}
+          onChange={(option) => { setSelectedCategory(option.value); setCurrentPage(1); }}
           placeholder={t('common.filterByCategory')}
         />
         <Dropdown
@@ -482,7 +512,7 @@ const ProductManagement = () => {
             { value: 'without-orders', label: t('common.productsWithoutOrders') },
           ]}
           value={orderFilter}
-          onChange={(option) => setOrderFilter(option.value)}
+          onChange={(option) => { setOrderFilter(option.value); setCurrentPage(1); }}
           placeholder={t('common.filterByOrders')}
         />
       </div>
@@ -494,7 +524,7 @@ const ProductManagement = () => {
       )}
 
       <div className="grid grid-cols-1 sm:grid-cols-2 lg:grid-cols-3 xl:grid-cols-4 gap-4">
-        {paginatedProducts.map((product) => (
+        {pageProducts.map((product) => (
           <ProductCard
             key={product.id}
             product={product}
@@ -504,10 +534,10 @@ const ProductManagement = () => {
         ))}
       </div>
       <div className="flex justify-center mt-8">
-        {filteredProducts.length > itemsPerPage && (
+        {totalProducts > itemsPerPage && (
           <Pagination
             currentPage={currentPage}
-            totalItems={filteredProducts.length}
+            totalItems={totalProducts}
             itemsPerPage={itemsPerPage}
             onPageChange={setCurrentPage}
           />
@@ -70,10 +70,13 @@ const ProductDetail = () => {
         .map(v => ({
             id: `variant-${v.id}`,
             image_url: v.image_url,
+            renditions: v.image_renditions,
+            placeholder: v.image_placeholder,
             is_variant: true,
             variant_id: v.id,
         }));
     const allImages = [...productImages, ...variantImages];
+    const selected = allImages.find(image => image.image_url === selectedImage);
 
     const totalStock = variants.length > 0
         ? variants.reduce((sum, v) => sum + (v.stock_quantity || 0), 0)
@@ -122,6 +125,9 @@ const ProductDetail = () => {
                             {selectedImage ? (
                                 <TransformedImage
                                     url={selectedImage}
+                                    renditions={selected?.renditions}
+                                    placeholder={selected?.placeholder}
+                                    sizes="(min-width: 768px) 576px, 100vw"
                                     alt={product.name}
                                     className="w-full h-full object-cover"
                                 />
@@ -142,6 +148,9 @@ const ProductDetail = () => {
                                     >
                                         <TransformedImage
                                             url={image.image_url}
+                                            renditions={image.renditions}
+                                            placeholder={image.placeholder}
+                                            sizes="(min-width: 768px) 144px, 25vw"
                                             alt={product.name}
                                             className="w-full h-full object-cover"
                                         />
@@ -1,8 +1,9 @@
-import React, { useState, useEffect, useContext } from 'react';
+import React, { useState, useEffect, useContext, useCallback, useRef } from 'react';
 import { ShoppingCart, Search, X, Instagram } from 'lucide-react';
 import CategorySlider from '../../../components/product/CategorySlider';
 import ProductGrid from '../../../components/product/ProductGrid';
 import { DataContext } from '../../../context/DataContext';
+import { productService } from '../../../services/api';
 import { useCart } from '../../../context/CartContext';
 import { useLoading } from '../../../context/LoadingContext';
 import CartView from '../../../components/layout/CartView';
@@ -10,36 +11,57 @@ import LoadingScreen from '../../../components/common/LoadingScreen';
 import { useTranslation } from 'react-i18next';
 import usePageTitle from '../../../hooks/usePageTitle';
 
+const PAGE_SIZE = 24;
+
 const StoreFront = () => {
   usePageTitle('المتجر الإلكتروني - أزهار ستور');
-  const { products, categories } = useContext(DataContext);
+  const { categories } = useContext(DataContext);
   const { isLoading } = useLoading();
   const [searchTerm, setSearchTerm] = useState('');
-  const [filteredProducts, setFilteredProducts] = useState([]);
+  const [cards, setCards] = useState([]);
+  const [totalCards, setTotalCards] = useState(0);
+  const [isFetching, setIsFetching] = useState(true);
+  const latestRequest = useRef(0);
   const [selectedCategory, setSelectedCategory] = useState('all');
   const { cartCount } = useCart();
   const [isCartViewOpen, setIsCartViewOpen] = useState(false);
   const { t } = useTranslation();
 
-  // Filter products when category or search changes
-  useEffect(() => {
-    let filtered = products;
-
-    // Filter by category
-    if (selectedCategory !== 'all') {
-      filtered = filtered.filter(product => product.category_id === selectedCategory);
+  // Loads a page of compact product cards: search results while there is a
+  // search term, otherwise the category's listing. Offset 0 starts over.
+  const fetchCards = useCallback(async (offset) => {
+    const request = ++latestRequest.current;
+    setIsFetching(true);
+    try {
+      const term = searchTerm.trim();
+      const page = term
+        ? await productService.searchProducts({ q: term, limit: PAGE_SIZE, offset })
+        : await productService.getProductCards({
+          limit: PAGE_SIZE,
+          offset,
+          category_id: selectedCategory === 'all' ? undefined : selectedCategory,
+        });
+      // A slower response for an earlier search must not replace a newer one.
+      if (request !== latestRequest.current) return;
+      setCards(prev => (offset === 0 ? page.items : [...prev, ...page.items]));
+      setTotalCards(page.total ?? page.items.length);
+    } catch (error) {
+      console.error('Error fetching products:', error);
+    } finally {
+      if (request === latestRequest.current) setIsFetching(false);
     }
+  }, [searchTerm, selectedCategory]);
 
-    // Filter by search term
-    if (searchTerm.trim()) {
-      filtered = filtered.filter(product =>
-        product.name.toLowerCase().includes(searchTerm.toLowerCase()) ||
-        (product.description && product.description.toLowerCase().includes(searchTerm.toLowerCase()))
-      );
-    }
+  useEffect(() => {
+    // Wait for a pause in typing before searching.
+    const timer = setTimeout(() => fetchCards(0), searchTerm ? 300 : 0);
+    return () => clearTimeout(timer);
+  }, [fetchCards, searchTerm]);
 
-    setFilteredProducts(filtered);
-  }, [selectedCategory, searchTerm, products]);
+  // Search spans every category; a selected category narrows the results shown.
+  const filteredProducts = searchTerm.trim() && selectedCategory !== 'all'
+    ? cards.filter(card => card.category_id === selectedCategory)
+    : cards;
 
   const clearSearch = () => {
     setSearchTerm('');
@@ -131,14 +153,27 @@ const StoreFront = () => {
       {/* Product Grid */}
       <main className="container mx-auto px-3 py-8">
         {filteredProducts.length === 0 ? (
-          <div className="text-center py-12">
-            <p className="text-text-light text-lg">{t('common.noProducts')}</p>
-          </div>
+          !isFetching && (
+            <div className="text-center py-12">
+              <p className="text-text-light text-lg">{t('common.noProducts')}</p>
+            </div>
+          )
         ) : (
           <div className="grid grid-cols-2 sm:grid-cols-2 md:grid-cols-3 lg:grid-cols-4 gap-4">
             <ProductGrid products={filteredProducts} />
           </div>
         )}
+        {cards.length < totalCards && (
+          <div className="flex justify-center mt-8">
+            <button
+              onClick={() => fetchCards(cards.length)}
+              disabled={isFetching}
+              className="h-10 px-6 border border-border-gray bg-white text-text-gray rounded-md hover:bg-soft-hover hover:border-brand-purple transition-all duration-200 disabled:opacity-50"
+            >
+              {t('common.loadMore')}
+            </button>
+          </div>
+        )}
       </main>
 
       {/* Footer */}
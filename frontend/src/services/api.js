@@ -33,14 +33,34 @@ api.interceptors.response.use(
   }
 );
 
+// { items, total, nextCursor } from a paged listing response
+const toPage = (res) => ({
+  items: res.data,
+  total: res.headers['x-total-count'] !== undefined ? Number(res.headers['x-total-count']) : null,
+  nextCursor: res.headers['x-next-cursor'] || null,
+});
+
 export const getTranslations = () => api.get('/translations').then(res => res.data);
 export const getAllTranslations = () => api.get('/translations/all').then(res => res.data);
+export const getTranslationBundle = (namespaces) => api.get('/translations/bundle', {
+  params: { namespace: namespaces },
+  paramsSerializer: { indexes: null },
+}).then(res => res.data);
+// The bundle for a version from getTranslationBundle, cached by the browser for
+// good; an outdated version is redirected to the current bundle.
+export const getVersionedTranslationBundle = (version) => api.get(`/translations/bundle/${version}`).then(res => res.data);
 export const updateTranslation = ({ id, value }) => api.patch(`/admin/translations/${id}`, { value });
 export const createTranslation = (data) => api.post('/admin/translations', data);
 
 // Product services
 export const productService = {
   getAllProducts: () => api.get('/products'),
+  // params: { limit, offset, cursor, category_id, min_price, max_price, in_stock, q, sort }
+  getProductsPage: (params) => api.get('/products', { params }).then(toPage),
+  // Compact { id, name, price, category_id, primary_image_url, in_stock } rows for the grid
+  getProductCards: (params) => api.get('/products/cards', { params }).then(toPage),
+  // Ranked cards matching q in name, category or description; params: { q, limit, offset }
+  searchProducts: (params) => api.get('/products/search', { params }).then(toPage),
   getProduct: (id) => api.get(`/products/${id}`),
   createProduct: (data) => api.post('/admin/products', data),
   updateProduct: (id, data) => api.patch(`/admin/products/${id}`, data),
@@ -52,7 +72,20 @@ export const productService = {
       headers: { 'Content-Type': 'multipart/form-data' },
     });
   },
+  // Several files in one request; resolves to [{ filename, image, error }] in upload order
+  uploadImages: (productId, files) => {
+    const formData = new FormData();
+    files.forEach(file => formData.append('files', file));
+    return api.post(`/admin/products/${productId}/images/batch`, formData, {
+      headers: { 'Content-Type': 'multipart/form-data' },
+    });
+  },
   deleteImage: (imageId) => api.delete(`/admin/products/images/${imageId}`),
+  // Bulk catalog files; `kind` is 'products' or 'variants', the file is sent as the raw body
+  importCatalog: (kind, file) => api.post(`/admin/catalog/import/${kind}`, file, {
+    headers: { 'Content-Type': file.name?.endsWith('.ndjson') || file.name?.endsWith('.jsonl') ? 'application/x-ndjson' : 'text/csv' },
+  }),
+  exportCatalog: (kind, format = 'csv') => api.get(`/admin/catalog/export/${kind}`, { params: { format }, responseType: 'blob' }),
   setPrimaryImage: (imageId) => api.post(`/admin/products/images/${imageId}/set-primary`),
   createVariant: (productId, data) => api.post(`/admin/products/${productId}/variants`, data),
   updateVariant: (variantId, data) => api.patch(`/admin/products/variants/${variantId}`, data),
@@ -96,6 +129,10 @@ export const apiService = {
 
   // Products
   getAllProducts: () => api.get('/products'),
+  // params: { limit, offset, cursor, category_id, min_price, max_price, in_stock, q, sort }
+  getProductsPage: (params) => api.get('/products', { params }).then(toPage),
+  // The same, plus has_orders (true/false), for the admin product list
+  getAdminProductsPage: (params) => api.get('/admin/products', { params }).then(toPage),
   getProduct: (id) => api.get(`/products/${id}`),
   createProduct: (data) => api.post('/admin/products', data),
   updateProduct: (id, data) => api.patch(`/admin/products/${id}`, data),
@@ -107,6 +144,14 @@ export const apiService = {
       headers: { 'Content-Type': 'multipart/form-data' },
     });
   },
+  // Several files in one request; resolves to [{ filename, image, error }] in upload order
+  uploadImages: (productId, files) => {
+    const formData = new FormData();
+    files.forEach(file => formData.append('files', file));
+    return api.post(`/admin/products/${productId}/images/batch`, formData, {
+      headers: { 'Content-Type': 'multipart/form-data' },
+    });
+  },
   deleteImage: (imageId) => api.delete(`/admin/products/images/${imageId}`),
   setPrimaryImage: (imageId) => api.post(`/admin/products/images/${imageId}/set-primary`),
   createVariant: (productId, data) => api.post(`/admin/products/${productId}/variants`, data),
@@ -134,6 +179,12 @@ export const apiService = {
 
   // Orders
   getAllOrders: () => api.get('/admin/orders'),
+  // One page of orders with a slim embed; `status` may be an array, `q` is an order id or customer name
+  getOrdersPage: (params) => api.get('/admin/orders', { params, paramsSerializer: { indexes: null } }).then(toPage),
+  // { orders, deleted, cursor, has_more } changed since `since`; pass back `cursor` next time
+  getOrderChanges: (since, limit) => api.get('/admin/orders/changes', { params: { since, limit } }).then(res => res.data),
+  // { token, expires_in }: opens the order change stream, which EventSource cannot authorize with a header
+  getOrderStreamToken: () => api.post('/admin/orders/stream-token').then(res => res.data),
   createOrder: (data) => api.post('/orders', data),
   updateOrder: (id, data) => api.patch(`/admin/orders/${id}`, data),
   deleteOrder: (id) => api.delete(`/admin/orders/${id}`),
@@ -166,4 +217,48 @@ export const apiService = {
   },
 };
 
+// Calls onChanges with each { orders, deleted, cursor, has_more } batch from
+// the order change stream. The stream token is short-lived, so a dropped
+// connection is reopened with a fresh one, resuming after the last cursor.
+// Returns a function that closes the stream.
+export const subscribeToOrderChanges = (onChanges) => {
+  let source = null;
+  let retryTimer = null;
+  let cursor = null;
+  let closed = false;
+
+  const reconnect = () => {
+    if (!closed) retryTimer = setTimeout(connect, 5000);
+  };
+
+  const connect = async () => {
+    try {
+      const { token } = await apiService.getOrderStreamToken();
+      if (closed) return;
+      const params = new URLSearchParams({ token });
+      if (cursor) params.set('since', cursor);
+      source = new EventSource(`${API_BASE_URL}/admin/orders/stream?${params}`);
+      source.addEventListener('changes', (event) => {
+        const changes = JSON.parse(event.data);
+        cursor = changes.cursor;
+        onChanges(changes);
+      });
+      source.onerror = () => {
+        // EventSource would retry with the same token, which may have expired.
+        source.close();
+        reconnect();
+      };
+    } catch {
+      reconnect();
+    }
+  };
+
+  connect();
+  return () => {
+    closed = true;
+    clearTimeout(retryTimer);
+    source?.close();
+  };
+};
+
 export default api;